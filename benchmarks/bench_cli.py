@@ -0,0 +1,67 @@
+"""Benchmark :func:`pendant.aws.cli` against building a new ``awscli`` driver per call.
+
+Requests are served by :mod:`moto`, so no AWS credentials are needed. Run
+from the repository root with ``python benchmarks/bench_cli.py``.
+"""
+
+import io
+import os
+import sys
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import boto3
+import moto
+from awscli.clidriver import create_clidriver
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from pendant.aws import cli  # noqa: E402
+
+NUMBER = 20
+REPEAT = 3
+WORKERS = 8
+
+BUCKET = 'mybucket'
+COMMAND = f'--region us-east-1 --output json s3api head-object --bucket {BUCKET} --key myobject'
+
+
+def unpooled_cli(command: str) -> str:
+    """The previous :func:`pendant.aws.cli`, which swaps the global streams on every call."""
+    current_stdout, current_stderr = sys.stdout, sys.stderr
+    try:
+        sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+        if create_clidriver().main(command.split()) != 0:
+            raise RuntimeError('AWS CLI exited with an error')
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdout, sys.stderr = current_stdout, current_stderr
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(f'{name:<22}{before:>14.2f}{after:>14.2f}{before / after:>9.1f}x')
+
+
+def main() -> None:
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    with moto.mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET)
+        s3.put_object(Bucket=BUCKET, Key='myobject', Body=b'data')
+        cli(COMMAND)
+
+        def per_call(statement: Callable[[], object], number: int = NUMBER) -> float:
+            return min(timeit.repeat(statement, number=number, repeat=REPEAT)) / NUMBER * 1e3
+
+        unpooled = per_call(lambda: unpooled_cli(COMMAND))
+        print(f'{"case":<22}{"unpooled (ms)":>14}{"pooled (ms)":>14}{"speedup":>10}')
+        report('sequential', unpooled, per_call(lambda: cli(COMMAND)))
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            pooled = per_call(lambda: list(executor.map(cli, [COMMAND] * NUMBER)), number=1)
+        report(f'{WORKERS} threads (pooled)', unpooled, pooled)
+
+
+if __name__ == '__main__':
+    main()
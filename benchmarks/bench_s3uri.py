@@ -0,0 +1,96 @@
+"""Benchmark :class:`pendant.aws.s3.S3Uri` against regex parsing on every access.
+
+:class:`S3Uri` parses its bucket and key on construction, so building one URI
+costs more than the regex version, which parses nothing up front. Bulk
+construction with :meth:`S3Uri.from_paths` reuses the bucket of the previous
+path, and costs less.
+
+Run from the repository root with ``python benchmarks/bench_s3uri.py``.
+"""
+
+import os
+import re
+import sys
+import timeit
+from typing import Callable, Iterable, Union
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from pendant.aws.s3 import S3Uri  # noqa: E402
+
+NUMBER = 100_000
+REPEAT = 5
+
+
+class RegexS3Uri(object):
+    """The previous :class:`S3Uri`, which searches a regex on every property access."""
+
+    delimiter = r'/'
+
+    _pattern_validate = re.compile(r'^s3://.*')
+    _pattern_key = re.compile(r'^s3://[^/\n]+/?(.*)?')
+    _pattern_bucket = re.compile(r'^s3://([^/]*)')
+
+    def __init__(self, path: Union[str, 'RegexS3Uri']) -> None:
+        path = str(path)
+        assert self._pattern_validate.match(path)
+        self.path = path
+
+    def __truediv__(self, other: str) -> 'RegexS3Uri':
+        if self.path.endswith(self.delimiter):
+            return RegexS3Uri(self.path + other)
+        return RegexS3Uri(self.delimiter.join([self.path, other]))
+
+    @property
+    def bucket(self) -> str:
+        search = self._pattern_bucket.search(self.path)
+        return search.groups()[0] if search else ''
+
+    @property
+    def key(self) -> str:
+        search = self._pattern_key.search(self.path)
+        return search.groups()[0] if search else ''
+
+    def __str__(self) -> str:
+        return self.path
+
+
+def access(uris: Iterable) -> None:
+    for uri in uris:
+        uri.bucket, uri.key
+
+
+def join(uris: Iterable) -> None:
+    for uri in uris:
+        (uri / 'reads.bam.bai').key
+
+
+def report(name: str, before: float, after: float) -> None:
+    print(f'{name:<18}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x')
+
+
+def main() -> None:
+    paths = [f's3://mybucket/samples/{index}/reads.bam' for index in range(NUMBER)]
+    regex_uris, uris = list(map(RegexS3Uri, paths)), S3Uri.from_paths(paths)
+
+    def per_uri(statement: Callable[[], object]) -> float:
+        return min(timeit.repeat(statement, number=1, repeat=REPEAT)) / NUMBER * 1e6
+
+    cases = [
+        ('construct', lambda: list(map(RegexS3Uri, paths)), lambda: list(map(S3Uri, paths))),
+        ('bulk construct', lambda: list(map(RegexS3Uri, paths)), lambda: S3Uri.from_paths(paths)),
+        ('bucket and key', lambda: access(regex_uris), lambda: access(uris)),
+        (
+            'construct+access',
+            lambda: access(map(RegexS3Uri, paths)),
+            lambda: access(S3Uri.from_paths(paths)),
+        ),
+        ('join then key', lambda: join(regex_uris), lambda: join(uris)),
+    ]
+    print(f'{"case":<18}{"regex (us)":>12}{"S3Uri (us)":>12}{"speedup":>10}')
+    for name, before, after in cases:
+        report(name, per_uri(before), per_uri(after))
+
+
+if __name__ == '__main__':
+    main()
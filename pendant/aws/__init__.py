@@ -1,52 +1,62 @@
-import io
-import os
-import sys
+import importlib
 import shlex
-
-from awscli.clidriver import create_clidriver
-
-from pendant.util import ExitCode
+from typing import Any
 
 __all__ = ['cli']
 
+_SUBMODULES = frozenset(
+    {
+        'aio',
+        'batch',
+        'client',
+        'clidriver',
+        'dag',
+        'exception',
+        'export',
+        'journal',
+        'listing',
+        'logcache',
+        'logs',
+        'metadata',
+        'response',
+        's3',
+        's3file',
+        'throttle',
+        'transfer',
+    }
+)
+
+
+def __getattr__(name: str) -> Any:
+    """Import a submodule on first access, so ``import pendant`` stays cheap."""
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {repr(__name__)} has no attribute {repr(name)}')
+
 
 def cli(command: str) -> str:
     """Use the ``awscli`` to execute a command.
 
     This function will call the ``awscli`` within the same process and not
-    spawn subprocesses. In addition, the STDERR of the called function will be
-    surpressed and the STDOUT will be returned as a string.
+    spawn subprocesses. Drivers are pooled and reused between calls, and the
+    output of each call is captured separately, so this function is safe to
+    call from many threads at once. The STDOUT of the called function will be
+    returned as a string. The ``awscli`` is only imported on the first call.
 
     Args:
         command: The command to be executed by the ``awscli``.
 
+    Raises:
+        RuntimeError: If the command fails, with the STDERR of the command.
+
     Examples:
         >>> # cli('--version')
 
     """
-    cli_args = shlex.split(command)
-    current_environment = dict(os.environ)
-    current_stdout = sys.stdout
-    current_stderr = sys.stderr
-    try:
-        env = os.environ.copy()
-        env['LC_CTYPE'] = u'en_US.UTF'
-        os.environ.update(env)
-
-        sys.stdout = io.StringIO()
-        sys.stderr = io.StringIO()
-
-        driver = create_clidriver()
-        exit_code = ExitCode(driver.main(cli_args))
-
-        if not exit_code.is_ok():
-            raise RuntimeError(f'AWS CLI exited with code {exit_code}')
-
-        stdout = sys.stdout.getvalue()
-        sys.stderr.getvalue()
-    finally:
-        sys.stdout = current_stdout
-        sys.stderr = current_stderr
-        os.environ.clear()
-        os.environ.update(current_environment)
+    from pendant.aws.clidriver import get_driver_pool
+
+    exit_code, stdout, stderr = get_driver_pool().run(shlex.split(command))
+    if not exit_code.is_ok():
+        message = f'AWS CLI exited with code {exit_code}'
+        raise RuntimeError(f'{message}: {stderr.strip()}' if stderr.strip() else message)
     return stdout
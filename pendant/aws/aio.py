@@ -0,0 +1,304 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from pendant.aws import batch as aws_batch
+from pendant.aws.batch import CLOUDWATCH_LOG_GROUP, BatchJob, JobPoller
+from pendant.aws.exception import BatchJobSubmissionError, BatchJobTimeoutError
+from pendant.aws.logs import LogEvent, LogEventBatch, LogEventView, Timestamp
+from pendant.aws.response import SubmitJobResponse
+
+__all__ = ['AsyncBatchJob', 'wait_all', 'wrap_jobs']
+
+T = TypeVar('T')
+
+
+class AsyncBatchJob(object):
+    """An :mod:`asyncio` interface to an AWS Batch job.
+
+    Every blocking call of the wrapped :class:`~pendant.aws.batch.BatchJob` is
+    run in an executor so that one event loop can drive many jobs at once. If a
+    semaphore is given, it bounds how many calls are in flight at the same time
+    across every job which shares it.
+
+    Args:
+        job: The Batch job to wrap.
+        semaphore: A semaphore limiting the number of concurrent calls.
+        executor: The executor to run calls in, defaults to the loop's executor.
+
+    Examples:
+        >>> # jobs = wrap_jobs(map(BatchJob, definitions), max_concurrency=32)
+        >>> # await asyncio.gather(*(job.submit(queue='prod') for job in jobs))
+
+    """
+
+    def __init__(
+        self,
+        job: BatchJob,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.job = job
+        self._semaphore = semaphore
+        self._executor = executor
+
+    async def _run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking function in the executor, respecting the semaphore."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(function, *args, **kwargs)
+        if self._semaphore is None:
+            return await loop.run_in_executor(self._executor, call)
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, call)
+
+    @property
+    def job_id(self) -> Optional[str]:
+        """Return the job ID."""
+        return self.job.job_id
+
+    async def submit(
+        self, queue: str, container_overrides: Optional[Mapping] = None
+    ) -> SubmitJobResponse:
+        """Submit this job to Batch.
+
+        Args:
+            queue: The Batch job queue to use.
+            container_overrides: The values to override in the spawned container.
+
+        Returns:
+            The service response to job submission.
+
+        """
+        return await self._run(self.job.submit, queue, container_overrides)
+
+    async def describe(self) -> Dict:
+        """Describe this job."""
+        return await self._run(self.job.describe)
+
+    async def refresh(self) -> Dict:
+        """Describe this job again, ignoring any cached description."""
+        return await self._run(self.job.refresh)
+
+    async def status(self) -> str:
+        """Return the job status."""
+        return await self._run(self.job.status)
+
+    async def is_running(self) -> bool:
+        """Return if this job's state is RUNNING or not."""
+        return await self._run(self.job.is_running)
+
+    async def is_runnable(self) -> bool:
+        """Return if this job's state is RUNNABLE or not."""
+        return await self._run(self.job.is_runnable)
+
+    async def cancel(self, reason: str) -> Dict:
+        """Cancel this job.
+
+        Args:
+            reason: The reason why the job must be canceled.
+
+        """
+        return await self._run(self.job.cancel, reason)
+
+    async def terminate(self, reason: str) -> Dict:
+        """Terminate this job.
+
+        Args:
+            reason: The reason why the job must be terminated.
+
+        """
+        return await self._run(self.job.terminate, reason)
+
+    async def log_stream_name(self) -> str:
+        """Return the Batch log stream name for this job."""
+        return await self._run(self.job.log_stream_name)
+
+    async def log_stream_events(
+        self,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> List[LogEvent]:
+        """Return all log events for this job, filtered in CloudWatch.
+
+        Args:
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
+        """
+        return await self._run(self.job.log_stream_events, filter_pattern, start_time, end_time)
+
+    async def log_stream_event_batch(
+        self,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> LogEventBatch:
+        """Return all log events for this job as one batch, filtered in CloudWatch.
+
+        Args:
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
+        """
+        return await self._run(
+            self.job.log_stream_event_batch, filter_pattern, start_time, end_time
+        )
+
+    async def follow_log_stream_events(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        page_size: Optional[int] = None,
+    ) -> AsyncIterator[LogEventView]:
+        """Follow the log events of this job, like ``tail -f``, until it finishes.
+
+        Polls like :meth:`pendant.aws.batch.BatchJob.follow_log_stream_events`,
+        but only each describe and page fetch runs in the executor, bounded by
+        the semaphore. The loop waits between polls with :func:`asyncio.sleep`,
+        so no thread is held while the job runs.
+
+        Args:
+            min_interval: The minimum seconds between two polls.
+            max_interval: The maximum seconds between two polls.
+            page_size: The maximum number of events per page.
+
+        """
+        job = self.job
+        interval = min_interval
+        description = await self.refresh()
+        while 'logStreamName' not in description.get('container', {}):
+            if job.is_terminal(description):
+                return
+            await asyncio.sleep(interval)
+            interval = min(max_interval, 2 * interval)
+            description = await self.refresh()
+        stream_name = description['container']['logStreamName']
+
+        next_token: Optional[str] = None
+        interval = min_interval
+        while True:
+            finished = job.is_terminal(await self.refresh())
+            events, next_token = await self._run(
+                job.log_util.read_since, CLOUDWATCH_LOG_GROUP, stream_name, next_token, page_size
+            )
+            for event in events:
+                yield event
+            if finished:
+                return
+            interval = min_interval if events else min(max_interval, 2 * interval)
+            await asyncio.sleep(interval)
+
+    async def wait(
+        self, timeout: Optional[float] = None, poller: Optional[JobPoller] = None
+    ) -> str:
+        """Wait until this job reaches a terminal state.
+
+        Args:
+            timeout: The maximum number of seconds to wait, defaults to forever.
+            poller: The job poller to use, defaults to the shared poller.
+
+        Returns:
+            The terminal status of this job.
+
+        """
+        statuses = await wait_all([self], timeout=timeout, poller=poller)
+        return statuses[0]
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(job={repr(self.job)})'
+
+
+def wrap_jobs(
+    jobs: Iterable[BatchJob],
+    max_concurrency: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> List[AsyncBatchJob]:
+    """Wrap many Batch jobs so that they share one concurrency limit.
+
+    The semaphore is created here, so this function should be called from
+    within the event loop which will await the jobs.
+
+    Args:
+        jobs: The Batch jobs to wrap.
+        max_concurrency: The maximum number of calls in flight across all jobs.
+        executor: The executor to run calls in, defaults to the loop's executor.
+
+    """
+    semaphore = None if max_concurrency is None else asyncio.Semaphore(max_concurrency)
+    return [AsyncBatchJob(job, semaphore=semaphore, executor=executor) for job in jobs]
+
+
+async def wait_all(
+    jobs: Iterable[Union[AsyncBatchJob, BatchJob]],
+    timeout: Optional[float] = None,
+    poller: Optional[JobPoller] = None,
+) -> List[str]:
+    """Wait until all jobs reach a terminal state.
+
+    The jobs are watched by one :class:`~pendant.aws.batch.JobPoller`, so many
+    jobs are described in a few batched calls. The poller resolves a future on
+    the event loop as each job finishes, so waiting holds no executor thread.
+
+    Args:
+        jobs: The submitted Batch jobs to wait on.
+        timeout: The maximum number of seconds to wait, defaults to forever.
+        poller: The job poller to use, defaults to the shared poller.
+
+    Returns:
+        The terminal status of each job, in the order of the jobs.
+
+    Raises:
+        BatchJobSubmissionError: If any job has not been submitted.
+        BatchJobTimeoutError: If any job did not finish in time.
+        BatchJobNotFoundError: If any job was not found after many polls.
+
+    """
+    batch_jobs = [job.job if isinstance(job, AsyncBatchJob) else job for job in jobs]
+    if any(job.job_id is None for job in batch_jobs):
+        raise BatchJobSubmissionError('Cannot wait on a job that has not been submitted.')
+    poller = aws_batch.get_job_poller() if poller is None else poller
+    loop = asyncio.get_running_loop()
+    watched = [job for job in batch_jobs if not job.is_terminal(job._description or {})]
+    futures: List[asyncio.Future] = [loop.create_future() for _ in watched]
+    events = poller.watch_all(watched)
+    try:
+        for job, future in zip(watched, futures):
+            poller.add_done_callback(
+                job, functools.partial(loop.call_soon_threadsafe, _set_done, future)
+            )
+        try:
+            await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        except asyncio.TimeoutError:
+            unfinished = (job for job, event in zip(watched, events) if not event.is_set())
+            job = next(unfinished, watched[0])
+            raise BatchJobTimeoutError(
+                f'Batch job did not finish in {timeout} seconds: {job.job_id}'
+            ) from None
+        for job in watched:
+            error = poller.error(job)
+            if error is not None:
+                raise error
+    finally:
+        poller.unwatch(*watched)
+    return [job.status() for job in batch_jobs]
+
+
+def _set_done(future: asyncio.Future) -> None:
+    """Resolve a future unless it was cancelled, such as by a timeout."""
+    if not future.done():
+        future.set_result(None)
@@ -1,18 +1,68 @@
+import functools
 import inspect
+import json
+import os
+import struct
+import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Mapping, Optional, Tuple
+from threading import Condition, Event, RLock, Thread
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import boto3
+import botocore.exceptions
 
 from custom_inherit import DocInheritMeta
 
-from pendant.aws.exception import BatchJobSubmissionError
-from pendant.aws.logs import AwsLogUtil, LogEvent
+from pendant.aws import client as aws_client
+from pendant.aws.exception import (
+    BatchJobNotFoundError,
+    BatchJobSubmissionError,
+    BatchJobTimeoutError,
+)
+from pendant.aws.logs import (
+    ERROR_FILTER_PATTERN,
+    AwsLogUtil,
+    LogEvent,
+    LogEventBatch,
+    LogEventView,
+)
+from pendant.aws.logs import Timestamp
 from pendant.aws.response import SubmitJobResponse
+from pendant.aws.s3 import S3Uri
 from pendant.util import format_ISO8601
 
-__all__ = ['BatchJob', 'JobDefinition']
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+    from pendant.aws.journal import JobJournal  # noqa: F401
+
+__all__ = [
+    'ArrayBatchJob',
+    'BatchJob',
+    'BatchJobSet',
+    'JobDefinition',
+    'JobPoller',
+    'JobTracker',
+    'array_job_parameters',
+    'bulk_log_stream_events',
+    'get_job_poller',
+    'log_stream_names',
+    'wait_all',
+]
 
 CLOUDWATCH_LOG_GROUP = '/aws/batch/job'
 BATCH_STATUS_SUBMITTED = 'SUBMITTED'
@@ -20,8 +70,35 @@ BATCH_STATUS_PENDING = 'PENDING'
 BATCH_STATUS_RUNNABLE = 'RUNNABLE'
 BATCH_STATUS_STARTING = 'STARTING'
 BATCH_STATUS_RUNNING = 'RUNNING'
+BATCH_STATUS_SUCCEEDED = 'SUCCEEDED'
 BATCH_STATUS_FAILED = 'FAILED'
 BATCH_STATUS_NOTFOUND = 'NOTFOUND'
+BATCH_TERMINAL_STATUSES = frozenset({BATCH_STATUS_SUCCEEDED, BATCH_STATUS_FAILED})
+
+BATCH_POLL_INTERVALS: Mapping[str, float] = {
+    BATCH_STATUS_SUBMITTED: 5.0,
+    BATCH_STATUS_PENDING: 10.0,
+    BATCH_STATUS_RUNNABLE: 30.0,
+    BATCH_STATUS_STARTING: 5.0,
+    BATCH_STATUS_RUNNING: 5.0,
+    BATCH_STATUS_NOTFOUND: 5.0,
+}
+
+DESCRIBE_JOBS_MAX_IDS = 100
+
+ARRAY_JOB_MIN_SIZE = 2
+ARRAY_JOB_MAX_SIZE = 10_000
+ARRAY_JOB_MANIFEST_PARAMETER = 'manifest'
+ARRAY_JOB_MANIFEST_INDEX_SUFFIX = '.index'
+ARRAY_JOB_INDEX_VARIABLE = 'AWS_BATCH_JOB_ARRAY_INDEX'
+
+T = TypeVar('T')
+
+
+def _chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Yield successive chunks of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
 
 
 class JobDefinition(
@@ -87,26 +164,84 @@ class BatchJob(object):
 
     Args:
         definition: A Batch job definition.
+        client: The Batch client to use, defaults to the shared Batch client.
+        max_age: Seconds a job description is reused before it is described
+            again. Descriptions of SUCCEEDED or FAILED jobs are reused forever.
+        journal: A journal to record this job's submission and status in.
 
     """
 
-    def __init__(self, definition: JobDefinition):
+    def __init__(
+        self,
+        definition: JobDefinition,
+        client: Optional['BaseClient'] = None,
+        max_age: float = 5.0,
+        journal: Optional['JobJournal'] = None,
+    ):
         definition.validate()
+        self._initialize(definition, client, max_age)
+        self.journal = journal
+
+    def _initialize(
+        self, definition: JobDefinition, client: Optional['BaseClient'], max_age: float
+    ) -> None:
+        """Initialize the state of an unsubmitted job."""
         self.definition = definition
-        self._client = boto3.client('batch')
+        self._client = aws_client.client('batch') if client is None else client
+        self.journal = None
+        self.log_util = AwsLogUtil()
 
         self._is_submitted: bool = False
 
         self._container_overrides: Mapping = dict()
+        self._depends_on: List[Mapping] = []
         self._job_id: Optional[str] = None
         self._queue: Optional[str] = None
         self._submit_response: Optional[SubmitJobResponse] = None
+        self._tracker: Optional[JobTracker] = None
+
+        self.max_age = max_age
+        self._description: Optional[Dict] = None
+        self._described_at: float = 0.0
+        self._is_partial: bool = False
+
+    @staticmethod
+    def from_job_id(
+        definition: JobDefinition,
+        job_id: str,
+        queue: Optional[str] = None,
+        client: Optional['BaseClient'] = None,
+        max_age: float = 5.0,
+    ) -> 'BatchJob':
+        """Return a Batch job for a job which has already been submitted.
+
+        The job definition is not validated, and the job is not submitted again.
+
+        Args:
+            definition: The Batch job definition the job was submitted with.
+            job_id: The job ID.
+            queue: The Batch job queue the job was submitted to.
+            client: The Batch client to use, defaults to the shared Batch client.
+            max_age: Seconds a job description is reused before it is described again.
+
+        """
+        job: BatchJob = BatchJob.__new__(BatchJob)
+        job._initialize(definition, client, max_age)
+        job._is_submitted = True
+        job._job_id = job_id
+        job._queue = queue
+        return job
 
     @property
     def container_overrides(self) -> Optional[Mapping]:
         """Return container overriding parameters."""
         return self._container_overrides
 
+    @property
+    def depends_on(self) -> List[Mapping]:
+        """Return the jobs this job depends on, as Batch ``dependsOn`` mappings."""
+        return self._depends_on
+
     @property
     def job_id(self) -> Optional[str]:
         """Return the job ID."""
@@ -117,28 +252,136 @@ class BatchJob(object):
         """Return the job queue."""
         return self._queue
 
-    @staticmethod
-    def describe_job(job_id: str) -> Dict:
-        """Describe this job."""
-        job, *_ = BatchJob.describe_jobs([job_id])
-        return job if job else dict()
+    @property
+    def tracker(self) -> Optional['JobTracker']:
+        """Return the job tracker this job is registered with, if any."""
+        return self._tracker
 
     @staticmethod
-    def describe_jobs(job_ids: List[str]) -> List[Dict]:
+    def describe_job(job_id: str, client: Optional['BaseClient'] = None) -> Dict:
         """Describe a Batch job by job ID."""
-        jobs: List[Dict] = boto3.client('batch').describe_jobs(jobs=job_ids)['jobs']
+        jobs = BatchJob.describe_jobs([job_id], client)
+        return jobs[0] if jobs else dict()
+
+    @staticmethod
+    def describe_jobs(job_ids: Sequence[str], client: Optional['BaseClient'] = None) -> List[Dict]:
+        """Describe many Batch jobs by job ID.
+
+        The job IDs are described in chunks of at most 100, which is the maximum
+        number of job IDs allowed in one request.
+
+        Args:
+            job_ids: The job IDs to describe.
+            client: The Batch client to use, defaults to the shared Batch client.
+
+        Returns:
+            The job descriptions of all jobs which were found.
+
+        """
+        client = aws_client.client('batch') if client is None else client
+        jobs: List[Dict] = []
+        for chunk in _chunked(job_ids, DESCRIBE_JOBS_MAX_IDS):
+            jobs.extend(client.describe_jobs(jobs=list(chunk))['jobs'])
         return jobs
 
-    def status(self) -> str:
-        """Return the job status."""
+    def describe(self) -> Dict:
+        """Describe this job.
+
+        The last description is reused if it is younger than :attr:`max_age`
+        seconds or if this job has reached a terminal state. If this job is
+        registered with a :class:`JobTracker` then the tracker's latest snapshot
+        is used instead of describing this job on its own.
+
+        """
         if self.job_id is None:
             raise BatchJobSubmissionError(
                 'Cannot check status of a job that has not been submitted.'
             )
-        job = BatchJob.describe_job(self.job_id)
+        if self._description is not None and (
+            self.is_terminal(self._description)
+            or time.monotonic() - self._described_at < self.max_age
+        ):
+            return self._description
+        if self._tracker is not None:
+            return self._tracker.description(self.job_id)
+        return self.refresh()
+
+    def refresh(self) -> Dict:
+        """Describe this job again, ignoring any description younger than :attr:`max_age`.
+
+        Jobs which have reached a terminal state are never described again.
+
+        """
+        if self.job_id is None:
+            raise BatchJobSubmissionError(
+                'Cannot check status of a job that has not been submitted.'
+            )
+        if (
+            self._description is not None
+            and self.is_terminal(self._description)
+            and not self._is_partial
+        ):
+            return self._description
+        description = BatchJob.describe_job(self.job_id, self._client)
+        changed = [self] if self._update(description) else []
+        if self._tracker is not None:
+            if description:
+                changed.extend(filter(None, [self._tracker._update(description)]))
+            else:
+                self._tracker._missing([self.job_id])
+        _journal_statuses(changed)
+        return description
+
+    def _update(self, description: Dict) -> bool:
+        """Store a new description of this job, and return if its status changed.
+
+        The caller records changed statuses with :func:`_journal_statuses`, so
+        that many jobs described together are journaled together.
+
+        """
+        previous = self._description
+        self._description = description
+        self._described_at = time.monotonic()
+        self._is_partial = False
+        return previous is None or previous.get('status') != description.get('status')
+
+    def _seed(self, status: str) -> None:
+        """Store the known terminal status of this job as a partial description.
+
+        The status methods read the partial description, but this job is
+        described once more when its full description is needed.
+
+        """
+        assert status in BATCH_TERMINAL_STATUSES, 'Only terminal statuses can be seeded.'
+        self._description = {'jobId': self.job_id, 'status': status}
+        self._described_at = time.monotonic()
+        self._is_partial = True
+
+    @staticmethod
+    def is_terminal(description: Mapping) -> bool:
+        """Return if a job description is in a terminal state (SUCCEEDED or FAILED)."""
+        return description.get('status') in BATCH_TERMINAL_STATUSES
+
+    def status(self) -> str:
+        """Return the job status."""
+        job = self.describe()
         status: str = job.get('status', BATCH_STATUS_NOTFOUND)
         return status
 
+    def wait(self, timeout: Optional[float] = None, poller: Optional['JobPoller'] = None) -> str:
+        """Block until this job reaches a terminal state.
+
+        Args:
+            timeout: The maximum number of seconds to wait, defaults to forever.
+            poller: The job poller to use, defaults to the shared poller.
+
+        Returns:
+            The terminal status of this job, SUCCEEDED or FAILED.
+
+        """
+        (status,) = wait_all([self], timeout=timeout, poller=poller)
+        return status
+
     def cancel(self, reason: str) -> Dict:
         """Cancel this job.
 
@@ -184,13 +427,17 @@ class BatchJob(object):
         return self._is_submitted
 
     def submit(
-        self, queue: str, container_overrides: Optional[Mapping] = None
+        self,
+        queue: str,
+        container_overrides: Optional[Mapping] = None,
+        depends_on: Optional[Sequence[Mapping]] = None,
     ) -> SubmitJobResponse:
         """Submit this job to Batch.
 
         Args:
             queue: The Batch job queue to use.
             container_overrides: The values to override in the spawned container.
+            depends_on: The jobs this job depends on, as Batch ``dependsOn`` mappings.
 
         Returns:
             The service response to job submission.
@@ -199,47 +446,1026 @@ class BatchJob(object):
         assert not self.is_submitted(), 'Cannot submit already submitted job!'
         self._queue = queue
         self._container_overrides = container_overrides if container_overrides else {}
-        job_name = self.definition.make_job_name()
-        response: Mapping = self._client.submit_job(
-            jobName=job_name,
-            jobQueue=queue,
-            jobDefinition=str(self.definition),
-            parameters=self.definition.to_dict(),
-            containerOverrides=self.container_overrides,
-        )
+        self._depends_on = list(depends_on) if depends_on else []
+        response: Mapping = self._client.submit_job(**self._submit_request(queue))
         submit_response = SubmitJobResponse(response)
+        self._submit_response = submit_response
 
         if submit_response.is_ok():
             self._is_submitted = True
             self._job_id = submit_response.job_id
-            self._submit_response = submit_response
+            if self.journal is not None:
+                self.journal.record(self)
         else:
             raise BatchJobSubmissionError(f'Batch job failed to submit!\n{response}')
         return submit_response
 
+    def _submit_request(self, queue: str) -> Dict[str, Any]:
+        """Return the keyword arguments of the submit-job request for this job."""
+        request: Dict[str, Any] = dict(
+            jobName=self.definition.make_job_name(),
+            jobQueue=queue,
+            jobDefinition=str(self.definition),
+            parameters=self.definition.to_dict(),
+            containerOverrides=self.container_overrides,
+        )
+        if self.depends_on:
+            request['dependsOn'] = self.depends_on
+        return request
+
     def log_stream_name(self) -> str:
         """Return the Batch log stream name for this job."""
-        if self.job_id is None:
-            raise BatchJobSubmissionError(
-                'Cannot check status of a job that has not been submitted.'
-            )
-        job = BatchJob.describe_job(self.job_id)
+        job = self.refresh() if self._is_partial else self.describe()
         log_stream_name: str = job['container']['logStreamName']
         return log_stream_name
 
-    def log_stream_events(self) -> List[LogEvent]:
+    def log_stream_events(
+        self,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> List[LogEvent]:
         """Return all log events for this job.
 
+        Use :meth:`log_stream_event_batch` to keep the events in a compact
+        :class:`~pendant.aws.logs.LogEventBatch` instead.
+
+        Args:
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
+        Returns:
+            events: All log events, to date.
+
+        """
+        return self.log_stream_event_batch(filter_pattern, start_time, end_time).to_events()
+
+    def log_stream_event_batch(
+        self,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> LogEventBatch:
+        """Return all log events for this job as one compact batch.
+
+        Filtering by pattern and time happens in CloudWatch, so only matching
+        events are transferred. Unfiltered events are read through the log
+        cache of :attr:`log_util`, if it has one, so the logs of a finished
+        job are only ever downloaded once.
+
+        Args:
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
         Returns:
             events: All log events, to date.
 
         """
-        log_util = AwsLogUtil()
         log_stream_name = self.log_stream_name()
-        events = log_util.get_log_events(
-            group_name=CLOUDWATCH_LOG_GROUP, stream_name=log_stream_name
+        unfiltered = filter_pattern is None and start_time is None and end_time is None
+        if self.log_util.cache is not None and unfiltered:
+            description = self.describe()
+            return self.log_util.get_cached_log_events(
+                CLOUDWATCH_LOG_GROUP,
+                log_stream_name,
+                complete=self.is_terminal(description),
+                stopped_at=description.get('stoppedAt'),
+            )
+        events = self.log_util.get_log_event_batch(
+            group_name=CLOUDWATCH_LOG_GROUP,
+            stream_name=log_stream_name,
+            filter_pattern=filter_pattern,
+            start_time=start_time,
+            end_time=end_time,
         )
         return events
 
+    def recent_log_stream_events(
+        self, minutes: float, filter_pattern: Optional[str] = None
+    ) -> LogEventBatch:
+        """Return the log events of the last few minutes for this job.
+
+        Args:
+            minutes: How many minutes back from now to read.
+            filter_pattern: A CloudWatch filter pattern events must match.
+
+        """
+        return self.log_util.get_recent_log_events(
+            CLOUDWATCH_LOG_GROUP, self.log_stream_name(), minutes, filter_pattern=filter_pattern
+        )
+
+    def error_log_stream_events(
+        self,
+        filter_pattern: str = ERROR_FILTER_PATTERN,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> LogEventBatch:
+        """Return the log events which look like errors for this job.
+
+        Args:
+            filter_pattern: A CloudWatch filter pattern, defaults to events which
+                mention an error, exception, or traceback.
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
+        """
+        return self.log_stream_event_batch(filter_pattern, start_time, end_time)
+
+    def iter_log_stream_events(
+        self,
+        page_size: Optional[int] = None,
+        start_from_head: bool = True,
+        max_bytes: Optional[int] = None,
+    ) -> Iterator[LogEventView]:
+        """Lazily return all log events for this job, one page at a time.
+
+        Args:
+            page_size: The maximum number of events per page.
+            start_from_head: Read from the oldest event instead of the newest.
+            max_bytes: Stop once this many bytes of messages have been yielded.
+
+        """
+        log_stream_name = self.log_stream_name()
+        return self.log_util.iter_log_events(
+            CLOUDWATCH_LOG_GROUP,
+            log_stream_name,
+            page_size=page_size,
+            start_from_head=start_from_head,
+            max_bytes=max_bytes,
+        )
+
+    def follow_log_stream_events(
+        self,
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        page_size: Optional[int] = None,
+    ) -> Iterator[LogEventView]:
+        """Follow the log events of this job, like ``tail -f``, until it finishes.
+
+        Only new events are requested on each poll, and following stops once
+        this job has reached a terminal state and its last events are read.
+
+        Args:
+            min_interval: The minimum seconds between two polls.
+            max_interval: The maximum seconds between two polls.
+            page_size: The maximum number of events per page.
+
+        """
+        interval = min_interval
+        description = self.refresh()
+        while 'logStreamName' not in description.get('container', {}):
+            if self.is_terminal(description):
+                return
+            time.sleep(interval)
+            interval = min(max_interval, 2 * interval)
+            description = self.refresh()
+        yield from self.log_util.follow_log_events(
+            CLOUDWATCH_LOG_GROUP,
+            description['container']['logStreamName'],
+            lambda: self.is_terminal(self.refresh()),
+            min_interval=min_interval,
+            max_interval=max_interval,
+            page_size=page_size,
+        )
+
     def __repr__(self) -> str:
         return f'{self.__class__.__qualname__}(' f'definition={repr(self.definition)})'
+
+
+class ArrayBatchJob(BatchJob):
+    """An AWS Batch array job which runs one job definition over many parameter sets.
+
+    The parameters of every job definition are staged to S3 as a JSON Lines
+    manifest, one line per array index, and the whole array is submitted with a
+    single submit-job request. The manifest URI is passed to the job as the
+    ``manifest`` parameter (referenced as ``Ref::manifest`` in the registered
+    job definition) and each child job reads its own parameters with
+    :func:`array_job_parameters`. The byte offset of every line is staged
+    beside the manifest, with an ``.index`` suffix, so each child reads only
+    its own line.
+
+    Args:
+        definitions: Batch job definitions which share a name and revision.
+        manifest: The S3 URI to stage the manifest to.
+        client: The Batch client to use, defaults to the shared Batch client.
+        max_age: Seconds a job description is reused before it is described
+            again. Descriptions of SUCCEEDED or FAILED jobs are reused forever.
+
+    """
+
+    def __init__(
+        self,
+        definitions: Sequence[JobDefinition],
+        manifest: S3Uri,
+        client: Optional['BaseClient'] = None,
+        max_age: float = 5.0,
+    ) -> None:
+        assert (
+            ARRAY_JOB_MIN_SIZE <= len(definitions) <= ARRAY_JOB_MAX_SIZE
+        ), f'Array jobs must have {ARRAY_JOB_MIN_SIZE} to {ARRAY_JOB_MAX_SIZE} definitions.'
+        assert (
+            len(set(map(str, definitions))) == 1
+        ), 'All definitions of an array job must share a name and revision.'
+        for definition in definitions:
+            definition.validate()
+        self._initialize(definitions[0], client, max_age)
+        self.definitions = list(definitions)
+        self.manifest = S3Uri(manifest)
+
+    @property
+    def size(self) -> int:
+        """Return the number of child jobs in this array job."""
+        return len(self.definitions)
+
+    def child(self, index: int) -> BatchJob:
+        """Return the child job at an array index."""
+        if self.job_id is None:
+            raise BatchJobSubmissionError(
+                'Cannot find children of a job that has not been submitted.'
+            )
+        return BatchJob.from_job_id(
+            self.definitions[index],
+            f'{self.job_id}:{index}',
+            queue=self.queue,
+            client=self._client,
+            max_age=self.max_age,
+        )
+
+    def children(self) -> List[BatchJob]:
+        """Return all child jobs in array index order."""
+        return [self.child(index) for index in range(self.size)]
+
+    def status_summary(self) -> Dict[str, int]:
+        """Return the number of child jobs in each state."""
+        summary: Dict[str, int] = (
+            self.describe().get('arrayProperties', {}).get('statusSummary', {})
+        )
+        return summary
+
+    def stage_manifest(self) -> S3Uri:
+        """Write the parameters of every job definition, and their offsets, to S3."""
+        lines = [
+            (json.dumps(definition.to_dict()) + '\n').encode('utf-8')
+            for definition in self.definitions
+        ]
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line))
+        index = self.manifest + ARRAY_JOB_MANIFEST_INDEX_SUFFIX
+        s3 = aws_client.client('s3')
+        s3.put_object(Bucket=self.manifest.bucket, Key=self.manifest.key, Body=b''.join(lines))
+        s3.put_object(
+            Bucket=index.bucket, Key=index.key, Body=struct.pack(f'<{len(offsets)}Q', *offsets)
+        )
+        self.manifest.invalidate()
+        index.invalidate()
+        return self.manifest
+
+    def submit(
+        self,
+        queue: str,
+        container_overrides: Optional[Mapping] = None,
+        depends_on: Optional[Sequence[Mapping]] = None,
+    ) -> SubmitJobResponse:
+        """Stage the manifest to S3 and submit this array job to Batch.
+
+        Args:
+            queue: The Batch job queue to use.
+            container_overrides: The values to override in the spawned containers.
+            depends_on: The jobs this job depends on, as Batch ``dependsOn`` mappings.
+
+        Returns:
+            The service response to job submission.
+
+        """
+        assert not self.is_submitted(), 'Cannot submit already submitted job!'
+        self.stage_manifest()
+        return super().submit(queue, container_overrides, depends_on)
+
+    def _submit_request(self, queue: str) -> Dict[str, Any]:
+        """Return the keyword arguments of the submit-job request for this array job."""
+        request = super()._submit_request(queue)
+        request['parameters'] = {ARRAY_JOB_MANIFEST_PARAMETER: str(self.manifest)}
+        request['arrayProperties'] = {'size': self.size}
+        return request
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'definitions=[{len(self.definitions)} x {self.definition}], '
+            f'manifest={repr(self.manifest)})'
+        )
+
+
+def array_job_parameters(manifest: S3Uri, index: Optional[int] = None) -> Dict[str, str]:
+    """Return the parameters of one child of an array job from its manifest.
+
+    This function is meant to be called from within the child job's container.
+    The offsets of the child's line are read from the manifest's index, and
+    only that line of the manifest is requested.
+
+    Args:
+        manifest: The S3 URI of the array job's manifest.
+        index: The array index, defaults to the ``AWS_BATCH_JOB_ARRAY_INDEX``
+            environment variable which Batch sets in every child job.
+
+    """
+    index = int(os.environ[ARRAY_JOB_INDEX_VARIABLE]) if index is None else index
+    manifest = S3Uri(manifest)
+    if index < 0:
+        raise IndexError(f'Array index {index} is not in manifest: {manifest}')
+    s3 = aws_client.client('s3')
+    offsets = manifest + ARRAY_JOB_MANIFEST_INDEX_SUFFIX
+    try:
+        body = s3.get_object(
+            Bucket=offsets.bucket, Key=offsets.key, Range=f'bytes={8 * index}-{8 * index + 15}'
+        )['Body'].read()
+    except botocore.exceptions.ClientError as error:
+        code = error.response['Error']['Code']
+        if code in ('404', 'NoSuchKey'):
+            return _scan_manifest(s3, manifest, index)
+        if code != 'InvalidRange':
+            raise error
+        body = b''
+    if len(body) != 16:
+        raise IndexError(f'Array index {index} is not in manifest: {manifest}')
+    start, end = struct.unpack('<2Q', body)
+    line = s3.get_object(
+        Bucket=manifest.bucket, Key=manifest.key, Range=f'bytes={start}-{end - 1}'
+    )
+    parameters: Dict[str, str] = json.loads(line['Body'].read())
+    return parameters
+
+
+def _scan_manifest(s3: 'BaseClient', manifest: S3Uri, index: int) -> Dict[str, str]:
+    """Read one line of a manifest which was staged without an index of its offsets."""
+    body = s3.get_object(Bucket=manifest.bucket, Key=manifest.key)['Body']
+    for line_number, line in enumerate(body.iter_lines()):
+        if line_number == index:
+            parameters: Dict[str, str] = json.loads(line)
+            return parameters
+    raise IndexError(f'Array index {index} is not in manifest: {manifest}')
+
+
+class BatchJobSet(object):
+    """A set of AWS Batch jobs which are submitted together.
+
+    Jobs are submitted concurrently by a bounded pool of threads which all share
+    one Batch client. Responses are returned in the same order as the job
+    definitions, and a job which fails to submit does not stop the submission
+    of the other jobs in the set.
+
+    Args:
+        definitions: The Batch job definitions.
+        max_workers: The maximum number of concurrent submissions.
+        client: The Batch client to share, defaults to the shared Batch client.
+        journal: A journal to record submissions in. Definitions which the
+            journal has already seen submitted are rehydrated from the journal
+            and are not submitted again.
+
+    """
+
+    def __init__(
+        self,
+        definitions: Iterable[JobDefinition],
+        max_workers: int = 16,
+        client: Optional['BaseClient'] = None,
+        journal: Optional['JobJournal'] = None,
+    ) -> None:
+        client = aws_client.client('batch') if client is None else client
+        self.max_workers = max_workers
+        self._client = client
+        self.jobs: List[BatchJob] = [self._job(definition, journal) for definition in definitions]
+        self._failures: Dict[int, Exception] = dict()
+
+    def _job(self, definition: JobDefinition, journal: Optional['JobJournal']) -> BatchJob:
+        """Return a new Batch job, or the journaled Batch job of this definition."""
+        entry = None if journal is None else journal.find(definition)
+        if entry is None:
+            return BatchJob(definition, self._client, journal=journal)
+        job = BatchJob.from_job_id(definition, entry.job_id, entry.queue, client=self._client)
+        job.journal = journal
+        job._submit_response = SubmitJobResponse(
+            {'ResponseMetadata': {'HTTPStatusCode': 200}, 'jobId': entry.job_id}
+        )
+        if entry.is_terminal():
+            job._seed(entry.status)
+        return job
+
+    def failures(self) -> List[Tuple[BatchJob, Exception]]:
+        """Return the jobs which failed to submit and the reason why."""
+        return [(self.jobs[index], error) for index, error in sorted(self._failures.items())]
+
+    def is_submitted(self) -> bool:
+        """Return if every job in this set has been submitted to Batch."""
+        return all(job.is_submitted() for job in self.jobs)
+
+    def submit(
+        self, queue: str, container_overrides: Optional[Mapping] = None
+    ) -> List[SubmitJobResponse]:
+        """Submit all jobs in this set to Batch.
+
+        Jobs which have already been submitted are not submitted again, so this
+        method can be called repeatedly to retry only the jobs which failed.
+
+        Args:
+            queue: The Batch job queue to use.
+            container_overrides: The values to override in the spawned containers.
+
+        Returns:
+            The service responses to job submission, in the order of the jobs.
+
+        """
+
+        def submit_one(index: int) -> SubmitJobResponse:
+            job = self.jobs[index]
+            if job.is_submitted() and job._submit_response is not None:
+                return job._submit_response
+            try:
+                response = job.submit(queue, container_overrides)
+            except BatchJobSubmissionError as error:
+                self._failures[index] = error
+                return job._submit_response or SubmitJobResponse({})
+            except botocore.exceptions.ClientError as error:
+                self._failures[index] = error
+                return SubmitJobResponse(error.response)
+            except botocore.exceptions.BotoCoreError as error:
+                self._failures[index] = error
+                return SubmitJobResponse({})
+            self._failures.pop(index, None)
+            return response
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = list(executor.map(submit_one, range(len(self.jobs))))
+        return responses
+
+    def track(self) -> 'JobTracker':
+        """Return a job tracker for all submitted jobs in this set."""
+        return JobTracker([job for job in self.jobs if job.is_submitted()], client=self._client)
+
+    def __getitem__(self, index: int) -> BatchJob:
+        return self.jobs[index]
+
+    def __iter__(self) -> Iterator[BatchJob]:
+        return iter(self.jobs)
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(jobs={len(self.jobs)})'
+
+
+class JobTracker(object):
+    """A tracker which refreshes the state of many Batch jobs at once.
+
+    Registered jobs are described in chunks of 100 job IDs per request, so
+    refreshing *n* jobs costs *n* / 100 requests instead of *n*. The status
+    methods of a registered :class:`BatchJob` read from the latest snapshot of
+    this tracker instead of describing the job on their own.
+
+    Jobs which were not found are remembered for :attr:`max_age` seconds, and
+    are then described on their own, so a job which is not yet visible does
+    not cost a refresh of every registered job.
+
+    Args:
+        jobs: The submitted Batch jobs to track.
+        client: The Batch client to use, defaults to the shared Batch client.
+        max_age: Seconds a job which was not found is reported missing before
+            it is described again.
+
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[BatchJob] = (),
+        client: Optional['BaseClient'] = None,
+        max_age: float = 5.0,
+    ) -> None:
+        self._client = aws_client.client('batch') if client is None else client
+        self.max_age = max_age
+        self._lock = RLock()
+        self._jobs: Dict[str, BatchJob] = dict()
+        self._snapshot: Dict[str, Dict] = dict()
+        self._not_found: Dict[str, float] = dict()
+        self.register(*jobs)
+
+    def register(self, *jobs: BatchJob) -> None:
+        """Register submitted Batch jobs with this tracker."""
+        with self._lock:
+            for job in jobs:
+                if job.job_id is None:
+                    raise BatchJobSubmissionError(
+                        'Cannot track a job that has not been submitted.'
+                    )
+                self._jobs[job.job_id] = job
+                job._tracker = self
+                if job._description is not None and BatchJob.is_terminal(job._description):
+                    self._snapshot[job.job_id] = job._description
+
+    def unregister(self, *jobs: BatchJob) -> None:
+        """Stop tracking Batch jobs with this tracker."""
+        with self._lock:
+            for job in jobs:
+                if job.job_id in self._jobs:
+                    del self._jobs[job.job_id]
+                    self._snapshot.pop(job.job_id, None)
+                    self._not_found.pop(job.job_id, None)
+                    job._tracker = None
+
+    def refresh(self) -> Dict[str, Dict]:
+        """Describe all registered jobs and return the new snapshot.
+
+        Jobs which have reached a terminal state are never described again.
+
+        Returns:
+            A mapping of job ID to job description.
+
+        """
+        with self._lock:
+            job_ids = [
+                job_id
+                for job_id in self._jobs
+                if not BatchJob.is_terminal(self._snapshot.get(job_id, dict()))
+            ]
+        descriptions = BatchJob.describe_jobs(job_ids, self._client)
+        with self._lock:
+            changed = [job for job in map(self._update, descriptions) if job is not None]
+            self._missing(set(job_ids).difference(self._snapshot))
+            snapshot = dict(self._snapshot)
+        _journal_statuses(changed)
+        return snapshot
+
+    def _update(self, description: Dict) -> Optional[BatchJob]:
+        """Store a new description of a job in the snapshot.
+
+        Returns:
+            The registered job, if its status changed.
+
+        """
+        with self._lock:
+            job_id = description['jobId']
+            self._snapshot[job_id] = description
+            self._not_found.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            return job if job is not None and job._update(description) else None
+
+    def _missing(self, job_ids: Iterable[str]) -> None:
+        """Record that jobs were not found."""
+        with self._lock:
+            now = time.monotonic()
+            for job_id in job_ids:
+                self._not_found[job_id] = now
+
+    def description(self, job_id: str) -> Dict:
+        """Return the latest description of a job, describing it if it was never found.
+
+        A job which was not found is reported missing, with an empty
+        description, until :attr:`max_age` seconds have passed.
+
+        """
+        with self._lock:
+            if job_id in self._snapshot:
+                return self._snapshot[job_id]
+            not_found_at = self._not_found.get(job_id)
+            if not_found_at is not None and time.monotonic() - not_found_at < self.max_age:
+                return dict()
+        description = BatchJob.describe_job(job_id, self._client)
+        if description:
+            _journal_statuses(filter(None, [self._update(description)]))
+        else:
+            self._missing([job_id])
+        return description
+
+    def statuses(self) -> Dict[str, str]:
+        """Return the latest status of all registered jobs by job ID."""
+        with self._lock:
+            return {
+                job_id: self._snapshot.get(job_id, dict()).get('status', BATCH_STATUS_NOTFOUND)
+                for job_id in self._jobs
+            }
+
+    def __contains__(self, job: object) -> bool:
+        return isinstance(job, BatchJob) and job.job_id in self._jobs
+
+    def __iter__(self) -> Iterator[BatchJob]:
+        with self._lock:
+            return iter(list(self._jobs.values()))
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(jobs={len(self._jobs)})'
+
+
+class JobPoller(object):
+    """A poller which waits on many Batch jobs from one background thread.
+
+    Jobs which are due to be polled are described together in chunks of 100
+    job IDs per request. Each job is polled at an interval which depends on its
+    state, so RUNNABLE jobs are polled less often than RUNNING jobs, and the
+    interval grows exponentially while the job stays in the same state. The
+    background thread exits once no jobs are left to wait on.
+
+    A poll which fails with a botocore error is retried with a capped
+    exponential backoff. A job whose poll fails ``max_errors`` times in a row,
+    or which is not found ``max_not_found`` times in a row, stops being polled,
+    and its event is set with the error recorded.
+
+    Callers which cannot block on an event, such as an :mod:`asyncio` event
+    loop, may register callbacks with :meth:`add_done_callback` instead.
+
+    Args:
+        client: The Batch client to use, defaults to the shared Batch client.
+        intervals: The initial poll interval in seconds for each job state.
+        backoff: The factor the interval grows by while a job's state is unchanged.
+        max_interval: The maximum poll interval in seconds.
+        max_not_found: The number of polls in a row a job may not be found.
+        max_errors: The number of polls in a row a job may fail.
+        error_interval: The initial retry interval in seconds after a failed poll.
+
+    """
+
+    def __init__(
+        self,
+        client: Optional['BaseClient'] = None,
+        intervals: Optional[Mapping[str, float]] = None,
+        backoff: float = 1.5,
+        max_interval: float = 60.0,
+        max_not_found: int = 12,
+        max_errors: int = 5,
+        error_interval: float = 1.0,
+    ) -> None:
+        assert max_not_found >= 1, 'A job must be polled at least once.'
+        assert max_errors >= 1, 'A job must be polled at least once.'
+        self._client = client
+        self.intervals: Dict[str, float] = dict(BATCH_POLL_INTERVALS)
+        self.intervals.update(intervals or {})
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.max_not_found = max_not_found
+        self.max_errors = max_errors
+        self.error_interval = error_interval
+
+        self._condition = Condition()
+        self._thread: Optional[Thread] = None
+        self._jobs: Dict[str, BatchJob] = dict()
+        self._events: Dict[str, Event] = dict()
+        self._callbacks: Dict[str, List[Callable[[], Any]]] = dict()
+        self._errors: Dict[str, Exception] = dict()
+        self._waiters: Dict[str, int] = dict()
+        self._next_poll: Dict[str, float] = dict()
+        self._interval: Dict[str, float] = dict()
+        self._status: Dict[str, str] = dict()
+        self._not_found: Dict[str, int] = dict()
+        self._failures: Dict[str, int] = dict()
+
+    def watch(self, job: BatchJob) -> Event:
+        """Start polling a job and return an event set when it reaches a terminal state.
+
+        Every call must be matched by a call to :meth:`unwatch` once the
+        caller stops waiting on the job.
+
+        """
+        return self.watch_all([job])[0]
+
+    def watch_all(self, jobs: Iterable[BatchJob]) -> List[Event]:
+        """Start polling many jobs at once, so their first polls share one request.
+
+        Every job must be matched by a call to :meth:`unwatch` once the caller
+        stops waiting on it.
+
+        """
+        jobs = list(jobs)
+        if any(job.job_id is None for job in jobs):
+            raise BatchJobSubmissionError('Cannot wait on a job that has not been submitted.')
+        with self._condition:
+            events = []
+            for job in jobs:
+                job_id = str(job.job_id)
+                if job_id not in self._events:
+                    self._jobs[job_id] = job
+                    self._events[job_id] = Event()
+                    self._next_poll[job_id] = time.monotonic()
+                    self._interval[job_id] = 0.0
+                    self._status[job_id] = BATCH_STATUS_SUBMITTED
+                    self._not_found[job_id] = 0
+                    self._failures[job_id] = 0
+                self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+                events.append(self._events[job_id])
+            if events and (self._thread is None or not self._thread.is_alive()):
+                self._thread = Thread(target=self._run, name='pendant-job-poller', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return events
+
+    def unwatch(self, *jobs: BatchJob) -> None:
+        """Stop waiting on jobs, and stop polling those no one else is waiting on."""
+        with self._condition:
+            for job in jobs:
+                job_id = str(job.job_id)
+                if job_id not in self._waiters:
+                    continue
+                self._waiters[job_id] -= 1
+                if self._waiters[job_id] == 0:
+                    del self._waiters[job_id]
+                    self._forget(job_id)
+                    self._events.pop(job_id, None)
+                    self._callbacks.pop(job_id, None)
+                    self._errors.pop(job_id, None)
+
+    def add_done_callback(self, job: BatchJob, callback: Callable[[], Any]) -> None:
+        """Call ``callback`` once a watched job's event is set.
+
+        The callback is called from the poller's thread, or right away if the
+        event is already set, so it must be quick and must not block.
+
+        """
+        with self._condition:
+            job_id = str(job.job_id)
+            if job_id not in self._events:
+                raise ValueError(f'Batch job is not watched: {job_id}')
+            if self._events[job_id].is_set():
+                callback()
+            else:
+                self._callbacks.setdefault(job_id, []).append(callback)
+
+    def error(self, job: BatchJob) -> Optional[Exception]:
+        """Return the error which stopped a watched job from being polled, if any."""
+        with self._condition:
+            return self._errors.get(str(job.job_id))
+
+    def _forget(self, job_id: str) -> None:
+        """Stop polling a job."""
+        for state in (
+            self._jobs,
+            self._next_poll,
+            self._interval,
+            self._status,
+            self._not_found,
+            self._failures,
+        ):
+            state.pop(job_id, None)
+
+    def _fail(self, job_id: str, error: Exception) -> None:
+        """Stop polling a job and set its event with an error."""
+        self._forget(job_id)
+        self._errors[job_id] = error
+        self._set(job_id)
+
+    def _set(self, job_id: str) -> None:
+        """Set a job's event and call its callbacks."""
+        self._events[job_id].set()
+        for callback in self._callbacks.pop(job_id, []):
+            callback()
+
+    def _run(self) -> None:
+        """Poll jobs which are due until no jobs are left to wait on."""
+        while True:
+            with self._condition:
+                if not self._jobs:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                due = [job_id for job_id, moment in self._next_poll.items() if moment <= now]
+                if not due:
+                    self._condition.wait(min(self._next_poll.values()) - now)
+                    continue
+            self._poll(due)
+
+    def _poll(self, due: List[str]) -> None:
+        """Describe the jobs which are due together, and journal and schedule them."""
+        try:
+            client = aws_client.client('batch') if self._client is None else self._client
+            descriptions = BatchJob.describe_jobs(due, client)
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as error:
+            with self._condition:
+                now = time.monotonic()
+                for job_id in due:
+                    if job_id in self._jobs:
+                        self._retry(job_id, error, now)
+            return
+        except Exception as error:
+            with self._condition:
+                for job_id in due:
+                    if job_id in self._jobs:
+                        self._fail(job_id, error)
+            return
+        found = {description['jobId']: description for description in descriptions}
+        changed: List[BatchJob] = []
+        with self._condition:
+            for job_id, description in found.items():
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if job._update(description):
+                    changed.append(job)
+                if job._tracker is not None:
+                    changed.extend(filter(None, [job._tracker._update(description)]))
+        _journal_statuses(changed)
+        with self._condition:
+            now = time.monotonic()
+            for job_id in due:
+                if job_id in self._jobs:
+                    self._schedule(job_id, found.get(job_id), now)
+
+    def _retry(self, job_id: str, error: Exception, now: float) -> None:
+        """Schedule a job's poll again after a failed poll, or fail it after many."""
+        self._failures[job_id] += 1
+        if self._failures[job_id] >= self.max_errors:
+            self._fail(job_id, error)
+            return
+        backoff = self.error_interval * 2 ** (self._failures[job_id] - 1)
+        self._next_poll[job_id] = now + min(backoff, self.max_interval)
+
+    def _schedule(self, job_id: str, description: Optional[Dict], now: float) -> None:
+        """Schedule a job's next poll, or set its event once it is terminal."""
+        self._failures[job_id] = 0
+        status = BATCH_STATUS_NOTFOUND if description is None else description['status']
+        if status in BATCH_TERMINAL_STATUSES:
+            self._forget(job_id)
+            self._set(job_id)
+            return
+        self._not_found[job_id] = self._not_found[job_id] + 1 if description is None else 0
+        if self._not_found[job_id] >= self.max_not_found:
+            self._fail(job_id, BatchJobNotFoundError(f'Batch job was not found: {job_id}'))
+            return
+        initial = self.intervals.get(status, self.max_interval)
+        if status == self._status[job_id]:
+            interval = min(max(initial, self._interval[job_id] * self.backoff), self.max_interval)
+        else:
+            interval = min(initial, self.max_interval)
+        self._status[job_id] = status
+        self._interval[job_id] = interval
+        self._next_poll[job_id] = now + interval
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(jobs={len(self._jobs)})'
+
+
+_poller: Optional[JobPoller] = None
+
+
+def get_job_poller() -> JobPoller:
+    """Return the job poller shared by all of :mod:`pendant`."""
+    global _poller
+    if _poller is None:
+        _poller = JobPoller()
+    return _poller
+
+
+def _journal_statuses(jobs: Iterable[BatchJob]) -> None:
+    """Record the latest status of jobs in their journals, with one update per journal."""
+    journals: Dict[int, Tuple['JobJournal', Dict[str, str]]] = dict()
+    for job in jobs:
+        if job.journal is not None and job.job_id is not None:
+            _, statuses = journals.setdefault(id(job.journal), (job.journal, dict()))
+            statuses[job.job_id] = (job._description or {}).get('status', BATCH_STATUS_NOTFOUND)
+    for journal, statuses in journals.values():
+        journal.update(statuses)
+
+
+def wait_all(
+    jobs: Iterable[BatchJob], timeout: Optional[float] = None, poller: Optional[JobPoller] = None
+) -> List[str]:
+    """Block until all jobs reach a terminal state.
+
+    Args:
+        jobs: The submitted Batch jobs to wait on.
+        timeout: The maximum number of seconds to wait, defaults to forever.
+        poller: The job poller to use, defaults to the shared poller.
+
+    Returns:
+        The terminal status of each job, in the order of the jobs.
+
+    Raises:
+        BatchJobSubmissionError: If any job has not been submitted.
+        BatchJobTimeoutError: If any job did not finish in time.
+        BatchJobNotFoundError: If any job was not found after many polls.
+
+    """
+    poller = get_job_poller() if poller is None else poller
+    jobs = list(jobs)
+    if any(job.job_id is None for job in jobs):
+        raise BatchJobSubmissionError('Cannot wait on a job that has not been submitted.')
+    deadline = None if timeout is None else time.monotonic() + timeout
+    watched = [job for job in jobs if not job.is_terminal(job._description or {})]
+    events = poller.watch_all(watched)
+    try:
+        for job, event in zip(watched, events):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not event.wait(remaining):
+                raise BatchJobTimeoutError(
+                    f'Batch job did not finish in {timeout} seconds: {job.job_id}'
+                )
+            error = poller.error(job)
+            if error is not None:
+                raise error
+    finally:
+        poller.unwatch(*watched)
+    return [job.status() for job in jobs]
+
+
+def log_stream_names(
+    jobs: Iterable[BatchJob], client: Optional['BaseClient'] = None
+) -> Dict[BatchJob, str]:
+    """Return the log stream names of many jobs at once.
+
+    Jobs whose cached description has no log stream name are described again
+    with chunked describe-jobs requests. Jobs which have no log stream yet are
+    left out.
+
+    Args:
+        jobs: The submitted Batch jobs.
+        client: The Batch client to use, defaults to the shared Batch client.
+
+    Raises:
+        BatchJobSubmissionError: If any job has not been submitted.
+
+    """
+    jobs = list(jobs)
+    if any(job.job_id is None for job in jobs):
+        raise BatchJobSubmissionError('Cannot read logs of a job that has not been submitted.')
+
+    def stream_name(job: BatchJob) -> Optional[str]:
+        name: Optional[str] = (job._description or {}).get('container', {}).get('logStreamName')
+        return name
+
+    by_job_id = {job.job_id: job for job in jobs if stream_name(job) is None}
+    descriptions = BatchJob.describe_jobs(list(map(str, by_job_id)), client)
+    _journal_statuses(
+        [
+            by_job_id[description['jobId']]
+            for description in descriptions
+            if by_job_id[description['jobId']]._update(description)
+        ]
+    )
+    return {job: str(stream_name(job)) for job in jobs if stream_name(job) is not None}
+
+
+def bulk_log_stream_events(
+    jobs: Iterable[BatchJob],
+    merge: bool = False,
+    use_filter: bool = True,
+    max_workers: int = 16,
+    filter_pattern: Optional[str] = None,
+    start_time: Optional[Timestamp] = None,
+    end_time: Optional[Timestamp] = None,
+    log_util: Optional[AwsLogUtil] = None,
+    client: Optional['BaseClient'] = None,
+) -> Union[LogEventBatch, Dict[BatchJob, LogEventBatch]]:
+    """Return the log events of many jobs at once.
+
+    The log stream names of all jobs are resolved with chunked describe-jobs
+    requests. Events are then read from many streams per request with
+    ``filter_log_events``, or from one stream per request in a bounded pool of
+    threads. Jobs which have no log stream yet have no events.
+
+    Args:
+        jobs: The submitted Batch jobs.
+        merge: Return one batch of all events ordered by timestamp instead of
+            a mapping of job to a batch of its events.
+        use_filter: Read many streams per request instead of one per thread.
+        max_workers: The maximum number of concurrent reads without the filter.
+        filter_pattern: A CloudWatch filter pattern events must match.
+        start_time: Only return events at or after this time.
+        end_time: Only return events before this time.
+        log_util: The log utility to use, defaults to one with the shared client.
+        client: The Batch client to use, defaults to the shared Batch client.
+
+    Returns:
+        All events merged by timestamp, or the events of each job by job.
+
+    """
+    jobs = list(jobs)
+    log_util = AwsLogUtil() if log_util is None else log_util
+    streams = {name: job for job, name in log_stream_names(jobs, client).items()}
+
+    window: Dict[str, Any] = dict(
+        filter_pattern=filter_pattern, start_time=start_time, end_time=end_time
+    )
+    grouped: Dict[BatchJob, LogEventBatch] = {job: LogEventBatch() for job in jobs}
+    if use_filter:
+        events = LogEventBatch.from_events(
+            log_util.filter_log_events(CLOUDWATCH_LOG_GROUP, list(streams), **window)
+        )
+        for name, batch in events.by_stream().items():
+            grouped[streams[str(name)]] = batch.sorted()
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                functools.partial(log_util.get_log_event_batch, CLOUDWATCH_LOG_GROUP, **window),
+                streams,
+            )
+            for name, events in zip(streams, results):
+                grouped[streams[name]] = events
+
+    if merge:
+        return LogEventBatch.merge(grouped.values())
+    return grouped
@@ -0,0 +1,256 @@
+import argparse
+import io
+import sys
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from awscli.argparser import CLIArgParser
+from awscli.clidriver import CLIDriver, create_clidriver
+from awscli.customizations.s3 import s3handler
+from awscli.customizations.s3.utils import StdoutBytesWriter
+
+from pendant.util import ExitCode
+
+__all__ = ['CliDriverPool', 'get_driver_pool']
+
+DEFAULT_MAX_IDLE = 16
+
+_SessionKey = Tuple[Optional[str], Optional[str]]
+
+
+class _Output(object):
+    """The output streams of the command a driver is running.
+
+    The streams have a binary ``buffer``, like ``sys.stdout``, so commands
+    which write bytes, such as ``s3 cp`` to ``-``, are captured too.
+
+    """
+
+    def __init__(self) -> None:
+        self.stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8', write_through=True)
+        self.stderr = io.TextIOWrapper(io.BytesIO(), encoding='utf-8', write_through=True)
+
+    @staticmethod
+    def _value(stream: io.TextIOWrapper) -> str:
+        stream.flush()
+        buffer: io.BytesIO = stream.buffer  # type: ignore
+        return buffer.getvalue().decode('utf-8', errors='replace')
+
+    def values(self) -> Tuple[str, str]:
+        """Return everything written to STDOUT and STDERR."""
+        return self._value(self.stdout), self._value(self.stderr)
+
+
+_local = threading.local()
+
+
+def _current_output() -> Optional[_Output]:
+    """Return the output of the command the current thread is running, if any."""
+    output: Optional[_Output] = getattr(_local, 'output', None)
+    return output
+
+
+class _CommandSys(object):
+    """The :mod:`sys` module as :mod:`awscli` sees it.
+
+    Its standard streams are those of the command the current thread is
+    running, and otherwise the streams of :mod:`sys` when they are read.
+
+    """
+
+    @property
+    def stdout(self) -> Any:
+        output = _current_output()
+        return sys.stdout if output is None else output.stdout
+
+    @property
+    def stderr(self) -> Any:
+        output = _current_output()
+        return sys.stderr if output is None else output.stderr
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(sys, name)
+
+
+_command_sys = _CommandSys()
+_route_lock = threading.Lock()
+_routed_modules = 0
+
+
+def _print_message(self: CLIArgParser, message: str, file: Any = None) -> None:
+    """Print an argument parser's usage or error to the current command's output."""
+    output = _current_output()
+    if output is None or not message:
+        argparse.ArgumentParser._print_message(self, message, file)
+    else:
+        (output.stdout if file is sys.stdout else output.stderr).write(message)
+
+
+class _StdoutBytesWriter(StdoutBytesWriter):
+    """Write the bytes an ``s3`` command streams to ``-`` to its own STDOUT.
+
+    The writer is built in the command's thread and written to from transfer
+    threads, so the stream is chosen when it is built.
+
+    """
+
+    def __init__(self, stdout: Any = None) -> None:
+        super().__init__(_command_sys.stdout if stdout is None else stdout)
+
+
+def _route_streams() -> None:
+    """Point the standard streams of every imported :mod:`awscli` module at each command.
+
+    Only the ``sys`` names within :mod:`awscli` modules are replaced, so
+    ``sys.stdout`` and ``sys.stderr`` themselves are never changed. Modules
+    are checked again whenever new modules have been imported.
+
+    """
+    global _routed_modules
+    with _route_lock:
+        if len(sys.modules) == _routed_modules:
+            return
+        for name, module in list(sys.modules.items()):
+            if name.split('.', 1)[0] == 'awscli' and getattr(module, 'sys', None) is sys:
+                setattr(module, 'sys', _command_sys)
+        CLIArgParser._print_message = _print_message
+        s3handler.StdoutBytesWriter = _StdoutBytesWriter
+        _routed_modules = len(sys.modules)
+
+
+class _PooledDriver(object):
+    """An ``awscli`` driver which writes everything its commands print to its own streams.
+
+    The output of each command, including its errors and usage messages, is
+    captured in :attr:`output` while the driver runs it.
+
+    """
+
+    def __init__(self) -> None:
+        self.driver: CLIDriver = create_clidriver()
+        self.output = _Output()
+        self.pristine: Dict[str, Any] = self.driver.session.instance_variables()
+
+    def reset(self) -> None:
+        """Restore the session variables the last command set, and clear the output."""
+        session = self.driver.session
+        for name, value in session.instance_variables().items():
+            if self.pristine.get(name) != value:
+                session.set_config_variable(name, self.pristine.get(name))
+        self.output = _Output()
+
+    def run(self, args: List[str]) -> Tuple[ExitCode, str, str]:
+        """Run one ``awscli`` command and return its exit code, STDOUT, and STDERR."""
+        _route_streams()
+        _local.output = self.output
+        try:
+            exit_code = ExitCode(self.driver.main(args))
+        except SystemExit as error:
+            exit_code = ExitCode(error.code if isinstance(error.code, int) else 255)
+        finally:
+            _local.output = None
+        stdout, stderr = self.output.values()
+        return exit_code, stdout, stderr
+
+
+def _session_key(args: Sequence[str]) -> _SessionKey:
+    """Return the profile and region a command sets on the driver's session."""
+    options: Dict[str, Optional[str]] = {'--profile': None, '--region': None}
+    for index, arg in enumerate(args):
+        name, equals, value = arg.partition('=')
+        if name in options:
+            if equals:
+                options[name] = value
+            elif index + 1 < len(args):
+                options[name] = args[index + 1]
+    return options['--profile'], options['--region']
+
+
+class CliDriverPool(object):
+    """A thread-safe pool of reusable :mod:`awscli` drivers.
+
+    Building a driver loads the botocore data model and every ``awscli``
+    plugin, which takes far longer than most commands. Drivers are built on
+    demand, returned to the pool after each command, and reused. A command
+    holds its driver exclusively, so commands may run concurrently from many
+    threads.
+
+    The session variables a command sets, such as its profile and region,
+    are reset before a driver runs the next command. A driver's session also
+    caches the credentials its profile resolves to, so idle drivers are only
+    reused for commands with the same ``--profile`` and ``--region``.
+
+    Everything a command prints, including usage errors and the listings of
+    the ``s3`` commands, is captured per command without changing
+    ``sys.stdout`` or ``sys.stderr``. Within :mod:`awscli` modules only, the
+    name ``sys`` is replaced by a view whose standard streams are those of
+    the command the current thread is running. The ``s3`` transfer commands
+    pick their streams in the command's thread before printing from worker
+    threads, so they are captured too and may run concurrently. Code outside
+    :mod:`awscli`, and threads which are not running a command, write to the
+    process's standard streams as usual.
+
+    Args:
+        max_idle: The maximum number of idle drivers kept for reuse.
+
+    Examples:
+        >>> # exit_code, stdout, stderr = CliDriverPool().run(['s3', 'ls'])
+
+    """
+
+    def __init__(self, max_idle: int = DEFAULT_MAX_IDLE) -> None:
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: Dict[_SessionKey, List[_PooledDriver]] = dict()
+
+    def _acquire(self, key: _SessionKey) -> _PooledDriver:
+        """Return an idle driver with its session reset, or a new driver."""
+        with self._lock:
+            drivers = self._idle.get(key)
+            if drivers:
+                driver = drivers.pop()
+                driver.reset()
+                return driver
+        return _PooledDriver()
+
+    def _release(self, key: _SessionKey, driver: _PooledDriver) -> None:
+        with self._lock:
+            if sum(map(len, self._idle.values())) < self.max_idle:
+                self._idle.setdefault(key, []).append(driver)
+
+    def run(self, args: Sequence[str]) -> Tuple[ExitCode, str, str]:
+        """Run one ``awscli`` command on a pooled driver.
+
+        Args:
+            args: The command line arguments, without the leading ``aws``.
+
+        Returns:
+            The exit code, STDOUT, and STDERR of the command.
+
+        """
+        args = list(args)
+        key = _session_key(args)
+        driver = self._acquire(key)
+        result = driver.run(args)
+        self._release(key, driver)
+        return result
+
+    def clear(self) -> None:
+        """Discard every idle driver."""
+        with self._lock:
+            self._idle.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(map(len, self._idle.values()))
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(max_idle={self.max_idle})'
+
+
+_pool = CliDriverPool()
+
+
+def get_driver_pool() -> CliDriverPool:
+    """Return the ``awscli`` driver pool shared by all of :mod:`pendant`."""
+    return _pool
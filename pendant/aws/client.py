@@ -0,0 +1,197 @@
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from pendant.aws.throttle import Throttle, get_throttle
+
+if TYPE_CHECKING:
+    import boto3
+    from botocore.client import BaseClient
+    from botocore.config import Config
+
+__all__ = ['ClientProvider', 'client', 'configure', 'get_provider', 'resource']
+
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+_Key = Tuple[str, Optional[str], Optional[str]]
+
+
+class ClientProvider(object):
+    """A thread-safe cache of AWS service clients and resources.
+
+    Clients are cached per service, region, and profile and are shared between
+    threads since :class:`botocore.client.BaseClient` is thread-safe once built.
+    Resources are not thread-safe and are therefore cached per thread.
+    :mod:`boto3` is only imported once the first session is built.
+
+    Args:
+        region_name: The default AWS region, defaults to the profile's region.
+        profile_name: The default AWS profile, defaults to the default profile.
+        max_pool_connections: The size of each client's HTTP connection pool.
+        config: Extra botocore configuration merged into every client.
+        endpoint_url: Send all requests to this endpoint, e.g. a local stand-in.
+        throttle: The rate limiter and retry policy attached to every client,
+            defaults to the throttle shared by all of :mod:`pendant`.
+
+    Examples:
+        >>> provider = ClientProvider(region_name='us-east-1')
+        >>> provider.client('batch') is provider.client('batch')
+        True
+
+    """
+
+    def __init__(
+        self,
+        region_name: Optional[str] = None,
+        profile_name: Optional[str] = None,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        config: Optional['Config'] = None,
+        endpoint_url: Optional[str] = None,
+        throttle: Optional[Throttle] = None,
+    ) -> None:
+        self.region_name = region_name
+        self.profile_name = profile_name
+        self.endpoint_url = endpoint_url
+        self.max_pool_connections = max_pool_connections
+        self.throttle = get_throttle() if throttle is None else throttle
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._extra_config = config
+        self._config: Optional['Config'] = None
+        self._sessions: Dict[Optional[str], 'boto3.Session'] = dict()
+        self._clients: Dict[_Key, 'BaseClient'] = dict()
+
+    @property
+    def config(self) -> 'Config':
+        """Return the botocore configuration of every client, built on first use."""
+        if self._config is None:
+            from botocore.config import Config
+
+            config = Config(max_pool_connections=self.max_pool_connections)
+            if self._extra_config is not None:
+                config = config.merge(self._extra_config)
+            self._config = config
+        return self._config
+
+    def _key(self, service: str, region_name: Optional[str], profile_name: Optional[str]) -> _Key:
+        region_name = self.region_name if region_name is None else region_name
+        profile_name = self.profile_name if profile_name is None else profile_name
+        return service, region_name, profile_name
+
+    def session(self, profile_name: Optional[str] = None) -> 'boto3.Session':
+        """Return the cached session for a profile.
+
+        Args:
+            profile_name: The AWS profile, defaults to this provider's profile.
+
+        """
+        profile_name = self.profile_name if profile_name is None else profile_name
+        with self._lock:
+            if profile_name not in self._sessions:
+                import boto3
+
+                self._sessions[profile_name] = boto3.Session(profile_name=profile_name)
+            return self._sessions[profile_name]
+
+    def client(
+        self, service: str, region_name: Optional[str] = None, profile_name: Optional[str] = None
+    ) -> 'BaseClient':
+        """Return the cached client for a service, building it if needed.
+
+        Args:
+            service: The AWS service name, such as ``"batch"`` or ``"s3"``.
+            region_name: The AWS region, defaults to this provider's region.
+            profile_name: The AWS profile, defaults to this provider's profile.
+
+        """
+        key = self._key(service, region_name, profile_name)
+        with self._lock:
+            if key not in self._clients:
+                client = self.session(key[2]).client(service, **self._kwargs(key))
+                self._clients[key] = self.throttle.register(client)
+            return self._clients[key]
+
+    def resource(
+        self, service: str, region_name: Optional[str] = None, profile_name: Optional[str] = None
+    ) -> Any:
+        """Return this thread's cached resource for a service, building it if needed.
+
+        Args:
+            service: The AWS service name, such as ``"s3"``.
+            region_name: The AWS region, defaults to this provider's region.
+            profile_name: The AWS profile, defaults to this provider's profile.
+
+        """
+        key = self._key(service, region_name, profile_name)
+        if not hasattr(self._local, 'resources'):
+            self._local.resources = dict()
+        resources: Dict[_Key, Any] = self._local.resources
+        if key not in resources:
+            with self._lock:
+                resources[key] = self.session(key[2]).resource(service, **self._kwargs(key))
+                self.throttle.register(resources[key].meta.client)
+        return resources[key]
+
+    def clear(self) -> None:
+        """Drop all cached sessions, clients, and this thread's resources."""
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+            self._local.resources = dict()
+
+    def _kwargs(self, key: _Key) -> Dict[str, Any]:
+        _, region_name, _ = key
+        kwargs: Dict[str, Any] = dict(config=self.config)
+        if region_name is not None:
+            kwargs['region_name'] = region_name
+        if self.endpoint_url is not None:
+            kwargs['endpoint_url'] = self.endpoint_url
+        return kwargs
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'region_name={repr(self.region_name)}, '
+            f'profile_name={repr(self.profile_name)}, '
+            f'endpoint_url={repr(self.endpoint_url)})'
+        )
+
+
+_provider = ClientProvider()
+
+
+def get_provider() -> ClientProvider:
+    """Return the client provider shared by all of :mod:`pendant`."""
+    return _provider
+
+
+def configure(**kwargs: Any) -> ClientProvider:
+    """Replace the shared client provider with a newly configured one.
+
+    Args:
+        kwargs: The keyword arguments to :class:`ClientProvider`.
+
+    Examples:
+        >>> provider = configure(region_name='us-east-1', max_pool_connections=64)
+        >>> get_provider() is provider
+        True
+        >>> _ = configure()
+
+    """
+    global _provider
+    _provider = ClientProvider(**kwargs)
+    return _provider
+
+
+def client(
+    service: str, region_name: Optional[str] = None, profile_name: Optional[str] = None
+) -> 'BaseClient':
+    """Return a cached client for a service from the shared client provider."""
+    return _provider.client(service, region_name=region_name, profile_name=profile_name)
+
+
+def resource(
+    service: str, region_name: Optional[str] = None, profile_name: Optional[str] = None
+) -> Any:
+    """Return a cached resource for a service from the shared client provider."""
+    return _provider.resource(service, region_name=region_name, profile_name=profile_name)
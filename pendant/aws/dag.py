@@ -0,0 +1,204 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Union
+
+from pendant.aws import client as aws_client
+from pendant.aws.batch import ArrayBatchJob, BatchJob, JobDefinition
+from pendant.aws.exception import BatchJobSubmissionError
+from pendant.aws.response import SubmitJobResponse
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['JobGraph']
+
+DEPENDENCY_N_TO_N = 'N_TO_N'
+BATCH_MAX_DEPENDENCIES = 20
+
+Node = Union[BatchJob, JobDefinition]
+
+
+class JobGraph(object):
+    """A dependency graph of Batch jobs which is submitted all at once.
+
+    Every job in the graph is submitted up front with the job IDs of its
+    upstream jobs as Batch ``dependsOn`` dependencies, so that Batch can start
+    each job as soon as its dependencies are met. Jobs are submitted one
+    topological level at a time, and all jobs within a level are submitted
+    concurrently.
+
+    Args:
+        max_workers: The maximum number of concurrent submissions.
+        client: The Batch client to use, defaults to the shared Batch client.
+
+    Examples:
+        >>> # graph = JobGraph()
+        >>> # graph.add_edge(align_definition, call_definition)
+        >>> # responses = graph.submit(queue='prod')
+
+    """
+
+    def __init__(self, max_workers: int = 16, client: Optional['BaseClient'] = None) -> None:
+        self.max_workers = max_workers
+        self._client = aws_client.client('batch') if client is None else client
+        self.jobs: List[BatchJob] = []
+        self._by_definition: Dict[JobDefinition, BatchJob] = dict()
+        self._upstream: Dict[BatchJob, Dict[BatchJob, bool]] = dict()
+
+    def add(self, node: Node) -> BatchJob:
+        """Add a job, or a job definition, to this graph.
+
+        Args:
+            node: A Batch job or job definition. Job definitions are wrapped
+                into a :class:`~pendant.aws.batch.BatchJob`.
+
+        Returns:
+            The Batch job in this graph.
+
+        """
+        if isinstance(node, BatchJob):
+            job = node
+        elif node in self._by_definition:
+            return self._by_definition[node]
+        else:
+            job = BatchJob(node, client=self._client)
+            self._by_definition[node] = job
+        if job not in self._upstream:
+            self.jobs.append(job)
+            self._upstream[job] = dict()
+        return job
+
+    def add_edge(self, upstream: Node, downstream: Node, n_to_n: bool = False) -> None:
+        """Make one job depend on another, adding either job if needed.
+
+        Args:
+            upstream: The job, or job definition, which must finish first.
+            downstream: The job, or job definition, which depends on ``upstream``.
+            n_to_n: Make each child of an array job depend only on the child of
+                the upstream array job with the same index.
+
+        Raises:
+            ValueError: If the downstream job would depend on more jobs than
+                Batch allows.
+
+        """
+        upstream_job, downstream_job = self.add(upstream), self.add(downstream)
+        if n_to_n:
+            assert isinstance(upstream_job, ArrayBatchJob) and isinstance(
+                downstream_job, ArrayBatchJob
+            ), 'N_TO_N dependencies are only allowed between array jobs.'
+            assert upstream_job.size == downstream_job.size, 'Array jobs must be the same size.'
+        dependencies = self._upstream[downstream_job]
+        if upstream_job not in dependencies and len(dependencies) >= BATCH_MAX_DEPENDENCIES:
+            raise ValueError(
+                f'A Batch job cannot depend on more than {BATCH_MAX_DEPENDENCIES} jobs.'
+            )
+        dependencies[upstream_job] = n_to_n
+
+    def upstream(self, node: Node) -> List[BatchJob]:
+        """Return the jobs which a job directly depends on."""
+        return list(self._upstream[self.add(node)])
+
+    def levels(self) -> List[List[BatchJob]]:
+        """Return the jobs of this graph grouped into topological levels.
+
+        Every job depends only on jobs in earlier levels, and each level keeps
+        the order jobs were added in.
+
+        Raises:
+            ValueError: If the graph has a cycle, or a job depends on more jobs
+                than Batch allows.
+
+        """
+        in_degree: Dict[BatchJob, int] = dict()
+        downstream: Dict[BatchJob, List[BatchJob]] = {job: [] for job in self.jobs}
+        for job in self.jobs:
+            if len(self._upstream[job]) > BATCH_MAX_DEPENDENCIES:
+                raise ValueError(
+                    f'A Batch job cannot depend on more than {BATCH_MAX_DEPENDENCIES} jobs.'
+                )
+            in_degree[job] = len(self._upstream[job])
+            for upstream in self._upstream[job]:
+                downstream[upstream].append(job)
+
+        level_of: Dict[BatchJob, int] = dict()
+        ready = [job for job in self.jobs if in_degree[job] == 0]
+        for job in ready:
+            level_of[job] = 0
+        while ready:
+            job = ready.pop()
+            for child in downstream[job]:
+                level_of[child] = max(level_of.get(child, 0), level_of[job] + 1)
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
+        if any(in_degree.values()):
+            raise ValueError('The job graph has a cycle.')
+
+        levels: List[List[BatchJob]] = [[] for _ in range(1 + max(level_of.values(), default=-1))]
+        for job in self.jobs:
+            levels[level_of[job]].append(job)
+        return levels
+
+    def depends_on(self, node: Node) -> List[Mapping]:
+        """Return the Batch ``dependsOn`` mappings of a job whose upstream jobs are submitted."""
+        depends_on: List[Mapping] = []
+        for upstream, n_to_n in self._upstream[self.add(node)].items():
+            if upstream.job_id is None:
+                raise BatchJobSubmissionError(
+                    'Cannot depend on a job that has not been submitted.'
+                )
+            dependency = {'jobId': upstream.job_id}
+            if n_to_n:
+                dependency['type'] = DEPENDENCY_N_TO_N
+            depends_on.append(dependency)
+        return depends_on
+
+    def submit(
+        self, queue: str, container_overrides: Optional[Mapping] = None
+    ) -> List[SubmitJobResponse]:
+        """Submit every job in this graph to Batch, one topological level at a time.
+
+        Jobs which have already been submitted are not submitted again, so this
+        method can be called again to resume after a failed submission.
+
+        Args:
+            queue: The Batch job queue to use.
+            container_overrides: The values to override in the spawned containers.
+
+        Returns:
+            The service responses to job submission, in the order jobs were added.
+
+        Raises:
+            BatchJobSubmissionError: If any job of a level fails to submit, in
+                which case no later levels are submitted.
+
+        """
+        responses: Dict[BatchJob, SubmitJobResponse] = dict()
+
+        def submit_one(job: BatchJob) -> SubmitJobResponse:
+            if job.is_submitted():
+                return job._submit_response or SubmitJobResponse(
+                    {'ResponseMetadata': {'HTTPStatusCode': 200}, 'jobId': job.job_id}
+                )
+            return job.submit(queue, container_overrides, depends_on=self.depends_on(job))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for level in self.levels():
+                futures = [executor.submit(submit_one, job) for job in level]
+                errors = [future.exception() for future in futures if future.exception()]
+                if errors:
+                    raise BatchJobSubmissionError(
+                        f'{len(errors)} of {len(level)} jobs failed to submit!\n{errors[0]}'
+                    ) from errors[0]
+                responses.update(zip(level, (future.result() for future in futures)))
+        return [responses[job] for job in self.jobs]
+
+    def __contains__(self, node: object) -> bool:
+        return node in self._upstream or node in self._by_definition
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def __repr__(self) -> str:
+        edges = sum(len(upstream) for upstream in self._upstream.values())
+        return f'{self.__class__.__qualname__}(jobs={len(self.jobs)}, edges={edges})'
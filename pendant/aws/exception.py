@@ -1,6 +1,7 @@
 __all__ = [
     'BatchJobNotFoundError',
     'BatchJobSubmissionError',
+    'BatchJobTimeoutError',
     'LogStreamNotFoundError',
     'S3ObjectNotFoundError',
 ]
@@ -18,6 +19,12 @@ class BatchJobSubmissionError(Exception):
     pass
 
 
+class BatchJobTimeoutError(TimeoutError):
+    """A Batch job did not finish within the allotted time."""
+
+    pass
+
+
 class LogStreamNotFoundError(Exception):
     """A log stream not found error."""
 
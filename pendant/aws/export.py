@@ -0,0 +1,349 @@
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import botocore.exceptions
+
+from pendant.aws import client as aws_client
+from pendant.aws.batch import CLOUDWATCH_LOG_GROUP, BatchJob, log_stream_names
+from pendant.aws.logs import LOG_INGESTION_DELAY, AwsLogUtil, LogEventBatch, is_settled
+from pendant.aws.s3 import S3Uri
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['LogExporter', 'export_log_streams']
+
+COMPRESSION_EXTENSIONS = {'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+CHECKPOINT_BYTES = 1024**2
+MULTIPART_MIN_PART_SIZE = 5 * 1024**2
+DEFAULT_PART_SIZE = 8 * 1024**2
+
+
+def _compressor(compression: str) -> Any:
+    """Return a streaming compressor which writes one complete frame when flushed.
+
+    Concatenated gzip members and zstd frames both decompress as one stream,
+    so a file may be extended with new frames at any time.
+
+    """
+    if compression == 'gzip':
+        return zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                'Exporting to zstd requires the zstandard package, '
+                'install it with: pip install pendant[zstd]'
+            ) from None
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f'Compression must be one of {sorted(COMPRESSION_EXTENSIONS)}.')
+
+
+def _encode(events: LogEventBatch) -> bytes:
+    """Encode log events as JSON lines."""
+    lines = (
+        json.dumps(
+            {
+                'timestamp': event.timestamp,
+                'message': event.message,
+                'ingestionTime': event.ingestion_time,
+            }
+        )
+        for event in events
+    )
+    return ''.join(line + '\n' for line in lines).encode('utf-8')
+
+
+class LogExporter(object):
+    """Stream the log events of many jobs into compressed JSONL files.
+
+    Each job's events are written to one file, named after its job ID, in a
+    local directory or under an S3 prefix. Events are read one page at a time
+    and compressed as they arrive, so memory use is bounded by the number of
+    workers and not by the size of the logs.
+
+    Exports are resumable. A local file is written next to its destination
+    with a checkpoint of the last forward token written, and is moved into
+    place once complete. An S3 object is written with a multipart upload, and
+    a checkpoint object next to it records the upload ID and the forward
+    token of the last part uploaded. An interrupted export continues from its
+    checkpoint, and files or objects which already exist are skipped.
+
+    Events may be ingested a while after a job stops, so an export is only
+    finalized if its job had reached a terminal state ``delay`` seconds after
+    its ``stoppedAt`` time before the stream was read, and the read ended
+    with a page which returned no new forward token. The events of any other
+    job are written up to their checkpoint, which is left for a later export
+    to continue.
+
+    Args:
+        destination: A local directory, or an S3 URI prefix.
+        compression: Either ``"gzip"`` or ``"zstd"``, which needs the
+            ``zstandard`` package.
+        max_workers: The maximum number of streams exported concurrently.
+        page_size: The maximum number of events per page.
+        resume: Continue or skip exports which were started before.
+        part_size: The size of each part of a multipart upload to S3.
+        delay: Seconds after a job stops that its events may still be ingested.
+        log_util: The log utility to use, defaults to one with the shared client.
+        client: The Batch client to use, defaults to the shared Batch client.
+
+    Examples:
+        >>> # exporter = LogExporter(S3Uri('s3://mybucket/logs/run-1'), max_workers=16)
+        >>> # locations = exporter.export(jobs)
+
+    """
+
+    def __init__(
+        self,
+        destination: Union[str, S3Uri],
+        compression: str = 'gzip',
+        max_workers: int = 8,
+        page_size: Optional[int] = None,
+        resume: bool = True,
+        part_size: int = DEFAULT_PART_SIZE,
+        delay: float = LOG_INGESTION_DELAY,
+        log_util: Optional[AwsLogUtil] = None,
+        client: Optional['BaseClient'] = None,
+    ) -> None:
+        assert part_size >= MULTIPART_MIN_PART_SIZE, 'Parts must be at least 5 MiB.'
+        _compressor(compression)
+        if isinstance(destination, S3Uri) or str(destination).startswith('s3://'):
+            self.destination: Union[str, S3Uri] = S3Uri(destination)
+        else:
+            self.destination = os.path.expanduser(str(destination))
+        self.compression = compression
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.resume = resume
+        self.part_size = part_size
+        self.delay = delay
+        self.log_util = AwsLogUtil() if log_util is None else log_util
+        self._client = client
+
+    def location(self, job: BatchJob) -> str:
+        """Return the file path or S3 URI the events of a job are exported to."""
+        name = f'{job.job_id}{COMPRESSION_EXTENSIONS[self.compression]}'
+        if isinstance(self.destination, S3Uri):
+            return str(self.destination / name)
+        return os.path.join(self.destination, name)
+
+    def export(self, jobs: Iterable[BatchJob]) -> Dict[BatchJob, str]:
+        """Export the log events of many jobs.
+
+        Args:
+            jobs: The submitted Batch jobs. Jobs with no log stream yet are skipped.
+
+        Returns:
+            The file path or S3 URI of each job whose export is complete.
+            Unfinished jobs are checkpointed and left out.
+
+        """
+        streams = log_stream_names(jobs, self._client)
+        if not isinstance(self.destination, S3Uri):
+            os.makedirs(self.destination, exist_ok=True)
+        export_one = self._to_s3 if isinstance(self.destination, S3Uri) else self._to_file
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            locations = list(executor.map(export_one, streams, streams.values()))
+        return {job: location for job, location in zip(streams, locations) if location}
+
+    def _is_final(self, job: BatchJob) -> bool:
+        """Return if a job stopped long enough ago that no new events will be ingested."""
+        description = job.describe()
+        return job.is_terminal(description) and is_settled(
+            description.get('stoppedAt'), self.delay
+        )
+
+    def _chunks(
+        self, stream_name: str, next_token: Optional[str] = None
+    ) -> Iterator[Tuple[bytes, Optional[str]]]:
+        """Lazily get compressed frames of about a megabyte of events, and their last token.
+
+        The last frame is yielded once a page returns no new forward token.
+
+        """
+        pending: List[bytes] = []
+        pending_bytes = 0
+        token = next_token
+        for events, token in self.log_util.iter_log_pages(
+            CLOUDWATCH_LOG_GROUP, stream_name, next_token=next_token, page_size=self.page_size
+        ):
+            if events:
+                pending.append(_encode(events))
+                pending_bytes += events.nbytes
+            if pending_bytes >= CHECKPOINT_BYTES:
+                compressor = _compressor(self.compression)
+                yield b''.join(map(compressor.compress, pending)) + compressor.flush(), token
+                pending, pending_bytes = [], 0
+        compressor = _compressor(self.compression)
+        frame = (
+            b''.join(map(compressor.compress, pending)) + compressor.flush() if pending else b''
+        )
+        yield frame, token
+
+    def _to_file(self, job: BatchJob, stream_name: str) -> Optional[str]:
+        """Export the events of a job to a local file, continuing from any checkpoint."""
+        path = self.location(job)
+        partial, checkpoint = f'{path}.part', f'{path}.checkpoint'
+        if self.resume and os.path.exists(path):
+            return path
+        is_finished = self._is_final(job)
+        token, size = None, 0
+        if self.resume and os.path.exists(partial) and os.path.exists(checkpoint):
+            with open(checkpoint) as handle:
+                state = json.load(handle)
+            token, size = state['token'], state['size']
+        with open(partial, 'r+b' if size else 'wb') as handle:
+            handle.truncate(size)
+            handle.seek(size)
+            for frame, token in self._chunks(stream_name, token):
+                handle.write(frame)
+                handle.flush()
+                with open(f'{checkpoint}.tmp', 'w') as state_handle:
+                    json.dump({'token': token, 'size': handle.tell()}, state_handle)
+                os.replace(f'{checkpoint}.tmp', checkpoint)
+        if not is_finished:
+            return None
+        os.replace(partial, path)
+        os.remove(checkpoint)
+        return path
+
+    @staticmethod
+    def _s3_checkpoint(s3: 'BaseClient', uri: S3Uri) -> Optional[Dict[str, Any]]:
+        """Return the state of an unfinished export to S3, if its upload still exists."""
+        try:
+            body = s3.get_object(Bucket=uri.bucket, Key=f'{uri.key}.checkpoint')['Body'].read()
+        except botocore.exceptions.ClientError as error:
+            if error.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                raise error
+            return None
+        state: Dict[str, Any] = json.loads(body)
+        parts: List[Dict[str, Any]] = []
+        try:
+            paginator = s3.get_paginator('list_parts')
+            for page in paginator.paginate(
+                Bucket=uri.bucket, Key=uri.key, UploadId=state['upload_id']
+            ):
+                parts.extend(
+                    {'ETag': part['ETag'], 'PartNumber': part['PartNumber']}
+                    for part in page.get('Parts', [])
+                    if part['PartNumber'] <= state['parts']
+                )
+        except botocore.exceptions.ClientError as error:
+            if error.response['Error']['Code'] != 'NoSuchUpload':
+                raise error
+            return None
+        if len(parts) != state['parts']:
+            return None
+        state['parts'] = sorted(parts, key=lambda part: part['PartNumber'])
+        state['is_checkpointed'] = True
+        return state
+
+    def _s3_upload(self, s3: 'BaseClient', uri: S3Uri) -> Dict[str, Any]:
+        """Continue the multipart upload of a checkpoint, or start a new one."""
+        state = self._s3_checkpoint(s3, uri) if self.resume else None
+        if state is not None:
+            return state
+        upload_id = s3.create_multipart_upload(Bucket=uri.bucket, Key=uri.key)['UploadId']
+        return {'upload_id': upload_id, 'token': None, 'parts': [], 'is_checkpointed': False}
+
+    @staticmethod
+    def _upload_part(s3: 'BaseClient', uri: S3Uri, state: Dict[str, Any], body: bytes) -> None:
+        """Upload the next part of a multipart upload."""
+        number = len(state['parts']) + 1
+        response = s3.upload_part(
+            Bucket=uri.bucket,
+            Key=uri.key,
+            UploadId=state['upload_id'],
+            PartNumber=number,
+            Body=body,
+        )
+        state['parts'].append({'ETag': response['ETag'], 'PartNumber': number})
+
+    def _upload_parts(
+        self, s3: 'BaseClient', uri: S3Uri, stream_name: str, state: Dict[str, Any]
+    ) -> bytes:
+        """Upload whole parts of events, checkpointing each, and return the remainder."""
+        buffer = bytearray()
+        for frame, token in self._chunks(stream_name, state['token']):
+            buffer += frame
+            if len(buffer) >= self.part_size:
+                self._upload_part(s3, uri, state, bytes(buffer))
+                buffer = bytearray()
+                body = json.dumps(
+                    {'upload_id': state['upload_id'], 'token': token, 'parts': len(state['parts'])}
+                )
+                s3.put_object(
+                    Bucket=uri.bucket, Key=f'{uri.key}.checkpoint', Body=body.encode('utf-8')
+                )
+                state['is_checkpointed'] = True
+        return bytes(buffer)
+
+    @staticmethod
+    def _abort_unless_checkpointed(s3: 'BaseClient', uri: S3Uri, state: Dict[str, Any]) -> None:
+        """Abort a multipart upload which no checkpoint refers to, so no parts are left over."""
+        if not state['is_checkpointed']:
+            s3.abort_multipart_upload(Bucket=uri.bucket, Key=uri.key, UploadId=state['upload_id'])
+
+    def _to_s3(self, job: BatchJob, stream_name: str) -> Optional[str]:
+        """Export the events of a job to S3, continuing from any checkpoint."""
+        uri = S3Uri(self.location(job))
+        s3 = aws_client.client('s3')
+        if self.resume:
+            try:
+                s3.head_object(Bucket=uri.bucket, Key=uri.key)
+                return str(uri)
+            except botocore.exceptions.ClientError as error:
+                if error.response['Error']['Code'] not in ('404', 'NoSuchKey'):
+                    raise error
+        is_finished = self._is_final(job)
+        state = self._s3_upload(s3, uri)
+        try:
+            remainder = self._upload_parts(s3, uri, stream_name, state)
+            if is_finished:
+                if remainder or not state['parts']:
+                    self._upload_part(s3, uri, state, remainder)
+                s3.complete_multipart_upload(
+                    Bucket=uri.bucket,
+                    Key=uri.key,
+                    UploadId=state['upload_id'],
+                    MultipartUpload={'Parts': state['parts']},
+                )
+        except BaseException:
+            self._abort_unless_checkpointed(s3, uri, state)
+            raise
+        if not is_finished:
+            self._abort_unless_checkpointed(s3, uri, state)
+            return None
+        s3.delete_object(Bucket=uri.bucket, Key=f'{uri.key}.checkpoint')
+        uri.invalidate()
+        return str(uri)
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'destination={repr(self.destination)}, '
+            f'compression={repr(self.compression)}, '
+            f'max_workers={self.max_workers})'
+        )
+
+
+def export_log_streams(
+    jobs: Iterable[BatchJob], destination: Union[str, S3Uri], **kwargs: Any
+) -> Dict[BatchJob, str]:
+    """Export the log events of many jobs into compressed JSONL files.
+
+    Args:
+        jobs: The submitted Batch jobs.
+        destination: A local directory, or an S3 URI prefix.
+        kwargs: The keyword arguments to :class:`LogExporter`.
+
+    Returns:
+        The file path or S3 URI of each exported job.
+
+    """
+    return LogExporter(destination, **kwargs).export(jobs)
@@ -0,0 +1,240 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from pendant.aws.batch import BATCH_STATUS_FAILED, BATCH_STATUS_SUBMITTED, BATCH_TERMINAL_STATUSES
+from pendant.aws.batch import BatchJob, JobDefinition
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['JobJournal', 'JournalEntry']
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    definition TEXT NOT NULL,
+    revision TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    queue TEXT,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_definition ON jobs (definition, revision, parameters);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status);
+'''
+
+
+class JournalEntry(NamedTuple):
+    """A Batch job recorded in a :class:`JobJournal`."""
+
+    job_id: str
+    definition: str
+    revision: str
+    parameters: Dict[str, str]
+    queue: Optional[str]
+    status: str
+    submitted_at: float
+    updated_at: float
+
+    def is_terminal(self) -> bool:
+        """Return if the last known status is terminal (SUCCEEDED or FAILED)."""
+        return self.status in BATCH_TERMINAL_STATUSES
+
+
+class JobJournal(object):
+    """A persistent SQLite journal of submitted Batch jobs.
+
+    Every submission is recorded with its job definition name, revision,
+    parameters, job ID, queue, and last known status so that a restarted
+    process can rehydrate its jobs without submitting them again. Only jobs
+    which have not reached a terminal state need to be described again.
+
+    Args:
+        path: The path to the SQLite database, created if it does not exist.
+
+    Examples:
+        >>> journal = JobJournal(':memory:')
+        >>> len(journal)
+        0
+
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def _parameters(definition: JobDefinition) -> str:
+        """Return the canonical JSON of a job definition's parameters."""
+        return json.dumps(definition.to_dict(), sort_keys=True)
+
+    def record(self, job: BatchJob) -> None:
+        """Record a submitted Batch job."""
+        assert job.job_id is not None, 'Cannot record a job that has not been submitted.'
+        now = time.time()
+        row = (
+            job.job_id,
+            job.definition.name,
+            job.definition.revision,
+            self._parameters(job.definition),
+            job.queue,
+            BATCH_STATUS_SUBMITTED,
+            now,
+            now,
+        )
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row
+            )
+
+    def update(self, statuses: Mapping[str, str]) -> None:
+        """Update the last known status of recorded jobs.
+
+        Args:
+            statuses: A mapping of job ID to job status.
+
+        """
+        now = time.time()
+        rows = [(status, now, job_id) for job_id, status in statuses.items()]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?', rows
+            )
+
+    def entries(self, active: bool = False) -> List[JournalEntry]:
+        """Return recorded jobs in the order they were submitted.
+
+        Args:
+            active: Only return jobs which have not reached a terminal state.
+
+        """
+        query = 'SELECT * FROM jobs'
+        if active:
+            marks = ', '.join('?' for _ in BATCH_TERMINAL_STATUSES)
+            query += f' WHERE status NOT IN ({marks})'
+        query += ' ORDER BY submitted_at, rowid'
+        arguments = tuple(BATCH_TERMINAL_STATUSES) if active else ()
+        with self._lock:
+            rows = self._connection.execute(query, arguments).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def entry(self, job_id: str) -> Optional[JournalEntry]:
+        """Return the recorded job with a job ID, if any."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT * FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        return None if row is None else self._entry(row)
+
+    def find(
+        self, definition: JobDefinition, statuses: Optional[Iterable[str]] = None
+    ) -> Optional[JournalEntry]:
+        """Return the latest recorded job submitted with an identical job definition, if any.
+
+        Args:
+            definition: The job definition the job was submitted with.
+            statuses: Only return a job whose last known status is one of these,
+                defaults to any status but FAILED so failed jobs are not reused.
+
+        """
+        query = 'SELECT * FROM jobs WHERE definition = ? AND revision = ? AND parameters = ?'
+        arguments: tuple = (definition.name, definition.revision, self._parameters(definition))
+        if statuses is None:
+            query += ' AND status != ?'
+            arguments += (BATCH_STATUS_FAILED,)
+        else:
+            statuses = tuple(statuses)
+            query += f' AND status IN ({", ".join("?" for _ in statuses)})'
+            arguments += statuses
+        query += ' ORDER BY submitted_at DESC, rowid DESC LIMIT 1'
+        with self._lock:
+            row = self._connection.execute(query, arguments).fetchone()
+        return None if row is None else self._entry(row)
+
+    def rehydrate(
+        self,
+        factories: Mapping[str, Callable[..., JobDefinition]],
+        active: bool = False,
+        client: Optional['BaseClient'] = None,
+    ) -> List[BatchJob]:
+        """Return Batch jobs for recorded jobs without submitting them again.
+
+        Parameters are recorded as the strings of
+        :meth:`~pendant.aws.batch.JobDefinition.to_dict`, so a factory receives
+        every parameter as a string and must convert any which are typed, such
+        as an :class:`~pendant.aws.s3.S3Uri` or an integer.
+
+        Jobs recorded as SUCCEEDED or FAILED report that status without being
+        described again.
+
+        Args:
+            factories: A mapping of job definition name to a callable, such as
+                the job definition class, which accepts the recorded parameters
+                as keyword arguments. Jobs of other definitions are skipped.
+            active: Only return jobs which have not reached a terminal state.
+            client: The Batch client to use, defaults to the shared Batch client.
+
+        """
+        jobs: List[BatchJob] = []
+        for entry in self.entries(active=active):
+            if entry.definition not in factories:
+                continue
+            definition = factories[entry.definition](**entry.parameters)
+            definition.at_revision(entry.revision)
+            job = BatchJob.from_job_id(definition, entry.job_id, queue=entry.queue, client=client)
+            job.journal = self
+            if entry.is_terminal():
+                job._seed(entry.status)
+            jobs.append(job)
+        return jobs
+
+    def refresh(self, client: Optional['BaseClient'] = None) -> Dict[str, str]:
+        """Describe only the recorded jobs which have not reached a terminal state.
+
+        Args:
+            client: The Batch client to use, defaults to the shared Batch client.
+
+        Returns:
+            The new status of each described job by job ID.
+
+        """
+        job_ids = [entry.job_id for entry in self.entries(active=True)]
+        descriptions = BatchJob.describe_jobs(job_ids, client)
+        statuses = {description['jobId']: description['status'] for description in descriptions}
+        self.update(statuses)
+        return statuses
+
+    @staticmethod
+    def _entry(row: tuple) -> JournalEntry:
+        """Build a journal entry from a database row."""
+        job_id, definition, revision, parameters, queue, status, submitted_at, updated_at = row
+        return JournalEntry(
+            job_id,
+            definition,
+            revision,
+            json.loads(parameters),
+            queue,
+            status,
+            submitted_at,
+            updated_at,
+        )
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute('SELECT COUNT(*) FROM jobs').fetchone()
+        return int(count)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}({repr(self.path)})'
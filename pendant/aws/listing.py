@@ -0,0 +1,372 @@
+import functools
+import os
+import queue
+import re
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional
+from typing import Pattern, Tuple
+
+from pendant.aws import client as aws_client
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['glob_keys', 'iter_keys']
+
+CHARACTER_CLASSES = (string.digits, string.ascii_lowercase, string.ascii_uppercase)
+DEFAULT_SHARDS = 16
+DEFAULT_MAX_WORKERS = 16
+QUEUED_PAGES_PER_SHARD = 4
+
+_Shard = Tuple[Optional[str], Optional[str], Optional[str]]
+_DONE = object()
+
+
+def _list_pages(
+    client: 'BaseClient',
+    bucket: str,
+    prefix: str,
+    delimiter: Optional[str],
+    page_size: int,
+    start_after: Optional[str] = None,
+    continuation_token: Optional[str] = None,
+) -> Iterator[Tuple[List[str], Optional[str]]]:
+    """Yield the sorted keys and common prefixes of each page, and its continuation token."""
+    request: Dict[str, Any] = dict(Bucket=bucket, Prefix=prefix, MaxKeys=page_size)
+    if delimiter is not None:
+        request['Delimiter'] = delimiter
+    if start_after is not None:
+        request['StartAfter'] = start_after
+    if continuation_token is not None:
+        request['ContinuationToken'] = continuation_token
+    while True:
+        page = client.list_objects_v2(**request)
+        entries = [item['Key'] for item in page.get('Contents', [])]
+        entries.extend(item['Prefix'] for item in page.get('CommonPrefixes', []))
+        token = page.get('NextContinuationToken') if page.get('IsTruncated') else None
+        yield sorted(entries), token
+        if token is None:
+            return
+        request.pop('StartAfter', None)
+        request['ContinuationToken'] = token
+
+
+def _characters(observed: Iterable[str]) -> List[str]:
+    """Return the observed characters, widened to every digit or letter of the same case."""
+    characters = set(observed)
+    for members in CHARACTER_CLASSES:
+        if characters & set(members):
+            characters.update(members)
+    return sorted(characters)
+
+
+def _boundaries(prefix: str, entries: List[str], delimiter: Optional[str]) -> List[str]:
+    """Return the sorted keys to split the listing after the first page at.
+
+    Boundaries are drawn from the first page: each is a prefix of its last
+    entry followed by a greater character of the kind found at the same
+    position in the page, from the first position where the page's entries
+    differ up to the end of the listing prefix. A boundary never contains the
+    delimiter after the prefix, so none falls within a common prefix.
+
+    """
+    first, after = entries[0], entries[-1]
+    stop = len(after)
+    if delimiter is not None and delimiter in after[len(prefix) :]:
+        stop = after.index(delimiter, len(prefix))
+    differ = len(os.path.commonprefix([first, after]))
+    boundaries: List[str] = []
+    for depth in reversed(range(len(prefix), min(differ + 1, stop))):
+        observed = (entry[depth] for entry in entries if len(entry) > depth)
+        boundaries.extend(
+            after[:depth] + character
+            for character in _characters(observed)
+            if character > after[depth] and character != delimiter
+        )
+    return boundaries
+
+
+def _shards(
+    prefix: str, entries: List[str], delimiter: Optional[str], shards: int
+) -> List[_Shard]:
+    """Split the keys after the first page into ranges, at boundaries drawn from its keys.
+
+    Each range is listed from its start, exclusive, up to its last key,
+    inclusive, and the first range continues the listing of the first page.
+    The ranges cover every possible key, and are balanced if the keys after
+    the first page continue in the same way as the keys within it.
+
+    """
+    boundaries = _boundaries(prefix, entries, delimiter) if entries else []
+    step = max(1, len(boundaries) // max(1, shards - 1))
+    boundaries = boundaries[step - 1 :: step][: shards - 1] if shards > 1 else []
+    starts: List[Optional[str]] = [None, *boundaries]
+    lasts: List[Optional[str]] = [*boundaries, None]
+    return [(None, start, last) for start, last in zip(starts, lasts)]
+
+
+def _plan(
+    client: 'BaseClient',
+    bucket: str,
+    prefix: str,
+    delimiter: Optional[str],
+    page_size: int,
+    shards: int,
+) -> Tuple[List[str], List[_Shard]]:
+    """List the first page, and split the rest of the key space into ranges, if any."""
+    entries, token = next(_list_pages(client, bucket, prefix, delimiter, page_size))
+    if token is None:
+        return entries, []
+    ranges = _shards(prefix, entries, delimiter, shards)
+    ranges[0] = (token, None, ranges[0][2])
+    return entries, ranges
+
+
+def _put(stop: threading.Event, shard_queue: 'queue.Queue[Any]', item: Any) -> bool:
+    """Queue an item unless the listing is stopped, returning if it was queued."""
+    while not stop.is_set():
+        try:
+            shard_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(
+    stop: threading.Event,
+    shard_queue: 'queue.Queue[Any]',
+    pages: Callable[[Optional[str], Optional[str]], Iterator[Tuple[List[str], Optional[str]]]],
+    shard: _Shard,
+) -> None:
+    """Queue the pages of one range, then a sentinel, or the error which stopped it."""
+    continuation_token, start_after, last = shard
+    try:
+        for page, _ in pages(start_after, continuation_token):
+            if last is not None and page and page[-1] > last:
+                _put(stop, shard_queue, [entry for entry in page if entry <= last])
+                break
+            if not _put(stop, shard_queue, page):
+                return
+        _put(stop, shard_queue, _DONE)
+    except BaseException as error:
+        _put(stop, shard_queue, error)
+
+
+def _drain(queues: List['queue.Queue[Any]']) -> Iterator[str]:
+    """Yield the entries of each range in order, raising the error of any range."""
+    for shard_queue in queues:
+        while True:
+            item = shard_queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+
+
+def iter_keys(
+    bucket: str,
+    prefix: str = '',
+    delimiter: Optional[str] = None,
+    shards: int = DEFAULT_SHARDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    page_size: int = 1000,
+    client: Optional['BaseClient'] = None,
+) -> Iterator[str]:
+    """Lazily list the keys under an S3 prefix, in order, with concurrent listings.
+
+    The first page is listed on its own, so a small prefix costs one
+    request. If there are more keys, the rest of the key space is split
+    into ``shards`` ranges at boundaries drawn from the keys of the first
+    page, and the ranges are listed concurrently. Keys are still yielded in order, and each range
+    buffers only a few pages ahead of the keys yielded.
+
+    Args:
+        bucket: The S3 bucket name.
+        prefix: List the keys which start with this prefix.
+        delimiter: Group keys by this delimiter, and yield each common
+            prefix, which ends with the delimiter, instead of its keys.
+        shards: The maximum number of ranges to list concurrently.
+        max_workers: The maximum number of concurrent listings.
+        page_size: The maximum number of keys per request.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Examples:
+        >>> # keys = iter_keys('mybucket', 'samples/', delimiter='/')
+
+    """
+    assert shards >= 1, 'There must be at least one shard.'
+    client = aws_client.client('s3') if client is None else client
+    entries, ranges = _plan(client, bucket, prefix, delimiter, page_size, shards)
+    yield from entries
+    if not ranges:
+        return
+
+    stop = threading.Event()
+    pages = functools.partial(_list_pages, client, bucket, prefix, delimiter, page_size)
+    queues: List['queue.Queue[Any]'] = [
+        queue.Queue(maxsize=QUEUED_PAGES_PER_SHARD) for _ in ranges
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for shard_queue, shard in zip(queues, ranges):
+            executor.submit(_produce, stop, shard_queue, pages, shard)
+        try:
+            yield from _drain(queues)
+        finally:
+            stop.set()
+
+
+def _translate(pattern: str) -> Pattern:
+    """Translate a glob pattern into a regex, where only ``**`` matches across delimiters."""
+    parts: List[str] = []
+    index = 0
+    while index < len(pattern):
+        character = pattern[index]
+        if pattern.startswith('**/', index):
+            parts.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            parts.append('.*')
+            index += 2
+            continue
+        if character == '*':
+            parts.append('[^/]*')
+        elif character == '?':
+            parts.append('[^/]')
+        elif character == '[' and ']' in pattern[index + 2 :]:
+            end = pattern.index(']', index + 2)
+            parts.append(_translate_set(pattern[index + 1 : end]))
+            index = end
+        else:
+            parts.append(re.escape(character))
+        index += 1
+    return re.compile(''.join(parts), re.DOTALL)
+
+
+def _translate_set(members: str) -> str:
+    """Translate the members of a glob ``[...]`` set, where only a leading ``!`` negates."""
+    members = members.replace('\\', '\\\\')
+    if members.startswith('!'):
+        return '[^' + members[1:] + ']'
+    if members.startswith('^'):
+        return '[\\' + members + ']'
+    return '[' + members + ']'
+
+
+def _literal_prefix(segment: str) -> str:
+    """Return the part of a glob pattern before its first wildcard."""
+    match = re.search(r'[*?\[]', segment)
+    return segment if match is None else segment[: match.start()]
+
+
+def _match_level(
+    base: str,
+    segment: str,
+    is_last: bool,
+    delimiter: str,
+    list_keys: Callable[[str, Optional[str], int], Iterator[str]],
+    max_workers: int,
+) -> List[str]:
+    """List one level under a prefix, returning the entries whose name matches a segment.
+
+    The entries are keys if this is the last level, and common prefixes otherwise.
+
+    """
+    regex = _translate(segment)
+    matches = []
+    for key in list_keys(base + _literal_prefix(segment), delimiter, max_workers):
+        name = key[len(base) :]
+        is_prefix = name.endswith(delimiter)
+        if is_prefix != is_last and regex.fullmatch(name.rstrip(delimiter)):
+            matches.append(key)
+    return matches
+
+
+def _match_recursive(
+    prefixes: List[str],
+    pattern: str,
+    list_keys: Callable[[str, Optional[str], int], Iterator[str]],
+    max_workers: int,
+) -> Iterator[str]:
+    """Yield every key under the prefixes whose remainder matches a pattern with ``**``."""
+    regex = _translate(pattern)
+    narrowed = _literal_prefix(pattern)
+    for base in prefixes:
+        keys = list_keys(base + narrowed, None, max_workers)
+        yield from (key for key in keys if regex.fullmatch(key[len(base) :]))
+
+
+def glob_keys(
+    bucket: str,
+    pattern: str,
+    prefix: str = '',
+    shards: int = DEFAULT_SHARDS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    page_size: int = 1000,
+    client: Optional['BaseClient'] = None,
+) -> Iterator[str]:
+    """Lazily find the keys under an S3 prefix which match a glob pattern.
+
+    The pattern is matched one delimited level at a time: the text before
+    the first wildcard of each level narrows the listing on the server,
+    and the matching common prefixes of each level are listed concurrently,
+    each with :func:`iter_keys` sharing ``max_workers`` between them. A
+    ``**`` level matches any number of levels, and everything under the
+    prefixes matched so far, narrowed by the text before the ``**``, is
+    listed with :func:`iter_keys` instead.
+
+    Args:
+        bucket: The S3 bucket name.
+        pattern: The glob pattern, relative to the prefix, which may use
+            ``*``, ``?``, ``[...]`` and ``**``.
+        prefix: The prefix the pattern is relative to.
+        shards: The maximum number of ranges to list concurrently per prefix.
+        max_workers: The maximum number of concurrent listings.
+        page_size: The maximum number of keys per request.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Examples:
+        >>> # keys = glob_keys('mybucket', 'samples/*/reads.bam')
+
+    """
+    from pendant.aws.s3 import S3Uri, s3_objects_exist
+
+    client = aws_client.client('s3') if client is None else client
+
+    def list_keys(prefix: str, delimiter: Optional[str], workers: int) -> Iterator[str]:
+        return iter_keys(bucket, prefix, delimiter, shards, workers, page_size, client)
+
+    segments = pattern.split(S3Uri.delimiter)
+    prefixes = [prefix]
+    for index, segment in enumerate(segments):
+        is_last = index == len(segments) - 1
+        if '**' in segment:
+            rest = S3Uri.delimiter.join(segments[index:])
+            yield from _match_recursive(prefixes, rest, list_keys, max_workers)
+            return
+        if _literal_prefix(segment) == segment and not is_last:
+            prefixes = [f'{base}{segment}{S3Uri.delimiter}' for base in prefixes]
+        elif _literal_prefix(segment) == segment:
+            uris = S3Uri.from_paths(f's3://{bucket}/{base}{segment}' for base in prefixes)
+            exists = s3_objects_exist(uris, max_workers=max_workers, client=client)
+            yield from (uri.key for uri in uris if exists[uri])
+            return
+        else:
+            level = functools.partial(
+                _match_level,
+                segment=segment,
+                is_last=is_last,
+                delimiter=S3Uri.delimiter,
+                list_keys=list_keys,
+                max_workers=max(1, max_workers // len(prefixes)) if prefixes else 1,
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                matches = executor.map(level, prefixes)
+                if is_last:
+                    yield from (key for keys in matches for key in keys)
+                    return
+                prefixes = [key for keys in matches for key in keys]
@@ -0,0 +1,240 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from pendant.aws.logs import LogEventBatch
+
+__all__ = ['LogCache']
+
+DEFAULT_MAX_BYTES = 1024**3
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS streams (
+    group_name TEXT NOT NULL,
+    stream_name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    next_token TEXT,
+    complete INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (group_name, stream_name)
+);
+CREATE INDEX IF NOT EXISTS streams_by_access ON streams (accessed_at);
+'''
+
+
+class LogCache(object):
+    """A size-bounded, on-disk cache of AWS Cloudwatch log streams.
+
+    Every log stream is stored as an append-only file of gzip-compressed JSON
+    lines, keyed by log group and stream name, together with the forward token
+    of its last read. A stream which is complete, such as the stream of a job
+    which has finished, is served entirely from disk. Any other stream is
+    served from disk and extended with only the events after its last token.
+    When the cache grows beyond ``max_bytes`` the least recently used streams
+    are evicted.
+
+    Args:
+        directory: The directory of the cache, created if it does not exist.
+        max_bytes: The maximum size of all cached streams on disk.
+
+    Examples:
+        >>> # job.log_util = AwsLogUtil(cache=LogCache('~/.cache/pendant/logs'))
+        >>> # events = job.log_stream_events()
+
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            os.path.join(self.directory, 'index.sqlite'), check_same_thread=False
+        )
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    @staticmethod
+    def _filename(group_name: str, stream_name: str) -> str:
+        """Return the file name of a stream, safe for any group and stream name."""
+        digest = hashlib.sha1(f'{group_name}\0{stream_name}'.encode('utf-8')).hexdigest()
+        return f'{digest}.jsonl.gz'
+
+    def _entry(
+        self, group_name: str, stream_name: str
+    ) -> Optional[Tuple[str, Optional[str], bool, int]]:
+        """Return the file name, token, completeness, and size of a cached stream."""
+        row = self._connection.execute(
+            'SELECT filename, next_token, complete, size FROM streams '
+            'WHERE group_name = ? AND stream_name = ?',
+            (group_name, stream_name),
+        ).fetchone()
+        return None if row is None else (row[0], row[1], bool(row[2]), row[3])
+
+    def _path(self, filename: str, size: int) -> str:
+        """Return the path of a stream file, dropping any bytes which were never indexed."""
+        path = os.path.join(self.directory, filename)
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            os.truncate(path, size)
+        return path
+
+    def token(self, group_name: str, stream_name: str) -> Optional[str]:
+        """Return the forward token of the last read of a cached stream, if any."""
+        with self._lock:
+            entry = self._entry(group_name, stream_name)
+        return None if entry is None else entry[1]
+
+    def is_complete(self, group_name: str, stream_name: str) -> bool:
+        """Return if a stream is cached and will not receive new events."""
+        with self._lock:
+            entry = self._entry(group_name, stream_name)
+        return entry is not None and entry[2]
+
+    def read(self, group_name: str, stream_name: str) -> LogEventBatch:
+        """Return all cached events of a stream, marking it as recently used."""
+        with self._lock:
+            entry = self._entry(group_name, stream_name)
+            if entry is None:
+                return LogEventBatch()
+            filename, _, _, size = entry
+            with self._connection:
+                self._connection.execute(
+                    'UPDATE streams SET accessed_at = ? WHERE group_name = ? AND stream_name = ?',
+                    (time.time(), group_name, stream_name),
+                )
+            path = self._path(filename, size)
+            if not os.path.exists(path):
+                return LogEventBatch()
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                return LogEventBatch(json.loads(line) for line in handle)
+
+    def append(
+        self,
+        group_name: str,
+        stream_name: str,
+        events: LogEventBatch,
+        next_token: Optional[str],
+        complete: bool = False,
+    ) -> None:
+        """Append new events to a cached stream and record the token to resume from.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            events: The events read after the stream's last token.
+            next_token: The forward token to resume from.
+            complete: If the stream will not receive new events.
+
+        """
+        with self._lock:
+            entry = self._entry(group_name, stream_name)
+            filename = self._filename(group_name, stream_name) if entry is None else entry[0]
+            path = self._path(filename, 0 if entry is None else entry[3])
+            if events:
+                with gzip.open(path, 'at', encoding='utf-8') as handle:
+                    for event in events:
+                        record = {
+                            'timestamp': event.timestamp,
+                            'message': event.message,
+                            'ingestionTime': event.ingestion_time,
+                        }
+                        handle.write(json.dumps(record) + '\n')
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO streams VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (group_name, stream_name, filename, next_token, complete, size, time.time()),
+                )
+            self.evict(keep=[(group_name, stream_name)])
+
+    def evict(self, keep: Iterable[Tuple[str, str]] = ()) -> int:
+        """Evict the least recently used streams until the cache fits ``max_bytes``.
+
+        Args:
+            keep: Streams, as pairs of group and stream name, which are not evicted.
+
+        Returns:
+            The number of streams evicted.
+
+        """
+        keep = set(keep)
+        evicted = 0
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT group_name, stream_name, filename, size FROM streams '
+                'ORDER BY accessed_at, rowid'
+            ).fetchall()
+            total = sum(row[3] for row in rows)
+            for group_name, stream_name, filename, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if (group_name, stream_name) in keep:
+                    continue
+                self._remove(group_name, stream_name, filename)
+                total -= size
+                evicted += 1
+        return evicted
+
+    def _remove(self, group_name: str, stream_name: str, filename: str) -> None:
+        path = os.path.join(self.directory, filename)
+        with self._connection:
+            self._connection.execute(
+                'DELETE FROM streams WHERE group_name = ? AND stream_name = ?',
+                (group_name, stream_name),
+            )
+        if os.path.exists(path):
+            os.remove(path)
+
+    def invalidate(self, group_name: str, stream_name: str) -> None:
+        """Remove a stream from the cache."""
+        with self._lock:
+            entry = self._entry(group_name, stream_name)
+            if entry is not None:
+                self._remove(group_name, stream_name, entry[0])
+
+    def clear(self) -> None:
+        """Remove every stream from the cache."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT group_name, stream_name, filename FROM streams'
+            ).fetchall()
+            for group_name, stream_name, filename in rows:
+                self._remove(group_name, stream_name, filename)
+
+    @property
+    def size(self) -> int:
+        """Return the size of all cached streams on disk."""
+        with self._lock:
+            (size,) = self._connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM streams'
+            ).fetchone()
+        return int(size)
+
+    def close(self) -> None:
+        """Close the connection to the index."""
+        with self._lock:
+            self._connection.close()
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, tuple) or len(key) != 2:
+            return False
+        with self._lock:
+            return self._entry(*key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute('SELECT COUNT(*) FROM streams').fetchone()
+        return int(count)
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'{repr(self.directory)}, '
+            f'max_bytes={self.max_bytes})'
+        )
@@ -1,8 +1,85 @@
-from typing import List, Mapping
+import bisect
+import math
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+from typing import TYPE_CHECKING, Tuple, Union
 
-import boto3
+import botocore.exceptions
 
-__all__ = ['AwsLogUtil', 'LogEvent']
+from pendant.aws import client as aws_client
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+    from pendant.aws.logcache import LogCache
+
+__all__ = ['AwsLogUtil', 'LogEvent', 'LogEventBatch', 'LogEventView']
+
+FILTER_LOG_EVENTS_MAX_STREAMS = 100
+
+MISSING_TIME = -(2**63)
+
+ERROR_FILTER_PATTERN = '?ERROR ?Error ?error ?Exception ?Traceback ?FATAL'
+
+LOG_INGESTION_DELAY = 30.0
+
+Timestamp = Union[int, float, datetime]
+
+
+def to_millis(timestamp: Timestamp) -> int:
+    """Return a timestamp as milliseconds since the Unix epoch.
+
+    Args:
+        timestamp: A datetime, naive datetimes are taken as UTC, or a number of
+            milliseconds since the Unix epoch.
+
+    Examples:
+        >>> to_millis(datetime(2018, 12, 3, tzinfo=timezone.utc))
+        1543795200000
+
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(timestamp.timestamp() * 1000)
+    return int(timestamp)
+
+
+def is_settled(stopped_at: Optional[Timestamp], delay: float = LOG_INGESTION_DELAY) -> bool:
+    """Return if ``delay`` seconds have passed since the writer of a stream stopped.
+
+    Events may be ingested a while after their writer stopped, so a stream
+    should only be taken as complete once it is settled. A stream whose writer
+    has no stop time is taken as settled.
+
+    Args:
+        stopped_at: When the writer of the stream stopped, if known.
+        delay: Seconds after ``stopped_at`` new events may still be ingested.
+
+    """
+    return stopped_at is None or time.time() - to_millis(stopped_at) / 1000 >= delay
+
+
+def _none_to_missing(value: Optional[int]) -> int:
+    """Store a missing integer as a sentinel which no real time can take."""
+    return MISSING_TIME if value is None else int(value)
+
+
+def _missing_to_none(value: int) -> Optional[int]:
+    """Restore a missing integer from its sentinel."""
+    return None if value == MISSING_TIME else value
+
+
+def _time_window(
+    request: Dict[str, Any], start_time: Optional[Timestamp], end_time: Optional[Timestamp]
+) -> Dict[str, Any]:
+    """Add an optional time window, in epoch milliseconds, to a request."""
+    if start_time is not None:
+        request['startTime'] = to_millis(start_time)
+    if end_time is not None:
+        request['endTime'] = to_millis(end_time)
+    return request
 
 
 class LogEvent(object):
@@ -13,10 +90,13 @@ class LogEvent(object):
 
     """
 
+    __slots__ = ('timestamp', 'message', 'ingestion_time', 'log_stream_name')
+
     def __init__(self, record: Mapping) -> None:
         self.timestamp = record.get('timestamp')
         self.message = record.get('message')
         self.ingestion_time = record.get('ingestionTime')
+        self.log_stream_name = record.get('logStreamName')
 
     def __repr__(self) -> str:
         return (
@@ -27,14 +107,735 @@ class LogEvent(object):
         )
 
 
+class LogEventView(object):
+    """A read-only view of one log event within a :class:`LogEventBatch`.
+
+    A view holds only its batch and index, and decodes its message on access.
+
+    Args:
+        batch: The batch holding the event.
+        index: The position of the event within the batch.
+
+    """
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch: 'LogEventBatch', index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    @property
+    def timestamp(self) -> Optional[int]:
+        """Return the time of the event in milliseconds since the Unix epoch."""
+        return _missing_to_none(self._batch.timestamps[self._index])
+
+    @property
+    def message(self) -> str:
+        """Return the message of the event."""
+        return self._batch.message(self._index)
+
+    @property
+    def ingestion_time(self) -> Optional[int]:
+        """Return the time the event was ingested in milliseconds since the Unix epoch."""
+        return _missing_to_none(self._batch.ingestion_times[self._index])
+
+    @property
+    def log_stream_name(self) -> Optional[str]:
+        """Return the name of the log stream of the event, if known."""
+        return self._batch.log_stream_name(self._index)
+
+    def to_event(self) -> LogEvent:
+        """Return a standalone copy of this event."""
+        return LogEvent(
+            {
+                'timestamp': self.timestamp,
+                'message': self.message,
+                'ingestionTime': self.ingestion_time,
+                'logStreamName': self.log_stream_name,
+            }
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'timestamp={repr(self.timestamp)}, '
+            f'message={repr(self.message)}, '
+            f'ingestion_time={repr(self.ingestion_time)})'
+        )
+
+
+class LogEventBatch(object):
+    """A compact, columnar sequence of AWS Cloudwatch log events.
+
+    Timestamps and ingestion times are stored in integer arrays, messages are
+    stored UTF-8 encoded in one contiguous buffer with an array of offsets, and
+    log stream names are stored once each. Indexing and iterating yield
+    :class:`LogEventView` objects, and slicing yields a new batch.
+
+    Whether the events are ordered by timestamp is tracked as events are
+    added, so :meth:`between` on an ordered batch is a binary search.
+
+    Args:
+        records: Log event records, as returned by the Cloudwatch Logs API.
+
+    Examples:
+        >>> batch = LogEventBatch([{'timestamp': 2, 'message': 'b'}, {'timestamp': 1}])
+        >>> len(batch), batch.nbytes
+        (2, 1)
+        >>> [event.message for event in batch.sorted()]
+        ['', 'b']
+        >>> [event.message for event in batch.between(start_time=2)]
+        ['b']
+
+    """
+
+    __slots__ = (
+        'timestamps',
+        'ingestion_times',
+        '_offsets',
+        '_buffer',
+        '_stream_ids',
+        '_streams',
+        '_stream_lookup',
+        '_is_sorted',
+    )
+
+    def __init__(self, records: Iterable[Mapping] = ()) -> None:
+        self.timestamps = array('q')
+        self.ingestion_times = array('q')
+        self._offsets = array('Q', [0])
+        self._buffer = bytearray()
+        self._stream_ids = array('l')
+        self._streams: List[Optional[str]] = []
+        self._stream_lookup: Dict[Optional[str], int] = dict()
+        self._is_sorted = True
+        for record in records:
+            self.append(record)
+
+    def _stream_id(self, log_stream_name: Optional[str]) -> int:
+        """Return the index of a log stream name, storing it if it is new."""
+        if log_stream_name not in self._stream_lookup:
+            self._stream_lookup[log_stream_name] = len(self._streams)
+            self._streams.append(log_stream_name)
+        return self._stream_lookup[log_stream_name]
+
+    def _append_timestamp(self, timestamp: int) -> None:
+        """Append a timestamp, noting if it breaks the order of the events."""
+        timestamps = self.timestamps
+        if self._is_sorted and timestamps and timestamps[-1] > timestamp:
+            self._is_sorted = False
+        timestamps.append(timestamp)
+
+    def _append(
+        self,
+        timestamp: Optional[int],
+        message: Union[bytes, bytearray],
+        ingestion_time: Optional[int],
+        log_stream_name: Optional[str],
+    ) -> None:
+        self._append_timestamp(_none_to_missing(timestamp))
+        self.ingestion_times.append(_none_to_missing(ingestion_time))
+        self._buffer += message
+        self._offsets.append(len(self._buffer))
+        self._stream_ids.append(self._stream_id(log_stream_name))
+
+    def append(self, record: Mapping) -> None:
+        """Append a log event record, as returned by the Cloudwatch Logs API."""
+        self._append(
+            record.get('timestamp'),
+            (record.get('message') or '').encode('utf-8'),
+            record.get('ingestionTime'),
+            record.get('logStreamName'),
+        )
+
+    def append_event(self, event: Union[LogEvent, LogEventView]) -> None:
+        """Append a log event, copying the encoded message of a view directly."""
+        if isinstance(event, LogEventView):
+            batch, index = event._batch, event._index
+            self._append(
+                _missing_to_none(batch.timestamps[index]),
+                batch._buffer[batch._offsets[index] : batch._offsets[index + 1]],
+                _missing_to_none(batch.ingestion_times[index]),
+                batch.log_stream_name(index),
+            )
+        else:
+            self._append(
+                event.timestamp,
+                (event.message or '').encode('utf-8'),
+                event.ingestion_time,
+                event.log_stream_name,
+            )
+
+    @classmethod
+    def from_events(cls, events: Iterable[Union[LogEvent, LogEventView]]) -> 'LogEventBatch':
+        """Build a batch from log events or views."""
+        batch = cls()
+        for event in events:
+            batch.append_event(event)
+        return batch
+
+    @classmethod
+    def concat(cls, batches: Iterable['LogEventBatch']) -> 'LogEventBatch':
+        """Join many batches, in order, into one batch."""
+        joined = cls()
+        for batch in batches:
+            joined._extend(batch, range(len(batch)))
+        return joined
+
+    @classmethod
+    def merge(cls, batches: Iterable['LogEventBatch']) -> 'LogEventBatch':
+        """Join many batches into one batch ordered by timestamp."""
+        return cls.concat(batches).sorted()
+
+    def _extend(self, batch: 'LogEventBatch', indices: Iterable[int]) -> None:
+        """Append the events of another batch at some indices."""
+        stream_ids = [self._stream_id(name) for name in batch._streams]
+        for index in indices:
+            self._append_timestamp(batch.timestamps[index])
+            self.ingestion_times.append(batch.ingestion_times[index])
+            self._buffer += batch._buffer[batch._offsets[index] : batch._offsets[index + 1]]
+            self._offsets.append(len(self._buffer))
+            self._stream_ids.append(stream_ids[batch._stream_ids[index]])
+
+    def take(self, indices: Iterable[int]) -> 'LogEventBatch':
+        """Return a new batch of the events at some indices."""
+        taken = self.__class__()
+        taken._extend(self, indices)
+        return taken
+
+    def _slice(self, start: int, stop: int) -> 'LogEventBatch':
+        """Return a new batch of a contiguous range of events."""
+        sliced = self.__class__()
+        if start >= stop:
+            return sliced
+        begin, end = self._offsets[start], self._offsets[stop]
+        sliced.timestamps = self.timestamps[start:stop]
+        sliced.ingestion_times = self.ingestion_times[start:stop]
+        sliced._buffer = self._buffer[begin:end]
+        sliced._offsets = array(
+            'Q', (offset - begin for offset in self._offsets[start : stop + 1])
+        )
+        sliced._stream_ids = self._stream_ids[start:stop]
+        sliced._streams = list(self._streams)
+        sliced._stream_lookup = dict(self._stream_lookup)
+        sliced._is_sorted = self._is_sorted
+        return sliced
+
+    def message(self, index: int) -> str:
+        """Return the message of the event at an index."""
+        return self._buffer[self._offsets[index] : self._offsets[index + 1]].decode('utf-8')
+
+    def message_nbytes(self, index: int) -> int:
+        """Return the size of the encoded message of the event at an index."""
+        return int(self._offsets[index + 1] - self._offsets[index])
+
+    def log_stream_name(self, index: int) -> Optional[str]:
+        """Return the log stream name of the event at an index."""
+        return self._streams[self._stream_ids[index]]
+
+    def messages(self) -> List[str]:
+        """Return the messages of all events."""
+        return [self.message(index) for index in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of all encoded messages."""
+        return len(self._buffer)
+
+    def is_sorted(self) -> bool:
+        """Return if the events are ordered by timestamp."""
+        return self._is_sorted
+
+    def sorted(self) -> 'LogEventBatch':
+        """Return a new batch of the events ordered by timestamp, keeping ties in order."""
+        if self._is_sorted:
+            return self._slice(0, len(self))
+        return self.take(sorted(range(len(self)), key=self.timestamps.__getitem__))
+
+    def between(
+        self, start_time: Optional[Timestamp] = None, end_time: Optional[Timestamp] = None
+    ) -> 'LogEventBatch':
+        """Return a new batch of the events within a time range.
+
+        The range is found by binary search when the events are ordered by
+        timestamp, otherwise every event is checked.
+
+        Args:
+            start_time: Only return events at or after this time.
+            end_time: Only return events before this time.
+
+        """
+        start = -math.inf if start_time is None else to_millis(start_time)
+        end = math.inf if end_time is None else to_millis(end_time)
+        if self._is_sorted:
+            lo = bisect.bisect_left(self.timestamps, start)
+            hi = bisect.bisect_left(self.timestamps, end, lo)
+            return self._slice(lo, hi)
+        timestamps = self.timestamps
+        return self.take(i for i in range(len(self)) if start <= timestamps[i] < end)
+
+    def by_stream(self) -> Dict[Optional[str], 'LogEventBatch']:
+        """Return the events grouped into one batch per log stream name."""
+        indices: Dict[int, List[int]] = dict()
+        for index, stream_id in enumerate(self._stream_ids):
+            indices.setdefault(stream_id, []).append(index)
+        return {self._streams[key]: self.take(value) for key, value in indices.items()}
+
+    def to_events(self) -> List[LogEvent]:
+        """Return standalone copies of all events."""
+        return [view.to_event() for view in self]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LogEventView, 'LogEventBatch']:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._slice(start, stop)
+            return self.take(range(start, stop, step))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Log event index out of range.')
+        return LogEventView(self, index)
+
+    def __iter__(self) -> Iterator[LogEventView]:
+        return (LogEventView(self, index) for index in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(events={len(self)}, nbytes={self.nbytes})'
+
+
 class AwsLogUtil(object):
-    """AWS Cloudwatch cloud utility functions."""
+    """AWS Cloudwatch cloud utility functions.
+
+    Args:
+        client: The Cloudwatch Logs client to use, defaults to the shared client.
+        cache: An on-disk cache of log streams used by :meth:`get_cached_log_events`.
+
+    """
+
+    def __init__(
+        self, client: Optional['BaseClient'] = None, cache: Optional['LogCache'] = None
+    ) -> None:
+        self.client = aws_client.client('logs') if client is None else client
+        self.cache = cache
+
+    def iter_log_pages(
+        self,
+        group_name: str,
+        stream_name: str,
+        next_token: Optional[str] = None,
+        page_size: Optional[int] = None,
+        start_from_head: bool = True,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> Iterator[Tuple[LogEventBatch, str]]:
+        """Lazily get pages of log events from a stream within a group.
+
+        Pages are requested one at a time until the stream is exhausted. When
+        reading from the head, pages are yielded oldest first by following the
+        forward token, otherwise pages are yielded newest first by following
+        the backward token.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            next_token: The token to resume from, defaults to either end of the stream.
+            page_size: The maximum number of events per page, defaults to the
+                service maximum of 10,000 events or 1 MB.
+            start_from_head: Read from the oldest event instead of the newest.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+
+        Yields:
+            Each page of events, and the token of the next page.
+
+        """
+        request: Dict[str, Any] = dict(
+            logGroupName=group_name, logStreamName=stream_name, startFromHead=start_from_head
+        )
+        _time_window(request, start_time, end_time)
+        if page_size is not None:
+            request['limit'] = page_size
+        if next_token is not None:
+            request['nextToken'] = next_token
+        token_key = 'nextForwardToken' if start_from_head else 'nextBackwardToken'
+        while True:
+            response = self.client.get_log_events(**request)
+            events = LogEventBatch(response['events'])
+            token = response[token_key]
+            yield events, token
+            if token == request.get('nextToken'):
+                break
+            request['nextToken'] = token
+
+    def _iter_event_pages(
+        self,
+        group_name: str,
+        stream_name: str,
+        page_size: Optional[int],
+        start_from_head: bool,
+        max_bytes: Optional[int],
+        filter_pattern: Optional[str],
+        start_time: Optional[Timestamp],
+        end_time: Optional[Timestamp],
+    ) -> Iterator[LogEventBatch]:
+        """Lazily get pages of log events, the last one cut short at ``max_bytes``."""
+        pages: Iterator[LogEventBatch]
+        if filter_pattern is not None:
+            pages = self._iter_filter_pages(
+                group_name, [stream_name], page_size, filter_pattern, start_time, end_time
+            )
+        else:
+            pages = (
+                events
+                for events, _ in self.iter_log_pages(
+                    group_name,
+                    stream_name,
+                    page_size=page_size,
+                    start_from_head=start_from_head,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+            )
+        consumed = 0
+        for events in pages:
+            if max_bytes is not None and consumed + events.nbytes >= max_bytes and events:
+                stop = bisect.bisect_left(events._offsets, max_bytes - consumed, 1)
+                yield events._slice(0, min(stop, len(events)))
+                return
+            yield events
+            consumed += events.nbytes
+
+    def iter_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        page_size: Optional[int] = None,
+        start_from_head: bool = True,
+        max_bytes: Optional[int] = None,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> Iterator[LogEventView]:
+        """Lazily get all log events from a stream within a group.
+
+        Only one page of events is held in memory at a time. If a filter pattern
+        is given, events are filtered by CloudWatch with ``filter_log_events``
+        and are always read from the oldest event.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            page_size: The maximum number of events per page.
+            start_from_head: Read from the oldest event instead of the newest.
+            max_bytes: Stop once this many bytes of messages have been yielded.
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+
+        """
+        for events in self._iter_event_pages(
+            group_name,
+            stream_name,
+            page_size,
+            start_from_head,
+            max_bytes,
+            filter_pattern,
+            start_time,
+            end_time,
+        ):
+            yield from events
+
+    def get_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        page_size: Optional[int] = None,
+        start_from_head: bool = True,
+        max_bytes: Optional[int] = None,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> List[LogEvent]:
+        """Get all log events from a stream within a group.
+
+        Use :meth:`get_log_event_batch` to keep the events in a compact
+        :class:`LogEventBatch` instead.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            page_size: The maximum number of events per page.
+            start_from_head: Read from the oldest event instead of the newest.
+            max_bytes: Stop once this many bytes of messages have been read.
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+
+        """
+        return self.get_log_event_batch(
+            group_name,
+            stream_name,
+            page_size,
+            start_from_head,
+            max_bytes,
+            filter_pattern,
+            start_time,
+            end_time,
+        ).to_events()
+
+    def get_log_event_batch(
+        self,
+        group_name: str,
+        stream_name: str,
+        page_size: Optional[int] = None,
+        start_from_head: bool = True,
+        max_bytes: Optional[int] = None,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> LogEventBatch:
+        """Get all log events from a stream within a group as one compact batch.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            page_size: The maximum number of events per page.
+            start_from_head: Read from the oldest event instead of the newest.
+            max_bytes: Stop once this many bytes of messages have been read.
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+
+        """
+        return LogEventBatch.concat(
+            self._iter_event_pages(
+                group_name,
+                stream_name,
+                page_size,
+                start_from_head,
+                max_bytes,
+                filter_pattern,
+                start_time,
+                end_time,
+            )
+        )
+
+    def get_cached_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        complete: bool = False,
+        stopped_at: Optional[Timestamp] = None,
+        delay: float = LOG_INGESTION_DELAY,
+    ) -> LogEventBatch:
+        """Get all log events from a stream within a group through the cache.
+
+        A stream cached as complete is read from disk only. Any other stream is
+        extended with the events after its last cached token before it is read.
+        Without a cache, every event is requested.
+
+        Events may be ingested a while after the writer stopped, so a stream is
+        only cached as complete once a read which started ``delay`` seconds
+        after ``stopped_at`` returns no new forward token.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            complete: If the stream will not receive new events, such as the
+                stream of a job which has finished.
+            stopped_at: When the writer of the stream stopped, if known.
+            delay: Seconds after ``stopped_at`` new events may still be ingested.
+
+        """
+        if self.cache is None:
+            return self.get_log_event_batch(group_name, stream_name)
+        if not self.cache.is_complete(group_name, stream_name):
+            settled = complete and is_settled(stopped_at, delay)
+            previous = self.cache.token(group_name, stream_name)
+            events, token = self.read_since(group_name, stream_name, previous)
+            complete = settled and token == previous
+            self.cache.append(group_name, stream_name, events, token, complete=complete)
+        return self.cache.read(group_name, stream_name)
+
+    def get_recent_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        minutes: float,
+        filter_pattern: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> LogEventBatch:
+        """Get the log events of the last few minutes from a stream within a group.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            minutes: How many minutes back from now to read.
+            filter_pattern: A CloudWatch filter pattern events must match.
+            page_size: The maximum number of events per page.
+
+        """
+        start_time = 1000 * (time.time() - 60 * minutes)
+        return self.get_log_event_batch(
+            group_name,
+            stream_name,
+            page_size=page_size,
+            filter_pattern=filter_pattern,
+            start_time=start_time,
+        )
+
+    def get_error_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        filter_pattern: str = ERROR_FILTER_PATTERN,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+        page_size: Optional[int] = None,
+    ) -> LogEventBatch:
+        """Get the log events which look like errors from a stream within a group.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            filter_pattern: A CloudWatch filter pattern, defaults to events which
+                mention an error, exception, or traceback.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+            page_size: The maximum number of events per page.
+
+        """
+        return self.get_log_event_batch(
+            group_name,
+            stream_name,
+            page_size=page_size,
+            filter_pattern=filter_pattern,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+    def filter_log_events(
+        self,
+        group_name: str,
+        stream_names: Sequence[str],
+        page_size: Optional[int] = None,
+        filter_pattern: Optional[str] = None,
+        start_time: Optional[Timestamp] = None,
+        end_time: Optional[Timestamp] = None,
+    ) -> Iterator[LogEventView]:
+        """Lazily get all log events from many streams within a group.
+
+        Streams are requested in chunks of 100, the maximum allowed in one
+        request, and each chunk is paged through until it is exhausted. Every
+        event records the name of the stream it came from. Filtering by pattern
+        and time happens in CloudWatch, so only matching events are transferred.
+
+        Args:
+            group_name: The log group name.
+            stream_names: The log stream names.
+            page_size: The maximum number of events per page.
+            filter_pattern: A CloudWatch filter pattern events must match.
+            start_time: Only read events at or after this time.
+            end_time: Only read events before this time.
+
+        """
+        for events in self._iter_filter_pages(
+            group_name, stream_names, page_size, filter_pattern, start_time, end_time
+        ):
+            yield from events
+
+    def _iter_filter_pages(
+        self,
+        group_name: str,
+        stream_names: Sequence[str],
+        page_size: Optional[int],
+        filter_pattern: Optional[str],
+        start_time: Optional[Timestamp],
+        end_time: Optional[Timestamp],
+    ) -> Iterator[LogEventBatch]:
+        """Lazily get pages of filtered log events from many streams within a group."""
+        for start in range(0, len(stream_names), FILTER_LOG_EVENTS_MAX_STREAMS):
+            request: Dict[str, Any] = dict(
+                logGroupName=group_name,
+                logStreamNames=list(stream_names[start : start + FILTER_LOG_EVENTS_MAX_STREAMS]),
+            )
+            _time_window(request, start_time, end_time)
+            if filter_pattern is not None:
+                request['filterPattern'] = filter_pattern
+            if page_size is not None:
+                request['limit'] = page_size
+            while True:
+                response = self.client.filter_log_events(**request)
+                yield LogEventBatch(response['events'])
+                if 'nextToken' not in response:
+                    break
+                request['nextToken'] = response['nextToken']
+
+    def read_since(
+        self,
+        group_name: str,
+        stream_name: str,
+        next_token: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Tuple[LogEventBatch, Optional[str]]:
+        """Get the log events after a forward token and the token to resume from.
+
+        A stream which does not exist yet is treated as a stream with no events.
+
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            next_token: The forward token to resume from, defaults to the head.
+            page_size: The maximum number of events per page.
+
+        """
+        pages: List[LogEventBatch] = []
+        try:
+            for page, next_token in self.iter_log_pages(
+                group_name, stream_name, next_token=next_token, page_size=page_size
+            ):
+                pages.append(page)
+        except botocore.exceptions.ClientError as error:
+            if error.response['Error']['Code'] != 'ResourceNotFoundException':
+                raise error
+        return LogEventBatch.concat(pages), next_token
+
+    def follow_log_events(
+        self,
+        group_name: str,
+        stream_name: str,
+        is_finished: Callable[[], bool],
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        page_size: Optional[int] = None,
+    ) -> Iterator[LogEventView]:
+        """Follow a stream within a group, like ``tail -f``, until it is finished.
+
+        Every poll resumes from the last forward token, so only new events are
+        requested. The polling interval is reset to ``min_interval`` whenever
+        new events arrive and doubles, up to ``max_interval``, whenever none do.
 
-    def __init__(self) -> None:
-        self.client = boto3.client('logs')
+        Args:
+            group_name: The log group name.
+            stream_name: The log stream name.
+            is_finished: A callable which returns if no more events will arrive.
+                The stream is read one last time after it returns ``True``.
+            min_interval: The minimum seconds between two polls.
+            max_interval: The maximum seconds between two polls.
+            page_size: The maximum number of events per page.
 
-    def get_log_events(self, group_name: str, stream_name: str) -> List[LogEvent]:
-        """Get all log events from a stream within a group."""
-        response = self.client.get_log_events(logGroupName=group_name, logStreamName=stream_name)
-        events = [LogEvent(record) for record in response['events']]
-        return events
+        """
+        next_token: Optional[str] = None
+        interval = min_interval
+        while True:
+            finished = is_finished()
+            events, next_token = self.read_since(group_name, stream_name, next_token, page_size)
+            yield from events
+            if finished:
+                return
+            interval = min_interval if events else min(max_interval, 2 * interval)
+            time.sleep(interval)
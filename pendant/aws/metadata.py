@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Set, Tuple
+
+__all__ = ['MetadataCache', 'ObjectMetadata', 'cached_metadata', 'get_metadata_cache']
+
+_Key = Tuple[str, str, Optional[str]]
+
+
+def _rfc1123(value: datetime) -> str:
+    """Format a datetime as an RFC 1123 string in GMT."""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+class ObjectMetadata(NamedTuple):
+    """The metadata of an S3 object, or the record that it does not exist.
+
+    Metadata built from a listed object is partial: its response lacks most
+    of the fields of a HEAD object response, such as ``ContentLength``.
+
+    """
+
+    exists: bool
+    size: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    version_id: Optional[str] = None
+    response: Mapping[str, Any] = {}
+    is_partial: bool = False
+
+    @classmethod
+    def missing(cls) -> 'ObjectMetadata':
+        """Return the metadata of an object which does not exist."""
+        return cls(exists=False)
+
+    @classmethod
+    def from_response(cls, response: Mapping[str, Any]) -> 'ObjectMetadata':
+        """Build metadata from a HEAD object response or a listed object.
+
+        Dates in the stored response are formatted as RFC 1123 strings, as the
+        :mod:`awscli` prints them.
+
+        """
+        last_modified = response.get('LastModified')
+        if isinstance(last_modified, str):
+            last_modified = parsedate_to_datetime(last_modified)
+        stored = {
+            name: _rfc1123(value) if isinstance(value, datetime) else value
+            for name, value in response.items()
+            if name != 'ResponseMetadata'
+        }
+        return cls(
+            exists=True,
+            size=response.get('ContentLength', response.get('Size')),
+            etag=response.get('ETag'),
+            last_modified=last_modified,
+            version_id=response.get('VersionId'),
+            response=stored,
+            is_partial='ContentLength' not in response,
+        )
+
+
+class MetadataCache(object):
+    """A thread-safe, size-bounded cache of S3 object metadata with expiry.
+
+    Entries are keyed by bucket, key, and optionally version, and are evicted
+    least recently used first once ``max_entries`` is reached. Objects which
+    exist are cached for ``ttl`` seconds. Objects which do not exist are only
+    cached if ``negative_ttl`` is set, since an object written by any other
+    process would otherwise stay missing until the entry expires. Entries for
+    objects this process writes should be invalidated so that the writes are
+    visible immediately.
+
+    The cached versions of each object are indexed by bucket and key, so
+    invalidating an object or a bucket only visits its own entries.
+
+    Args:
+        max_entries: The maximum number of cached objects.
+        ttl: The seconds metadata of an existing object stays fresh.
+        negative_ttl: The seconds the absence of an object stays fresh,
+            defaults to not caching absent objects.
+        clock: A monotonic clock in seconds.
+
+    Examples:
+        >>> cache = MetadataCache(ttl=60, negative_ttl=5)
+        >>> cache.put('mybucket', 'myobject', ObjectMetadata.missing())
+        >>> cache.get('mybucket', 'myobject').exists
+        False
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        ttl: float = 300.0,
+        negative_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[_Key, Tuple[float, ObjectMetadata]]' = OrderedDict()
+        self._versions: Dict[str, Dict[str, Set[Optional[str]]]] = dict()
+
+    def _remove(self, cache_key: _Key) -> None:
+        """Drop an entry and its index, with the lock held."""
+        del self._entries[cache_key]
+        self._unindex(cache_key)
+
+    def _unindex(self, cache_key: _Key) -> None:
+        """Drop an entry from the index of versions, with the lock held."""
+        bucket, key, version_id = cache_key
+        keys = self._versions[bucket]
+        keys[key].discard(version_id)
+        if not keys[key]:
+            del keys[key]
+            if not keys:
+                del self._versions[bucket]
+
+    def get(
+        self, bucket: str, key: str, version_id: Optional[str] = None
+    ) -> Optional[ObjectMetadata]:
+        """Return the fresh cached metadata of an object, if any."""
+        cache_key = (bucket, key, version_id)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, metadata = entry
+            if expires_at <= self._clock():
+                self._remove(cache_key)
+                return None
+            self._entries.move_to_end(cache_key)
+            return metadata
+
+    def put(
+        self, bucket: str, key: str, metadata: ObjectMetadata, version_id: Optional[str] = None
+    ) -> None:
+        """Cache the metadata of an object."""
+        ttl = self.ttl if metadata.exists else self.negative_ttl
+        if ttl <= 0:
+            return
+        cache_key = (bucket, key, version_id)
+        with self._lock:
+            self._entries[cache_key] = (self._clock() + ttl, metadata)
+            self._entries.move_to_end(cache_key)
+            self._versions.setdefault(bucket, dict()).setdefault(key, set()).add(version_id)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._unindex(evicted)
+
+    def invalidate(self, bucket: str, key: Optional[str] = None) -> None:
+        """Forget the metadata of every version of an object, or of a whole bucket.
+
+        Args:
+            bucket: The S3 bucket name.
+            key: The S3 object key, defaults to every object in the bucket.
+
+        """
+        with self._lock:
+            keys = self._versions.get(bucket, dict())
+            stale = [
+                (bucket, name, version_id)
+                for name in (list(keys) if key is None else [key])
+                for version_id in keys.get(name, ())
+            ]
+            for cache_key in stale:
+                self._remove(cache_key)
+
+    def clear(self) -> None:
+        """Forget all cached metadata."""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'max_entries={self.max_entries}, '
+            f'ttl={self.ttl}, '
+            f'negative_ttl={self.negative_ttl})'
+        )
+
+
+_cache = MetadataCache()
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Return the S3 metadata cache shared by all of :mod:`pendant`."""
+    return _cache
+
+
+def cached_metadata(
+    bucket: str,
+    key: str,
+    fetch: Callable[[], Optional[Dict[str, Any]]],
+    version_id: Optional[str] = None,
+    allow_partial: bool = True,
+) -> ObjectMetadata:
+    """Return the metadata of an object from the shared cache, fetching it on a miss.
+
+    Args:
+        bucket: The S3 bucket name.
+        key: The S3 object key.
+        fetch: A callable which returns the HEAD object response, or ``None``
+            if the object does not exist.
+        version_id: The version of the object, defaults to the latest.
+        allow_partial: Accept cached metadata of a listed object, otherwise
+            fetch the full HEAD object response instead.
+
+    """
+    metadata = _cache.get(bucket, key, version_id)
+    if metadata is None or (metadata.is_partial and not allow_partial):
+        response = fetch()
+        if response is None:
+            metadata = ObjectMetadata.missing()
+        else:
+            metadata = ObjectMetadata.from_response(response)
+        _cache.put(bucket, key, metadata, version_id)
+    return metadata
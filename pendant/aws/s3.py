@@ -1,19 +1,50 @@
-import re
-from ast import literal_eval
-from typing import Dict, Union
+import io
+import json
+import os
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import botocore.exceptions
 
-import boto3
+from pendant import aws
+from pendant.aws import client as aws_client
+from pendant.aws.metadata import MetadataCache, ObjectMetadata, cached_metadata
+from pendant.aws.metadata import get_metadata_cache
 
-import botocore
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
 
-from pendant import aws
+__all__ = [
+    'S3Uri',
+    's3api_head_object',
+    's3api_object_exists',
+    's3_object_exists',
+    's3_objects_exist',
+    'head_object_metadata',
+]
 
-__all__ = ['S3Uri', 's3api_head_object', 's3api_object_exists', 's3_object_exists']
+_MISSING_ERROR_CODES = frozenset({'404', 'NoSuchKey', 'NoSuchBucket', 'NoSuchVersion'})
 
 
 class S3Uri(object):
     """An S3 URI which conforms to RFC 3986 formatting.
 
+    The URI is parsed once on construction, and URIs are hashable so they may
+    be used as dictionary keys and set members.
+
     Args:
         path: The S3 URI path.
 
@@ -28,41 +59,118 @@ class S3Uri(object):
 
     """
 
-    delimiter = r'/'
+    __slots__ = ('path', '_bucket', '_key')
 
-    _pattern_validate = re.compile(r'^s3://.*')
-    _pattern_scheme = re.compile(r'^(s3://).*')
-    _pattern_key = re.compile(r'^s3://[^/\n]+/?(.*)?')
-    _pattern_bucket = re.compile(r'^s3://([^/]*)')
+    path: str
+    _bucket: str
+    _key: str
+
+    delimiter = r'/'
 
     def __init__(self, path: Union[str, 'S3Uri']) -> None:
-        path = str(path)
-        assert self._pattern_validate.match(path)
+        if type(path) is not str:
+            if isinstance(path, S3Uri):
+                self.path, self._bucket, self._key = path.path, path._bucket, path._key
+                return
+            path = str(path)
+        assert path.startswith('s3://')
         self.path = path
+        bucket, _, key = path[5:].partition('/')
+        if bucket and '\n' not in path:
+            self._bucket, self._key = bucket, key
+        else:
+            self._bucket, self._key = _parse(path)
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[Union[str, 'S3Uri']]) -> List['S3Uri']:
+        """Build many S3 URIs in one pass.
+
+        Paths under the same bucket as the path before them, as in most
+        listings, skip parsing and validation, and share one bucket string.
+        Any other path is built with :class:`S3Uri`.
+
+        Args:
+            paths: The S3 URI paths.
+
+        Examples:
+            >>> S3Uri.from_paths(['s3://mybucket/a', 's3://mybucket/b'])
+            [S3Uri('s3://mybucket/a'), S3Uri('s3://mybucket/b')]
+
+        """
+        new = object.__new__
+        uris: List[S3Uri] = []
+        append = uris.append
+        prefix: Optional[str] = None
+        bucket, start = '', 0
+        for path in paths:
+            if (
+                prefix is not None
+                and type(path) is str
+                and path.startswith(prefix)
+                and '\n' not in path
+            ):
+                uri = new(cls)
+                uri.path = path
+                uri._bucket = bucket
+                uri._key = path[start:]
+            else:
+                uri = cls(path)
+                if uri._bucket and '\n' not in uri._bucket:
+                    bucket = uri._bucket
+                    prefix = f's3://{bucket}/'
+                    start = len(prefix)
+            append(uri)
+        return uris
+
+    def _join(self, suffix: str) -> 'S3Uri':
+        """Build the S3 URI of this path with a suffix appended.
+
+        When this URI has a bucket and a delimiter after it, the suffix only
+        extends the key, so the result is built without parsing its path.
+
+        """
+        uri = object.__new__(self.__class__)
+        uri.path = path = self.path + suffix
+        bucket, key = self._bucket, self._key
+        if (
+            len(self.path) - len(bucket) - len(key) == 6
+            and bucket
+            and '\n' not in bucket
+            and '\n' not in suffix
+        ):
+            uri._bucket, uri._key = bucket, key + suffix
+        else:
+            uri._bucket, uri._key = _parse(path)
+        return uri
+
+    def _with_key(self, key: str) -> 'S3Uri':
+        """Build the S3 URI of a key in this URI's bucket, such as a listed key."""
+        uri = object.__new__(self.__class__)
+        uri.path = path = f's3://{self._bucket}/{key}'
+        if '\n' in path:
+            uri._bucket, uri._key = _parse(path)
+        else:
+            uri._bucket, uri._key = self._bucket, key
+        return uri
 
     def __add__(self, other: str) -> 'S3Uri':
         """Add a suffix to this S3 URI."""
         if not isinstance(other, str):
             return NotImplemented
-        return S3Uri(self.path + other)
+        return self._join(other)
 
     def __floordiv__(self, other: str) -> 'S3Uri':
         """Join this URI with another part using the `/` operator."""
-        if not isinstance(other, str):
-            return NotImplemented
-        if self.path.endswith(self.delimiter):
-            return S3Uri(self.path + other)
-        else:
-            return S3Uri(self.delimiter.join([self.path, other]))
+        return self.__truediv__(other)
 
     def __truediv__(self, other: str) -> 'S3Uri':
         """Join this URI with another part using the `/` operator."""
         if not isinstance(other, str):
             return NotImplemented
         if self.path.endswith(self.delimiter):
-            return S3Uri(self.path + other)
+            return self._join(other)
         else:
-            return S3Uri(self.delimiter.join([self.path, other]))
+            return self._join(self.delimiter + other)
 
     @property
     def scheme(self) -> str:
@@ -86,8 +194,7 @@ class S3Uri(object):
             'mybucket'
 
         """
-        search = self._pattern_bucket.search(self.path)
-        return search.groups()[0] if search else ''
+        return self._bucket
 
     @property
     def key(self) -> str:
@@ -99,8 +206,7 @@ class S3Uri(object):
             'myobject'
 
         """
-        search = self._pattern_key.search(self.path)
-        return search.groups()[0] if search else ''
+        return self._key
 
     def add_suffix(self, suffix: str) -> 'S3Uri':
         """Add a suffix to this S3 URI.
@@ -125,6 +231,170 @@ class S3Uri(object):
         """Test if this URI references an object that exists."""
         return s3_object_exists(self.bucket, self.key)
 
+    def metadata(self, version_id: Optional[str] = None) -> ObjectMetadata:
+        """Return the metadata of the object this URI references, through the shared cache.
+
+        Args:
+            version_id: The version of the object, defaults to the latest.
+
+        """
+        return head_object_metadata(self.bucket, self.key, version_id)
+
+    def size(self) -> Optional[int]:
+        """Return the size in bytes of the object this URI references, if it exists."""
+        return self.metadata().size
+
+    def etag(self) -> Optional[str]:
+        """Return the ETag of the object this URI references, if it exists."""
+        return self.metadata().etag
+
+    def last_modified(self) -> Optional[datetime]:
+        """Return when the object this URI references was last modified, if it exists."""
+        return self.metadata().last_modified
+
+    def invalidate(self) -> None:
+        """Forget the cached metadata of the object this URI references."""
+        get_metadata_cache().invalidate(self.bucket, self.key)
+
+    def open(
+        self,
+        mode: str = 'rb',
+        block_size: int = 256 * 1024,
+        read_ahead: int = 0,
+        max_blocks: int = 32,
+        prefetch: int = 0,
+        encoding: Optional[str] = None,
+        client: Optional['BaseClient'] = None,
+        **kwargs: Any,
+    ) -> IO:
+        """Open the object this URI references for reading, without downloading it.
+
+        The object is read lazily with ranged GET requests, one block at a
+        time, so reading the header of a large object costs only a few
+        requests. See :class:`~pendant.aws.s3file.S3ObjectReader` for how
+        blocks are cached, read ahead, and prefetched.
+
+        Args:
+            mode: Either ``"rb"`` for a binary or ``"r"`` for a text stream.
+            block_size: The size of each ranged GET request and cached block.
+            read_ahead: The number of blocks requested after each block read.
+            max_blocks: The maximum number of blocks cached.
+            prefetch: The number of blocks requested concurrently ahead of a
+                sequential scan, defaults to none.
+            encoding: The encoding of a text stream.
+            client: The S3 client to use, defaults to the shared S3 client.
+            kwargs: Other keyword arguments to :class:`io.TextIOWrapper`.
+
+        Returns:
+            A seekable, buffered file object.
+
+        Raises:
+            S3ObjectNotFoundError: If the object does not exist.
+
+        Examples:
+            >>> # with S3Uri('s3://mybucket/reads.bam').open('rb') as handle:
+            >>> #     is_bam = handle.read(4) == b'BAM\\x01'
+
+        """
+        from pendant.aws.s3file import S3ObjectReader
+
+        if mode not in ('r', 'rb', 'rt'):
+            raise ValueError(f'S3 objects can only be opened for reading, not: {repr(mode)}')
+        raw = S3ObjectReader(
+            self.bucket,
+            self.key,
+            block_size=block_size,
+            read_ahead=read_ahead,
+            max_blocks=max_blocks,
+            prefetch=prefetch,
+            client=client,
+        )
+        handle = io.BufferedReader(raw, buffer_size=io.DEFAULT_BUFFER_SIZE)
+        if mode == 'rb':
+            return handle
+        return io.TextIOWrapper(handle, encoding=encoding, **kwargs)
+
+    def upload_from(self, path: str, **kwargs: Any) -> bool:
+        """Upload a local file to this URI, skipping it if the object is unchanged.
+
+        Args:
+            path: The path of the local file.
+            kwargs: The keyword arguments to :func:`~pendant.aws.transfer.upload_file`.
+
+        Returns:
+            If the file was uploaded.
+
+        """
+        from pendant.aws.transfer import upload_file
+
+        return upload_file(path, self, **kwargs)
+
+    def download_to(self, path: str, **kwargs: Any) -> bool:
+        """Download the object this URI references, skipping it if the file is unchanged.
+
+        Args:
+            path: The path of the local file.
+            kwargs: The keyword arguments to :func:`~pendant.aws.transfer.download_file`.
+
+        Returns:
+            If the object was downloaded.
+
+        """
+        from pendant.aws.transfer import download_file
+
+        return download_file(self, path, **kwargs)
+
+    def _as_directory(self) -> str:
+        """Return the key of this URI as a prefix which ends with a delimiter."""
+        if not self.key or self.key.endswith(self.delimiter):
+            return self.key
+        return self.key + self.delimiter
+
+    def iterdir(self, **kwargs: Any) -> Iterator['S3Uri']:
+        """Lazily list the objects and common prefixes directly under this URI.
+
+        Common prefixes are yielded with a trailing delimiter. Large listings
+        are split into ranges which are listed concurrently.
+
+        Args:
+            kwargs: The keyword arguments to :func:`~pendant.aws.listing.iter_keys`.
+
+        Examples:
+            >>> # samples = list(S3Uri('s3://mybucket/samples').iterdir())
+
+        """
+        from pendant.aws.listing import iter_keys
+
+        prefix = self._as_directory()
+        for key in iter_keys(self.bucket, prefix, delimiter=self.delimiter, **kwargs):
+            if key != prefix:
+                yield self._with_key(key)
+
+    def glob(self, pattern: str, **kwargs: Any) -> Iterator['S3Uri']:
+        """Lazily find the objects under this URI which match a glob pattern.
+
+        Args:
+            pattern: The glob pattern, relative to this URI, which may use
+                ``*``, ``?``, ``[...]`` and ``**``.
+            kwargs: The keyword arguments to :func:`~pendant.aws.listing.glob_keys`.
+
+        Examples:
+            >>> # inputs = list(S3Uri('s3://mybucket/samples').glob('*/reads.bam'))
+
+        """
+        from pendant.aws.listing import glob_keys
+
+        for key in glob_keys(self.bucket, pattern, self._as_directory(), **kwargs):
+            yield self._with_key(key)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, S3Uri):
+            return NotImplemented
+        return self.path == other.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
     def __str__(self) -> str:
         return self.path
 
@@ -132,9 +402,29 @@ class S3Uri(object):
         return f'{self.__class__.__qualname__}({repr(self.path)})'
 
 
+def _parse(path: str) -> Tuple[str, str]:
+    """Split a valid S3 URI path into its bucket and key.
+
+    The bucket is everything up to the first delimiter after the scheme. The
+    key is everything after the bucket and one delimiter, up to the first
+    newline, and is empty when the bucket is empty or spans a newline.
+
+    """
+    bucket, _, key = path[5:].partition('/')
+    if not bucket or '\n' in bucket:
+        return bucket, ''
+    if '\n' in key:
+        return bucket, key[: key.find('\n')]
+    return bucket, key
+
+
 def s3api_head_object(bucket: str, key: str, profile: str = 'default') -> Dict:
     """Use the :class:`awscli` to make a GET request on an S3 object's metadata.
 
+    Metadata of the default profile is read through the shared cache of S3
+    object metadata. The cache is not keyed by profile, so any other profile
+    always makes a request.
+
     Args:
         bucket: The S3 bucket name.
         key: The S3 object key.
@@ -143,10 +433,34 @@ def s3api_head_object(bucket: str, key: str, profile: str = 'default') -> Dict:
     Return:
         A dictionary of object metadata, if the object exists.
 
+    Raises:
+        RuntimeError: If the object does not exist.
+
     """
-    stdout: str = aws.cli(f'--profile {profile} s3api head-object --bucket {bucket} --key {key}')
-    metadata: Dict = literal_eval(stdout)
-    return metadata
+
+    def fetch() -> Optional[Dict]:
+        try:
+            stdout: str = aws.cli(
+                f'--profile {profile} --output json '
+                f's3api head-object --bucket {bucket} --key {key}'
+            )
+        except RuntimeError as error:
+            if '404' in str(error) or 'Not Found' in str(error):
+                return None
+            raise error
+        response: Dict = json.loads(stdout)
+        return response
+
+    if profile == 'default':
+        metadata = cached_metadata(bucket, key, fetch, allow_partial=False)
+        response = dict(metadata.response) if metadata.exists else None
+    else:
+        response = fetch()
+    if response is None:
+        raise RuntimeError(
+            'An error occurred (404) when calling the HeadObject operation: Not Found'
+        )
+    return response
 
 
 def s3api_object_exists(bucket: str, key: str, profile: str = 'default') -> bool:
@@ -165,21 +479,210 @@ def s3api_object_exists(bucket: str, key: str, profile: str = 'default') -> bool
         return False
 
 
+def _uses_shared_cache(client: Optional['BaseClient']) -> bool:
+    """Return if metadata read with a client belongs in the shared cache.
+
+    The cache is not keyed by endpoint or credentials, so, as for a profile
+    other than the default, metadata read with any client but the shared S3
+    client is neither read from nor written to the cache.
+
+    """
+    return client is None or client is aws_client.client('s3')
+
+
+def head_object_metadata(
+    bucket: str,
+    key: str,
+    version_id: Optional[str] = None,
+    client: Optional['BaseClient'] = None,
+) -> ObjectMetadata:
+    """Return the metadata of an S3 object through the shared cache.
+
+    Metadata read with a client other than the shared S3 client is always
+    requested, and is not cached.
+
+    Args:
+        bucket: The S3 bucket name.
+        key: The S3 object key.
+        version_id: The version of the object, defaults to the latest.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    """
+
+    s3 = aws_client.client('s3') if client is None else client
+
+    def fetch() -> Optional[Dict]:
+        request = dict(Bucket=bucket, Key=key)
+        if version_id is not None:
+            request['VersionId'] = version_id
+        try:
+            response: Dict = s3.head_object(**request)
+            return response
+        except botocore.exceptions.ClientError as error:
+            if error.response['Error']['Code'] in _MISSING_ERROR_CODES:
+                return None
+            raise error
+
+    if not _uses_shared_cache(client):
+        response = fetch()
+        return (
+            ObjectMetadata.missing()
+            if response is None
+            else ObjectMetadata.from_response(response)
+        )
+    return cached_metadata(bucket, key, fetch, version_id)
+
+
 def s3_object_exists(bucket: str, key: str) -> bool:
-    """Use :class:`boto3.S3.Object <S3.Object>` to test if an S3 object exists.
+    """Test if an S3 object exists, through the shared cache of S3 object metadata.
 
     Args:
         bucket: The S3 bucket name.
         key: The S3 object key.
 
     """
-    try:
-        boto3.resource('s3').Object(bucket, key).load()
-        return True
-    except botocore.exceptions.ClientError as e:
-        if e.response['Error']['Code'] == "404":
-            return False
-        else:
-            raise e
-    else:
-        return True
+    return head_object_metadata(bucket, key).exists
+
+
+def _group_uncached(
+    targets: List[S3Uri], cache: Optional[MetadataCache]
+) -> Tuple[Dict[Tuple[str, str], bool], Dict[Tuple[str, str], Set[str]]]:
+    """Answer URIs from a cache, if any, grouping the rest by bucket and directory."""
+    known: Dict[Tuple[str, str], bool] = dict()
+    groups: Dict[Tuple[str, str], Set[str]] = dict()
+    for uri in targets:
+        metadata = None if cache is None else cache.get(uri.bucket, uri.key)
+        if metadata is not None:
+            known[(uri.bucket, uri.key)] = metadata.exists
+            continue
+        directory = uri.key[: uri.key.rfind(S3Uri.delimiter) + 1]
+        groups.setdefault((uri.bucket, directory), set()).add(uri.key)
+    return known, groups
+
+
+def _head_keys(
+    bucket: str, keys: Set[str], client: 'BaseClient'
+) -> Tuple[Dict[str, ObjectMetadata], Set[str]]:
+    """Test if objects exist with one HEAD request each."""
+    return {key: head_object_metadata(bucket, key, client=client) for key in keys}, set()
+
+
+def _key_before(key: str) -> str:
+    """Return a key which sorts shortly before a key, to start a listing after."""
+    code = ord(key[-1]) - 1
+    if code < 0 or 0xD800 <= code <= 0xDFFF:
+        return key[:-1]
+    return key[:-1] + chr(code)
+
+
+def _list_keys(
+    bucket: str,
+    keys: Set[str],
+    page_size: int,
+    max_pages: int,
+    client: 'BaseClient',
+    cache: Optional[MetadataCache],
+) -> Tuple[Dict[str, ObjectMetadata], Set[str]]:
+    """Test if objects in one directory exist by listing them, caching every answer, if any.
+
+    The listing starts just before the first key and stops after the last
+    key, or after ``max_pages`` pages. The keys after the last listed key are
+    then returned as unresolved.
+
+    """
+    first, last = min(keys), max(keys)
+    paginator = client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=bucket,
+        Prefix=os.path.commonprefix([first, last]),
+        Delimiter=S3Uri.delimiter,
+        StartAfter=_key_before(first),
+        PaginationConfig={'PageSize': page_size},
+    )
+    found: Dict[str, ObjectMetadata] = dict()
+    listed_through, is_complete = '', True
+    for count, page in enumerate(pages, start=1):
+        for item in page.get('Contents', []):
+            if item['Key'] in keys:
+                found[item['Key']] = ObjectMetadata.from_response(item)
+            listed_through = item['Key']
+        if listed_through >= last:
+            break
+        if count >= max_pages and page.get('IsTruncated'):
+            is_complete = False
+            break
+    resolved = {
+        key: found.get(key, ObjectMetadata.missing())
+        for key in keys
+        if is_complete or key <= listed_through
+    }
+    if cache is not None:
+        for key, metadata in resolved.items():
+            cache.put(bucket, key, metadata)
+    return resolved, keys - set(resolved)
+
+
+def s3_objects_exist(
+    uris: Iterable[Union[str, S3Uri]],
+    min_keys_per_listing: int = 8,
+    max_workers: int = 16,
+    page_size: int = 1000,
+    max_pages_per_listing: int = 10,
+    client: Optional['BaseClient'] = None,
+) -> Dict[S3Uri, bool]:
+    """Test if many S3 objects exist with as few requests as possible.
+
+    URIs are grouped by bucket and by the prefix up to their last delimiter.
+    Groups of at least ``min_keys_per_listing`` keys are answered by listing
+    their longest common prefix, one delimiter level deep, starting just
+    before the first key of the group and stopping after its last key, which
+    costs one request per ``page_size`` listed objects. A listing which reads
+    ``max_pages_per_listing`` pages stops early, and the keys it has not
+    reached are answered with HEAD requests instead. Smaller groups are
+    answered with one HEAD request per key. All listings and HEAD requests run
+    concurrently. Objects in the shared cache of S3 object metadata are not
+    requested, and every answer is cached. With a client other than the shared
+    S3 client, the shared cache is not used.
+
+    Args:
+        uris: The S3 URIs to test.
+        min_keys_per_listing: The fewest keys in a group to list instead of HEAD.
+        max_workers: The maximum number of concurrent requests.
+        page_size: The maximum number of keys per listing request.
+        max_pages_per_listing: The most pages one listing reads before falling
+            back to HEAD requests.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Returns:
+        If each S3 URI references an object that exists.
+
+    """
+    assert max_pages_per_listing >= 1, 'A listing must read at least one page.'
+    cache = get_metadata_cache() if _uses_shared_cache(client) else None
+    client = aws_client.client('s3') if client is None else client
+    targets = S3Uri.from_paths(uris)
+    known, groups = _group_uncached(targets, cache)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        buckets: Dict[Future, str] = {}
+        for (bucket, _), keys in groups.items():
+            if len(keys) >= min_keys_per_listing and '' not in keys:
+                future = executor.submit(
+                    _list_keys, bucket, keys, page_size, max_pages_per_listing, client, cache
+                )
+                buckets[future] = bucket
+            else:
+                for key in keys:
+                    buckets[executor.submit(_head_keys, bucket, {key}, client)] = bucket
+        pending = set(buckets)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                bucket = buckets.pop(future)
+                found, unresolved = future.result()
+                for key, metadata in found.items():
+                    known[(bucket, key)] = metadata.exists
+                for key in unresolved:
+                    future = executor.submit(_head_keys, bucket, {key}, client)
+                    buckets[future] = bucket
+                    pending.add(future)
+    return {uri: known[(uri.bucket, uri.key)] for uri in targets}
@@ -0,0 +1,216 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from pendant.aws import client as aws_client
+from pendant.aws.exception import S3ObjectNotFoundError
+from pendant.aws.metadata import get_metadata_cache
+from pendant.aws.s3 import head_object_metadata
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['S3ObjectReader']
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_BLOCKS = 32
+
+
+class S3ObjectReader(io.RawIOBase):
+    """A seekable, read-only raw stream over an S3 object, backed by ranged GETs.
+
+    The object is read in blocks of ``block_size`` bytes, and only the blocks
+    which are read are requested. Each ranged GET also requests the next
+    ``read_ahead`` blocks, and the ``max_blocks`` most recently used blocks are
+    cached so that seeking back and forth costs no further requests. When
+    ``prefetch`` is set, a sequential scan requests the next ``prefetch``
+    blocks concurrently while the current block is consumed.
+
+    The object is described with a fresh HEAD request when it is opened, and
+    every request is pinned to its ETag, so an object which changes while it
+    is read raises an error rather than returning a mix of old and new bytes.
+
+    This stream is usually wrapped in a buffered reader with
+    :meth:`pendant.aws.s3.S3Uri.open`.
+
+    Args:
+        bucket: The S3 bucket name.
+        key: The S3 object key.
+        block_size: The size of each cached block.
+        read_ahead: The number of blocks requested after each block read.
+        max_blocks: The maximum number of blocks cached.
+        prefetch: The number of blocks requested concurrently ahead of a
+            sequential scan, defaults to none.
+        version_id: The version of the object, defaults to the latest.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Raises:
+        S3ObjectNotFoundError: If the object does not exist.
+
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        read_ahead: int = 0,
+        max_blocks: int = DEFAULT_MAX_BLOCKS,
+        prefetch: int = 0,
+        version_id: Optional[str] = None,
+        client: Optional['BaseClient'] = None,
+    ) -> None:
+        super().__init__()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._blocks: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._pending: Dict[int, Future] = dict()
+        assert block_size > 0, 'Block size must be positive.'
+        assert read_ahead >= 0 and prefetch >= 0, 'Read-ahead and prefetch cannot be negative.'
+        assert max_blocks > max(read_ahead, prefetch), 'Too few blocks to read ahead.'
+        self.bucket = bucket
+        self.key = key
+        self.block_size = block_size
+        self.read_ahead = read_ahead
+        self.max_blocks = max_blocks
+        self.prefetch = prefetch
+        self.version_id = version_id
+        self._client = aws_client.client('s3') if client is None else client
+
+        if version_id is None:
+            get_metadata_cache().invalidate(bucket, key)
+        metadata = head_object_metadata(bucket, key, version_id, client=self._client)
+        if not metadata.exists:
+            raise S3ObjectNotFoundError(f'S3 object does not exist: s3://{bucket}/{key}')
+        self.size: int = metadata.size or 0
+        self.etag = metadata.etag
+        self.requests = 0
+        self.bytes_requested = 0
+
+        self._position = 0
+        self._last_index = -1
+        self._n_blocks = -(-self.size // block_size)
+        self._counter_lock = threading.Lock()
+        if prefetch:
+            self._executor = ThreadPoolExecutor(max_workers=prefetch)
+
+    def _get_range(self, start: int, stop: int) -> bytes:
+        """Request the bytes of the object from ``start`` up to ``stop``."""
+        request = dict(Bucket=self.bucket, Key=self.key, Range=f'bytes={start}-{stop - 1}')
+        if self.version_id is not None:
+            request['VersionId'] = self.version_id
+        elif self.etag is not None:
+            request['IfMatch'] = self.etag
+        data: bytes = self._client.get_object(**request)['Body'].read()
+        with self._counter_lock:
+            self.requests += 1
+            self.bytes_requested += len(data)
+        return data
+
+    def _get_block(self, index: int) -> bytes:
+        """Request one block of the object."""
+        start = index * self.block_size
+        return self._get_range(start, min(start + self.block_size, self.size))
+
+    def _store(self, index: int, block: bytes) -> None:
+        """Cache a block, evicting the least recently used blocks."""
+        self._blocks[index] = block
+        self._blocks.move_to_end(index)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def _is_wanted(self, index: int) -> bool:
+        """Return if a block exists and is neither cached nor being requested."""
+        return index < self._n_blocks and index not in self._blocks and index not in self._pending
+
+    def _drop_pending(self, index: int) -> None:
+        """Cancel or forget prefetches of blocks outside the window starting at a block."""
+        for ahead in list(self._pending):
+            if not index <= ahead <= index + self.prefetch:
+                self._pending.pop(ahead).cancel()
+
+    def _block(self, index: int) -> bytes:
+        """Return a block of the object, from the cache if possible."""
+        if self._pending and index != self._last_index + 1:
+            self._drop_pending(index)
+        block = self._blocks.get(index)
+        if block is not None:
+            self._blocks.move_to_end(index)
+        elif index in self._pending:
+            block = self._pending.pop(index).result()
+            self._store(index, block)
+        else:
+            count = 1
+            while count <= self.read_ahead and self._is_wanted(index + count):
+                count += 1
+            start = index * self.block_size
+            data = self._get_range(start, min(start + count * self.block_size, self.size))
+            for offset in range(count):
+                chunk = data[offset * self.block_size : (offset + 1) * self.block_size]
+                self._store(index + offset, chunk)
+            block = self._blocks[index]
+        if self._executor is not None and index == self._last_index + 1:
+            for ahead in range(index + 1, index + 1 + self.prefetch):
+                if self._is_wanted(ahead):
+                    self._pending[ahead] = self._executor.submit(self._get_block, ahead)
+        self._last_index = index
+        return block
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        """Read bytes into a pre-allocated buffer, returning the number of bytes read."""
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        if self._position >= self.size or not len(buffer):
+            return 0
+        index, offset = divmod(self._position, self.block_size)
+        block = self._block(index)
+        count = min(len(buffer), len(block) - offset)
+        memoryview(buffer).cast('B')[:count] = block[offset : offset + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Change the stream position and return the new position."""
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f'Invalid whence: {whence}')
+        if position < 0:
+            raise ValueError(f'Negative seek position: {position}')
+        self._position = position
+        return position
+
+    def tell(self) -> int:
+        """Return the current stream position."""
+        return self._position
+
+    def close(self) -> None:
+        """Close this stream, dropping any cached and prefetched blocks."""
+        for future in self._pending.values():
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._blocks.clear()
+        self._pending.clear()
+        super().close()
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'bucket={repr(self.bucket)}, '
+            f'key={repr(self.key)}, '
+            f'block_size={self.block_size})'
+        )
@@ -0,0 +1,250 @@
+import functools
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from botocore.client import BaseClient
+
+__all__ = ['Throttle', 'ThrottleStats', 'TokenBucket', 'get_throttle']
+
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        'BandwidthLimitExceeded',
+        'EC2ThrottledException',
+        'LimitExceededException',
+        'PriorRequestNotComplete',
+        'ProvisionedThroughputExceededException',
+        'RequestLimitExceeded',
+        'RequestThrottled',
+        'RequestThrottledException',
+        'SlowDown',
+        'Throttling',
+        'ThrottlingException',
+        'TooManyRequestsException',
+    }
+)
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket which limits the rate of an operation.
+
+    Args:
+        rate: The number of tokens added to the bucket per second.
+        capacity: The maximum number of tokens in the bucket, defaults to ``rate``.
+        clock: A monotonic clock in seconds.
+        sleep: A function which sleeps for a number of seconds.
+
+    Examples:
+        >>> bucket = TokenBucket(rate=10)
+        >>> bucket.acquire()
+        0.0
+
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        assert rate > 0, 'The rate of a token bucket must be positive.'
+        self.rate = rate
+        self.capacity = max(1.0, rate if capacity is None else capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated_at = clock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens from the bucket, waiting until enough are available.
+
+        Returns:
+            The number of seconds spent waiting.
+
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__qualname__}(rate={self.rate}, capacity={self.capacity})'
+
+
+class ThrottleStats(object):
+    """Thread-safe counters of rate limiting and retries of AWS API calls."""
+
+    _fields = ('calls', 'throttles', 'retries', 'wait_seconds', 'backoff_seconds')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, float]] = dict()
+
+    def record(self, operation: str, **counts: float) -> None:
+        """Add to the counters of an operation, such as ``"batch.SubmitJob"``."""
+        with self._lock:
+            counters = self._operations.setdefault(operation, dict.fromkeys(self._fields, 0))
+            for field, count in counts.items():
+                counters[field] += count
+
+    def operation(self, operation: str) -> Dict[str, float]:
+        """Return the counters of one operation."""
+        with self._lock:
+            return dict(self._operations.get(operation, dict.fromkeys(self._fields, 0)))
+
+    def total(self) -> Dict[str, float]:
+        """Return the counters summed over all operations."""
+        with self._lock:
+            return {
+                field: sum(counters[field] for counters in self._operations.values())
+                for field in self._fields
+            }
+
+    def reset(self) -> None:
+        """Reset all counters to zero."""
+        with self._lock:
+            self._operations.clear()
+
+    def __repr__(self) -> str:
+        parts = [f'{field}={value}' for field, value in self.total().items()]
+        return f'{self.__class__.__qualname__}({", ".join(parts)})'
+
+
+class Throttle(object):
+    """Client-side rate limiting and throttling-aware retries of AWS API calls.
+
+    Every attempt of an API call first takes a token from the bucket of its
+    operation, if a rate is configured for it. Calls which fail with a
+    throttling error are retried with full-jitter exponential backoff, in place
+    of botocore's own retries, while other errors are left to botocore. A
+    throttle is attached to a client with :meth:`register`, which the shared
+    :class:`~pendant.aws.client.ClientProvider` does for every client it builds.
+
+    Args:
+        rates: Calls per second allowed for each operation. Operations are
+            named by service and operation, such as ``"batch.SubmitJob"``, or by
+            operation alone, such as ``"DescribeJobs"``.
+        max_attempts: The maximum number of attempts of a throttled call.
+        base_delay: The base delay, in seconds, of the exponential backoff.
+        max_delay: The maximum delay, in seconds, between two attempts.
+
+    Examples:
+        >>> throttle = Throttle(rates={'batch.SubmitJob': 50, 'DescribeJobs': 10})
+        >>> throttle.rate('batch', 'SubmitJob')
+        50
+
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Mapping[str, float]] = None,
+        max_attempts: int = 8,
+        base_delay: float = 0.1,
+        max_delay: float = 20.0,
+    ) -> None:
+        self.rates: Dict[str, float] = dict(rates or {})
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = ThrottleStats()
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = dict()
+
+    def rate(self, service: str, operation: str) -> Optional[float]:
+        """Return the configured rate of an operation, if any."""
+        return self.rates.get(f'{service}.{operation}', self.rates.get(operation))
+
+    def set_rate(self, operation: str, rate: float) -> None:
+        """Set the calls per second allowed for an operation."""
+        with self._lock:
+            self.rates[operation] = rate
+            self._buckets.clear()
+
+    def bucket(self, service: str, operation: str) -> Optional[TokenBucket]:
+        """Return the token bucket of an operation, if it has a configured rate."""
+        rate = self.rate(service, operation)
+        if rate is None:
+            return None
+        with self._lock:
+            name = f'{service}.{operation}'
+            if name not in self._buckets:
+                self._buckets[name] = TokenBucket(rate)
+            return self._buckets[name]
+
+    def delay(self, attempts: int) -> float:
+        """Return a full-jitter exponential backoff delay after a number of attempts."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempts))
+
+    def register(self, client: 'BaseClient') -> 'BaseClient':
+        """Attach this throttle to a client and return the client."""
+        service = client.meta.service_model.service_name
+        event_name = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register_first(
+            f'before-send.{event_name}', functools.partial(self._before_send, service)
+        )
+        client.meta.events.register_first(
+            f'needs-retry.{event_name}', functools.partial(self._needs_retry, service)
+        )
+        return client
+
+    def _before_send(self, service: str, event_name: str, **kwargs: Any) -> None:
+        """Wait for a token of the operation before every attempt."""
+        operation = event_name.rsplit('.', 1)[-1]
+        bucket = self.bucket(service, operation)
+        wait = 0.0 if bucket is None else bucket.acquire()
+        self.stats.record(f'{service}.{operation}', calls=1, wait_seconds=wait)
+
+    def _needs_retry(
+        self,
+        service: str,
+        response: Optional[Tuple[Any, Mapping]],
+        attempts: int,
+        operation: Any,
+        **kwargs: Any,
+    ) -> Union[float, bool, None]:
+        """Decide if a throttled attempt is retried.
+
+        Returns:
+            The seconds to sleep before retrying a throttled attempt, ``False``
+            if a throttled call has run out of attempts, or ``None`` to leave
+            the decision to botocore for any other outcome.
+
+        """
+        if response is None:
+            return None
+        code = response[1].get('Error', {}).get('Code')
+        if code not in THROTTLING_ERROR_CODES:
+            return None
+        name = f'{service}.{operation.name}'
+        if attempts >= self.max_attempts:
+            self.stats.record(name, throttles=1)
+            return False
+        delay = self.delay(attempts)
+        self.stats.record(name, throttles=1, retries=1, backoff_seconds=delay)
+        return delay
+
+    def __repr__(self) -> str:
+        return (
+            f'{self.__class__.__qualname__}('
+            f'rates={self.rates}, '
+            f'max_attempts={self.max_attempts}, '
+            f'base_delay={self.base_delay}, '
+            f'max_delay={self.max_delay})'
+        )
+
+
+_throttle = Throttle()
+
+
+def get_throttle() -> Throttle:
+    """Return the throttle shared by all of :mod:`pendant`."""
+    return _throttle
@@ -0,0 +1,307 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from pendant.aws import client as aws_client
+from pendant.aws.exception import S3ObjectNotFoundError
+from pendant.aws.metadata import ObjectMetadata, get_metadata_cache
+from pendant.aws.s3 import S3Uri, _uses_shared_cache, head_object_metadata
+
+if TYPE_CHECKING:
+    from boto3.s3.transfer import TransferConfig
+    from botocore.client import BaseClient
+
+__all__ = ['download_file', 'file_etag', 'sync_from_s3', 'sync_to_s3', 'upload_file']
+
+MIB = 1024**2
+MULTIPART_MIN_PART_SIZE = 5 * MIB
+DEFAULT_PART_SIZE = 8 * MIB
+DEFAULT_MAX_CONCURRENCY = 10
+HASH_CHUNK_SIZE = MIB
+COMMON_PART_SIZES = (8 * MIB, 5 * MIB, 16 * MIB)
+
+
+def _transfer_config(part_size: int, max_concurrency: int) -> 'TransferConfig':
+    """Return a transfer configuration which splits files into parts of ``part_size``."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=max_concurrency,
+    )
+
+
+def _per_file_concurrency(client: 'BaseClient', max_concurrency: int, max_workers: int) -> int:
+    """Split the client's connection pool between the files transferred concurrently."""
+    pool_size = client.meta.config.max_pool_connections or aws_client.DEFAULT_MAX_POOL_CONNECTIONS
+    return max(1, min(max_concurrency, pool_size // max(1, max_workers)))
+
+
+def file_etag(path: str, part_size: Optional[int] = None) -> str:
+    """Compute the ETag S3 assigns to a local file once it is uploaded.
+
+    The file is read in chunks and never loaded into memory at once.
+
+    Args:
+        path: The path of the local file.
+        part_size: The part size of a multipart upload, or ``None`` if the
+            file is uploaded with a single request.
+
+    Returns:
+        The quoted ETag, as S3 reports it.
+
+    """
+    whole = hashlib.md5()
+    parts: List[bytes] = []
+    part = hashlib.md5()
+    part_bytes = 0
+    with open(path, 'rb') as handle:
+        while True:
+            limit = HASH_CHUNK_SIZE if part_size is None else part_size - part_bytes
+            chunk = handle.read(min(HASH_CHUNK_SIZE, limit))
+            if not chunk:
+                break
+            whole.update(chunk)
+            if part_size is not None:
+                part.update(chunk)
+                part_bytes += len(chunk)
+                if part_bytes == part_size:
+                    parts.append(part.digest())
+                    part, part_bytes = hashlib.md5(), 0
+    if part_size is None:
+        return f'"{whole.hexdigest()}"'
+    if part_bytes or not parts:
+        parts.append(part.digest())
+    return f'"{hashlib.md5(b"".join(parts)).hexdigest()}-{len(parts)}"'
+
+
+def _is_unchanged(path: str, metadata: ObjectMetadata, part_size: int) -> bool:
+    """Return if a local file has the same size and ETag as an S3 object.
+
+    The ETag of an object uploaded in parts depends on the part size, which
+    is not recorded. The given part size, the part sizes common tools use,
+    and the fewest whole mebibytes per part are tried, in that order, if they
+    yield the object's number of parts.
+
+    """
+    if not metadata.exists or metadata.etag is None or not os.path.isfile(path):
+        return False
+    size = os.path.getsize(path)
+    if size != metadata.size:
+        return False
+    _, _, count = metadata.etag.strip('"').partition('-')
+    if not count:
+        return file_etag(path) == metadata.etag
+    parts = int(count)
+    candidates = [part_size, *COMMON_PART_SIZES, -(-size // (parts * MIB)) * MIB]
+    for candidate in sorted(set(candidates), key=candidates.index):
+        if candidate > 0 and max(1, -(-size // candidate)) == parts:
+            if file_etag(path, candidate) == metadata.etag:
+                return True
+    return False
+
+
+def upload_file(
+    path: str,
+    uri: Union[str, S3Uri],
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    skip_unchanged: bool = True,
+    client: Optional['BaseClient'] = None,
+) -> bool:
+    """Upload a local file to S3, streaming it from disk in concurrent parts.
+
+    Args:
+        path: The path of the local file.
+        uri: The S3 URI to upload to.
+        part_size: The size of each part of a multipart upload.
+        max_concurrency: The maximum number of parts uploaded concurrently.
+        skip_unchanged: Do not upload a file if an object with the same size
+            and ETag already exists.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Returns:
+        If the file was uploaded.
+
+    """
+    assert part_size >= MULTIPART_MIN_PART_SIZE, 'Parts must be at least 5 MiB.'
+    uri = S3Uri(uri)
+    client = aws_client.client('s3') if client is None else client
+    if skip_unchanged:
+        metadata = head_object_metadata(uri.bucket, uri.key, client=client)
+        if _is_unchanged(path, metadata, part_size):
+            return False
+    config = _transfer_config(part_size, max_concurrency)
+    try:
+        client.upload_file(path, uri.bucket, uri.key, Config=config)
+    finally:
+        uri.invalidate()
+    return True
+
+
+def download_file(
+    uri: Union[str, S3Uri],
+    path: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    skip_unchanged: bool = True,
+    client: Optional['BaseClient'] = None,
+) -> bool:
+    """Download an S3 object to a local file, streaming it to disk in concurrent parts.
+
+    Parent directories of the local file are created if they do not exist.
+
+    Args:
+        uri: The S3 URI to download.
+        path: The path of the local file.
+        part_size: The size of each ranged GET request.
+        max_concurrency: The maximum number of parts downloaded concurrently.
+        skip_unchanged: Do not download an object if a local file with the
+            same size and ETag already exists.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Returns:
+        If the object was downloaded.
+
+    Raises:
+        S3ObjectNotFoundError: If the object does not exist.
+
+    """
+    uri = S3Uri(uri)
+    client = aws_client.client('s3') if client is None else client
+    metadata = head_object_metadata(uri.bucket, uri.key, client=client)
+    if not metadata.exists:
+        raise S3ObjectNotFoundError(f'S3 object does not exist: {uri}')
+    if skip_unchanged and _is_unchanged(path, metadata, part_size):
+        return False
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    config = _transfer_config(part_size, max_concurrency)
+    client.download_file(uri.bucket, uri.key, path, Config=config)
+    return True
+
+
+def _as_prefix(prefix: Union[str, S3Uri]) -> S3Uri:
+    """Return an S3 URI prefix which ends with a delimiter."""
+    prefix = S3Uri(prefix)
+    if not prefix.path.endswith(S3Uri.delimiter):
+        return prefix + S3Uri.delimiter
+    return prefix
+
+
+def _list_metadata(prefix: S3Uri, client: 'BaseClient') -> Dict[str, ObjectMetadata]:
+    """List every object under a prefix, caching the metadata of each with the shared client."""
+    cache = get_metadata_cache() if _uses_shared_cache(client) else None
+    listed: Dict[str, ObjectMetadata] = dict()
+    paginator = client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=prefix.bucket, Prefix=prefix.key):
+        for item in page.get('Contents', []):
+            metadata = ObjectMetadata.from_response(item)
+            if cache is not None:
+                cache.put(prefix.bucket, item['Key'], metadata)
+            listed[item['Key']] = metadata
+    return listed
+
+
+def sync_to_s3(
+    directory: str,
+    prefix: Union[str, S3Uri],
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_workers: int = 8,
+    skip_unchanged: bool = True,
+    client: Optional['BaseClient'] = None,
+) -> Dict[S3Uri, bool]:
+    """Upload every file under a local directory to an S3 prefix.
+
+    The prefix is listed once to find which files are unchanged, and files
+    are uploaded concurrently.
+
+    Args:
+        directory: The local directory.
+        prefix: The S3 URI prefix the directory is mirrored under.
+        part_size: The size of each part of a multipart upload.
+        max_concurrency: The maximum number of parts uploaded concurrently per file,
+            lowered so that every file in flight shares the client's connection pool.
+        max_workers: The maximum number of files uploaded concurrently.
+        skip_unchanged: Do not upload files whose object has the same size and ETag.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Returns:
+        If the file for each S3 URI was uploaded.
+
+    """
+    client = aws_client.client('s3') if client is None else client
+    prefix = _as_prefix(prefix)
+    pairs: List[Tuple[str, S3Uri]] = []
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            relative = os.path.relpath(path, directory).replace(os.sep, S3Uri.delimiter)
+            pairs.append((path, prefix + relative))
+    listed = _list_metadata(prefix, client) if skip_unchanged else {}
+    max_concurrency = _per_file_concurrency(client, max_concurrency, max_workers)
+
+    def upload(pair: Tuple[str, S3Uri]) -> bool:
+        path, uri = pair
+        if uri.key in listed and _is_unchanged(path, listed[uri.key], part_size):
+            return False
+        return upload_file(path, uri, part_size, max_concurrency, False, client)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        uploaded = list(executor.map(upload, pairs))
+    return {uri: was_uploaded for (_, uri), was_uploaded in zip(pairs, uploaded)}
+
+
+def sync_from_s3(
+    prefix: Union[str, S3Uri],
+    directory: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_workers: int = 8,
+    skip_unchanged: bool = True,
+    client: Optional['BaseClient'] = None,
+) -> Dict[str, bool]:
+    """Download every object under an S3 prefix to a local directory.
+
+    Args:
+        prefix: The S3 URI prefix.
+        directory: The local directory the prefix is mirrored under.
+        part_size: The size of each ranged GET request.
+        max_concurrency: The maximum number of parts downloaded concurrently per object,
+            lowered so that every object in flight shares the client's connection pool.
+        max_workers: The maximum number of objects downloaded concurrently.
+        skip_unchanged: Do not download objects whose file has the same size and ETag.
+        client: The S3 client to use, defaults to the shared S3 client.
+
+    Returns:
+        If the object for each local path was downloaded.
+
+    Raises:
+        ValueError: If an object key would be written outside of the directory.
+
+    """
+    client = aws_client.client('s3') if client is None else client
+    prefix = _as_prefix(prefix)
+    root = os.path.abspath(directory)
+    pairs: List[Tuple[S3Uri, str]] = []
+    for key in sorted(_list_metadata(prefix, client)):
+        if key.endswith(S3Uri.delimiter):
+            continue
+        relative = key[len(prefix.key) :]
+        path = os.path.abspath(os.path.join(root, *relative.split(S3Uri.delimiter)))
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f'S3 object would be written outside of {directory}: {key}')
+        pairs.append((S3Uri(f'{prefix.scheme}{prefix.bucket}/{key}'), path))
+
+    max_concurrency = _per_file_concurrency(client, max_concurrency, max_workers)
+
+    def download(pair: Tuple[S3Uri, str]) -> bool:
+        uri, path = pair
+        return download_file(uri, path, part_size, max_concurrency, skip_unchanged, client)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        downloaded = list(executor.map(download, pairs))
+    return {path: was_downloaded for (_, path), was_downloaded in zip(pairs, downloaded)}
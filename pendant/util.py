@@ -1,5 +1,4 @@
 from datetime import datetime
-from typing import Type
 
 
 class ExitCode(int):
@@ -13,10 +12,13 @@ class ExitCode(int):
 
     """
 
-    def __new__(cls, exit_code: int) -> Type['ExitCode']:
+    _code: int
+
+    def __new__(cls, exit_code: int) -> 'ExitCode':
         """Make a new :class:`ExitCode`."""
-        cls._code = exit_code
-        return super().__new__(cls, exit_code)  # type: ignore
+        code = super().__new__(cls, exit_code)
+        code._code = exit_code
+        return code
 
     def is_ok(self) -> bool:
         """Is this code zero."""
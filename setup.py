@@ -11,7 +11,7 @@ setuptools.setup(
     version=VERSION,
     author='clintval',
     author_email='valentine.clint@gmail.com',
-    description='Python 3.6+ library for submitting to AWS Batch interactively.',
+    description='Python 3.7+ library for submitting to AWS Batch interactively.',
     url=f'https://github.com/clintval/{PACKAGE}',
     download_url=f'https://github.com/clintval/{PACKAGE}/archive/v{VERSION}.tar.gz',
     long_description=Path('README.md').read_text(),
@@ -19,13 +19,14 @@ setuptools.setup(
     license='MIT',
     zip_safe=False,
     packages=find_packages(),
+    python_requires='>=3.7',
     install_requires=['awscli', 'boto3', 'custom_inherit'],
+    extras_require={'zstd': ['zstandard']},
     keywords='AWS Batch job submission',
     classifiers=[
         'Development Status :: 2 - Pre-Alpha',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
     ],
     project_urls={
@@ -1,22 +1,62 @@
+import asyncio
+import gzip
+import hashlib
+import itertools
+import json
 import os
-from datetime import datetime
+import re
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 import botocore
 import boto3
 import moto
 import pytest
 
-from hypothesis import example, given
-from hypothesis.strategies import integers, datetimes
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+from botocore.stub import Stubber
 
-from pendant.aws.batch import BatchJob, JobDefinition
-from pendant.aws.exception import BatchJobSubmissionError, S3ObjectNotFoundError
-from pendant.aws.logs import AwsLogUtil, LogEvent
+from hypothesis import example, given
+from hypothesis.strategies import integers, datetimes, lists, text
+
+from pendant.aws.aio import AsyncBatchJob, wait_all as async_wait_all, wrap_jobs
+from pendant.aws.batch import (
+    ArrayBatchJob,
+    BatchJob,
+    BatchJobSet,
+    JobDefinition,
+    JobPoller,
+    JobTracker,
+)
+from pendant.aws.batch import array_job_parameters, bulk_log_stream_events, wait_all
+from pendant.aws import cli
+from pendant.aws.client import ClientProvider
+from pendant.aws.clidriver import CliDriverPool
+from pendant.aws.dag import JobGraph
+from pendant.aws.export import LogExporter, export_log_streams
+from pendant.aws.exception import BatchJobNotFoundError, BatchJobSubmissionError
+from pendant.aws.exception import BatchJobTimeoutError
+from pendant.aws.exception import S3ObjectNotFoundError
+from pendant.aws.journal import JobJournal
+from pendant.aws.listing import glob_keys, iter_keys
+from pendant.aws.logcache import LogCache
+from pendant.aws.metadata import MetadataCache, ObjectMetadata, get_metadata_cache
+from pendant.aws.logs import ERROR_FILTER_PATTERN, AwsLogUtil, LogEvent, LogEventBatch
 from pendant.aws.response import SubmitJobResponse
-from pendant.aws.s3 import S3Uri
+from pendant.aws.s3 import S3Uri, _parse
+from pendant.aws.throttle import Throttle, TokenBucket
+from pendant.aws.transfer import file_etag, sync_from_s3, sync_to_s3
+from pendant.aws.s3file import S3ObjectReader
 from pendant.aws.s3 import s3api_head_object, s3api_object_exists, s3_object_exists
+from pendant.aws.s3 import head_object_metadata, s3_objects_exist
 from pendant.util import format_ISO8601
 
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 RUNNING_IN_CI = True if os.environ.get('CI') == 'true' else False
 
 TEST_BUCKET_NAME = 'TEST_BUCKET'
@@ -67,6 +107,11 @@ TEST_LOG_EVENT_RESPONSES = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    get_metadata_cache().clear()
+
+
 @pytest.fixture
 def test_bucket():
     with moto.mock_s3():
@@ -124,6 +169,766 @@ def test_aws_batch_batch_job(test_bucket, test_job_definition, test_s3_uri):
     assert repr(job)
 
 
+def submit_job_response(job_name, job_id):
+    return {'ResponseMetadata': {'HTTPStatusCode': 200}, 'jobName': job_name, 'jobId': job_id}
+
+
+@pytest.fixture
+def test_batch_client():
+    return boto3.client('batch', region_name='us-east-1')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_batch_job_set_submit(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job_set = BatchJobSet([test_job_definition] * 3, max_workers=1, client=test_batch_client)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('submit_job', submit_job_response('first', 'job-1'))
+        stubber.add_client_error('submit_job', 'ClientException', http_status_code=400)
+        stubber.add_response('submit_job', submit_job_response('third', 'job-3'))
+        responses = job_set.submit(queue='prod')
+
+    assert len(job_set) == 3
+    assert [response.job_id for response in responses] == ['job-1', None, 'job-3']
+    assert [response.http_code() for response in responses] == [200, 400, 200]
+    assert not job_set.is_submitted()
+    assert [job for job, _ in job_set.failures()] == [job_set[1]]
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('submit_job', submit_job_response('second', 'job-2'))
+        responses = job_set.submit(queue='prod')
+
+    assert [response.job_id for response in responses] == ['job-1', 'job-2', 'job-3']
+    assert job_set.is_submitted()
+    assert job_set.failures() == []
+    assert repr(job_set) == 'BatchJobSet(jobs=3)'
+
+
+def submitted_job(definition, job_id, client):
+    job = BatchJob(definition, client=client)
+    job._is_submitted, job._job_id = True, job_id
+    return job
+
+
+def describe_jobs_response(job_ids, status):
+    jobs = [
+        {
+            'jobName': TEST_JOB_NAME,
+            'jobId': job_id,
+            'jobQueue': 'prod',
+            'status': status,
+            'startedAt': 0,
+            'jobDefinition': f'{TEST_JOB_NAME}:0',
+            'container': {'logStreamName': f'{TEST_JOB_NAME}/default/{job_id}'},
+        }
+        for job_id in job_ids
+    ]
+    return {'jobs': jobs}
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_job_tracker_refresh(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job_ids = [f'job-{index}' for index in range(150)]
+    jobs = [submitted_job(test_job_definition, job_id, test_batch_client) for job_id in job_ids]
+    tracker = JobTracker(jobs, client=test_batch_client)
+
+    assert len(tracker) == 150
+    assert all(job in tracker and job.tracker is tracker for job in jobs)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response(
+            'describe_jobs',
+            describe_jobs_response(job_ids[:100], 'RUNNING'),
+            {'jobs': job_ids[:100]},
+        )
+        stubber.add_response(
+            'describe_jobs',
+            describe_jobs_response(job_ids[100:], 'RUNNABLE'),
+            {'jobs': job_ids[100:]},
+        )
+        tracker.refresh()
+        stubber.assert_no_pending_responses()
+
+        assert jobs[0].is_running()
+        assert jobs[149].is_runnable()
+        assert jobs[149].log_stream_name() == f'{TEST_JOB_NAME}/default/job-149'
+        assert set(tracker.statuses().values()) == {'RUNNING', 'RUNNABLE'}
+
+    tracker.unregister(jobs[0])
+    assert jobs[0] not in tracker and jobs[0].tracker is None
+    with pytest.raises(BatchJobSubmissionError):
+        tracker.register(BatchJob(test_job_definition, client=test_batch_client))
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_job_tracker_caches_missing_jobs(
+    test_bucket, test_job_definition, test_batch_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job_ids = ['job-0', 'job-1', 'job-2']
+    jobs = [submitted_job(test_job_definition, job_id, test_batch_client) for job_id in job_ids]
+    tracker = JobTracker(jobs, client=test_batch_client)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response(
+            'describe_jobs', describe_jobs_response(job_ids[:2], 'RUNNING'), {'jobs': job_ids}
+        )
+        tracker.refresh()
+        assert [jobs[2].status() for _ in range(3)] == ['NOTFOUND'] * 3
+        stubber.assert_no_pending_responses()
+
+        tracker.max_age = 0
+        stubber.add_response(
+            'describe_jobs', describe_jobs_response(job_ids[2:], 'RUNNABLE'), {'jobs': job_ids[2:]}
+        )
+        assert jobs[2].status() == 'RUNNABLE'
+        assert tracker.statuses() == {'job-0': 'RUNNING', 'job-1': 'RUNNING', 'job-2': 'RUNNABLE'}
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_batch_job_caches_descriptions(
+    test_bucket, test_job_definition, test_batch_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-1', test_batch_client)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', describe_jobs_response(['job-1'], 'RUNNING'))
+        assert job.is_running() or job.is_runnable()
+        assert job.log_stream_name() == f'{TEST_JOB_NAME}/default/job-1'
+
+        stubber.add_response('describe_jobs', describe_jobs_response(['job-1'], 'SUCCEEDED'))
+        assert job.refresh()['status'] == 'SUCCEEDED'
+        stubber.assert_no_pending_responses()
+
+        job.max_age = 0
+        assert job.status() == 'SUCCEEDED'
+        assert job.refresh()['status'] == 'SUCCEEDED'
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_batch_job_refresh_not_found(
+    test_bucket, test_job_definition, test_batch_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-1', test_batch_client)
+    tracker = JobTracker([job], client=test_batch_client)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', {'jobs': []}, {'jobs': ['job-1']})
+        assert job.refresh() == {}
+        assert job.status() == 'NOTFOUND'
+        assert tracker.statuses() == {'job-1': 'NOTFOUND'}
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_wait_all(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [submitted_job(test_job_definition, f'job-{i}', test_batch_client) for i in range(2)]
+    poller = JobPoller(test_batch_client, intervals={'RUNNING': 0.01})
+
+    with Stubber(test_batch_client) as stubber:
+        running = describe_jobs_response(['job-0', 'job-1'], 'RUNNING')
+        finished = describe_jobs_response(['job-0', 'job-1'], 'SUCCEEDED')
+        finished['jobs'][1]['status'] = 'FAILED'
+        stubber.add_response('describe_jobs', running, {'jobs': ['job-0', 'job-1']})
+        stubber.add_response('describe_jobs', finished, {'jobs': ['job-0', 'job-1']})
+        assert wait_all(jobs, timeout=5, poller=poller) == ['SUCCEEDED', 'FAILED']
+        assert jobs[0].wait(poller=poller) == 'SUCCEEDED'
+        stubber.assert_no_pending_responses()
+
+    assert len(poller) == 0
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_wait_timeout(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    poller = JobPoller(test_batch_client, intervals={'RUNNABLE': 60})
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', describe_jobs_response(['job-0'], 'RUNNABLE'))
+        with pytest.raises(BatchJobTimeoutError):
+            job.wait(timeout=0.1, poller=poller)
+        assert job.is_runnable()
+        assert len(poller) == 0
+
+    with pytest.raises(BatchJobSubmissionError):
+        wait_all([BatchJob(test_job_definition, client=test_batch_client)])
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_wait_errors(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    poller = JobPoller(
+        test_batch_client,
+        intervals={'NOTFOUND': 0.01},
+        max_not_found=2,
+        max_errors=2,
+        error_interval=0.01,
+    )
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', {'jobs': []})
+        stubber.add_response('describe_jobs', {'jobs': []})
+        with pytest.raises(BatchJobNotFoundError):
+            job.wait(timeout=5, poller=poller)
+        stubber.add_client_error('describe_jobs', 'ServerException')
+        stubber.add_client_error('describe_jobs', 'ServerException')
+        with pytest.raises(botocore.exceptions.ClientError):
+            job.wait(timeout=5, poller=poller)
+        stubber.assert_no_pending_responses()
+
+    assert len(poller) == 0
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_wait_transient_error(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [submitted_job(test_job_definition, f'job-{i}', test_batch_client) for i in range(2)]
+    poller = JobPoller(test_batch_client, error_interval=0.01)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_client_error('describe_jobs', 'ThrottlingException', http_status_code=429)
+        finished = describe_jobs_response(['job-0', 'job-1'], 'SUCCEEDED')
+        stubber.add_response('describe_jobs', finished, {'jobs': ['job-0', 'job-1']})
+        assert wait_all(jobs, timeout=5, poller=poller) == ['SUCCEEDED', 'SUCCEEDED']
+        stubber.assert_no_pending_responses()
+
+    assert len(poller) == 0
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_array_batch_job(
+    test_bucket, test_job_definition, test_s3_uri, test_batch_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    definitions = [type(test_job_definition)(test_s3_uri) for _ in range(3)]
+    test_bucket.put_object(Key=f'{TEST_KEY_NAME}/third', Body=TEST_BODY)
+    definitions[2].s3_uri = test_s3_uri / 'third'
+    manifest = S3Uri(f's3://{TEST_BUCKET_NAME}/manifests/array.jsonl')
+    job = ArrayBatchJob(definitions, manifest, client=test_batch_client)
+
+    assert job.size == 3
+    with pytest.raises(BatchJobSubmissionError):
+        job.child(0)
+
+    with Stubber(test_batch_client) as stubber:
+        expected = {
+            'jobName': botocore.stub.ANY,
+            'jobQueue': 'prod',
+            'jobDefinition': f'{TEST_JOB_NAME}:0',
+            'parameters': {'manifest': str(manifest)},
+            'containerOverrides': {},
+            'arrayProperties': {'size': 3},
+        }
+        stubber.add_response('submit_job', submit_job_response('array', 'job-0'), expected)
+        job.submit(queue='prod')
+
+    assert array_job_parameters(manifest, 0) == definitions[0].to_dict()
+    assert array_job_parameters(manifest, 2) == definitions[2].to_dict()
+    for index in (-1, 3, 4):
+        with pytest.raises(IndexError):
+            array_job_parameters(manifest, index)
+    test_bucket.Object(f'{manifest.key}.index').delete()
+    assert array_job_parameters(manifest, 1) == definitions[1].to_dict()
+    with pytest.raises(IndexError):
+        array_job_parameters(manifest, 3)
+
+    children = job.children()
+    assert [child.job_id for child in children] == ['job-0:0', 'job-0:1', 'job-0:2']
+    assert children[2].definition is definitions[2]
+    assert children[2].is_submitted() and children[2].queue == 'prod'
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', describe_jobs_response(['job-0:2'], 'RUNNING'))
+        assert children[2].is_running()
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_dag_job_graph(test_bucket, test_job_definition, test_s3_uri, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    align, call, qc, report = [type(test_job_definition)(test_s3_uri) for _ in range(4)]
+    graph = JobGraph(max_workers=1, client=test_batch_client)
+    graph.add_edge(align, call)
+    graph.add_edge(align, qc)
+    graph.add_edge(call, report)
+    graph.add_edge(qc, report)
+
+    assert len(graph) == 4 and align in graph
+    assert [[job.definition for job in level] for level in graph.levels()] == [
+        [align],
+        [call, qc],
+        [report],
+    ]
+
+    with Stubber(test_batch_client) as stubber:
+        for index, depends_on in enumerate([[], ['job-0'], ['job-0'], ['job-1', 'job-2']]):
+            expected = {
+                'jobName': botocore.stub.ANY,
+                'jobQueue': 'prod',
+                'jobDefinition': f'{TEST_JOB_NAME}:0',
+                'parameters': {'s3_uri': str(test_s3_uri)},
+                'containerOverrides': {},
+            }
+            if depends_on:
+                expected['dependsOn'] = [{'jobId': job_id} for job_id in depends_on]
+            response = submit_job_response(str(index), f'job-{index}')
+            stubber.add_response('submit_job', response, expected)
+        responses = graph.submit(queue='prod')
+
+    assert [response.job_id for response in responses] == ['job-0', 'job-1', 'job-2', 'job-3']
+    assert repr(graph) == 'JobGraph(jobs=4, edges=4)'
+
+    graph.add_edge(report, align)
+    with pytest.raises(ValueError):
+        graph.levels()
+
+    resumed = JobGraph(client=test_batch_client)
+    resumed.add_edge(BatchJob.from_job_id(align, 'job-9', client=test_batch_client), call)
+    with Stubber(test_batch_client) as stubber:
+        response = submit_job_response('call', 'job-10')
+        stubber.add_response(
+            'submit_job', response, dict(expected, dependsOn=[{'jobId': 'job-9'}])
+        )
+        responses = resumed.submit(queue='prod')
+    assert [response.job_id for response in responses] == ['job-9', 'job-10']
+
+    fan_in = JobGraph(client=test_batch_client)
+    upstream = [type(test_job_definition)(test_s3_uri) for _ in range(21)]
+    for definition in upstream[:20]:
+        fan_in.add_edge(definition, report)
+    with pytest.raises(ValueError):
+        fan_in.add_edge(upstream[20], report)
+    assert len(fan_in.upstream(report)) == 20
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_journal_job_journal(
+    tmp_path, test_bucket, test_job_definition, test_s3_uri, test_batch_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    test_bucket.put_object(Key=f'{TEST_KEY_NAME}/second', Body=TEST_BODY)
+    definition_class = type(test_job_definition)
+    first, second = definition_class(test_s3_uri), definition_class(test_s3_uri / 'second')
+    journal = JobJournal(str(tmp_path / 'journal.sqlite'))
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('submit_job', submit_job_response('first', 'job-0'))
+        stubber.add_response('submit_job', submit_job_response('second', 'job-1'))
+        BatchJobSet(
+            [first, second], max_workers=1, client=test_batch_client, journal=journal
+        ).submit(queue='prod')
+
+    assert [entry.job_id for entry in journal.entries()] == ['job-0', 'job-1']
+    assert journal.find(first).parameters == first.to_dict()
+    assert journal.entry('job-1').status == 'SUBMITTED'
+
+    journal.close()
+    journal = JobJournal(str(tmp_path / 'journal.sqlite'))
+    job_set = BatchJobSet([first, second], client=test_batch_client, journal=journal)
+    assert job_set.is_submitted()
+    assert [response.job_id for response in job_set.submit(queue='prod')] == ['job-0', 'job-1']
+
+    with Stubber(test_batch_client) as stubber:
+        finished = describe_jobs_response(['job-0'], 'SUCCEEDED')
+        stubber.add_response('describe_jobs', finished, {'jobs': ['job-0', 'job-1']})
+        assert journal.refresh(client=test_batch_client) == {'job-0': 'SUCCEEDED'}
+        stubber.add_response('describe_jobs', {'jobs': []}, {'jobs': ['job-1']})
+        assert journal.refresh(client=test_batch_client) == {}
+
+    (job,) = journal.rehydrate({TEST_JOB_NAME: definition_class}, active=True)
+    assert job.job_id == 'job-1' and job.queue == 'prod' and job.journal is journal
+    assert str(job.definition.s3_uri) == str(test_s3_uri / 'second')
+    assert len(journal) == 2
+
+    journal.update({'job-1': 'FAILED'})
+    assert journal.find(second) is None
+    assert journal.find(second, statuses=['FAILED']).job_id == 'job-1'
+    assert not BatchJobSet([second], client=test_batch_client, journal=journal).is_submitted()
+
+    jobs = journal.rehydrate({TEST_JOB_NAME: definition_class}, client=test_batch_client)
+    with Stubber(test_batch_client) as stubber:
+        assert [job.status() for job in jobs] == ['SUCCEEDED', 'FAILED']
+        assert wait_all(jobs) == ['SUCCEEDED', 'FAILED']
+        stubber.add_response('describe_jobs', describe_jobs_response(['job-0'], 'SUCCEEDED'))
+        assert jobs[0].log_stream_name() == f'{TEST_JOB_NAME}/default/job-0'
+        stubber.assert_no_pending_responses()
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_journal_job_journal_updates_once_per_sweep(
+    tmp_path, test_bucket, test_job_definition, test_batch_client, monkeypatch
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    journal = JobJournal(str(tmp_path / 'journal.sqlite'))
+    job_ids = ['job-0', 'job-1', 'job-2']
+    jobs = [submitted_job(test_job_definition, job_id, test_batch_client) for job_id in job_ids]
+    for job in jobs:
+        job.journal = journal
+        journal.record(job)
+    updates = []
+    monkeypatch.setattr(journal, 'update', updates.append)
+    tracker = JobTracker(jobs, client=test_batch_client)
+    poller = JobPoller(client=test_batch_client)
+
+    with Stubber(test_batch_client) as stubber:
+        stubber.add_response('describe_jobs', describe_jobs_response(job_ids, 'RUNNING'))
+        tracker.refresh()
+        stubber.add_response('describe_jobs', describe_jobs_response(job_ids, 'SUCCEEDED'))
+        assert wait_all(jobs, timeout=5, poller=poller) == ['SUCCEEDED'] * 3
+        stubber.assert_no_pending_responses()
+
+    assert updates == [dict.fromkeys(job_ids, 'RUNNING'), dict.fromkeys(job_ids, 'SUCCEEDED')]
+
+
+def add_follow_responses(batch_stubber, logs_stubber):
+    runnable = describe_jobs_response(['job-0'], 'RUNNABLE')
+    del runnable['jobs'][0]['container']
+    batch_stubber.add_response('describe_jobs', runnable)
+    for status in ('RUNNING', 'RUNNING', 'RUNNING', 'SUCCEEDED'):
+        batch_stubber.add_response('describe_jobs', describe_jobs_response(['job-0'], status))
+
+    pages = [
+        (TEST_LOG_EVENT_RESPONSES[:2], None, 'f/1'),
+        ([], 'f/1', 'f/1'),
+        ([], 'f/1', 'f/1'),
+        (TEST_LOG_EVENT_RESPONSES[2:], 'f/1', 'f/2'),
+        ([], 'f/2', 'f/2'),
+    ]
+    for records, token, next_token in pages:
+        expected = {
+            'logGroupName': '/aws/batch/job',
+            'logStreamName': f'{TEST_JOB_NAME}/default/job-0',
+            'startFromHead': True,
+        }
+        if token is not None:
+            expected['nextToken'] = token
+        logs_stubber.add_response(
+            'get_log_events', log_events_response(records, next_token), expected
+        )
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_follow_log_stream_events(
+    test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    job.log_util = AwsLogUtil(client=test_logs_client)
+
+    with Stubber(test_batch_client) as batch_stubber, Stubber(test_logs_client) as logs_stubber:
+        add_follow_responses(batch_stubber, logs_stubber)
+        events = list(job.follow_log_stream_events(min_interval=0))
+        batch_stubber.assert_no_pending_responses()
+        logs_stubber.assert_no_pending_responses()
+
+    assert [event.message for event in events] == [
+        record['message'] for record in TEST_LOG_EVENT_RESPONSES
+    ]
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_aio_follow_log_stream_events(
+    test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    job.log_util = AwsLogUtil(client=test_logs_client)
+
+    async def follow():
+        return [event async for event in AsyncBatchJob(job).follow_log_stream_events(0)]
+
+    loop = asyncio.new_event_loop()
+    with Stubber(test_batch_client) as batch_stubber, Stubber(test_logs_client) as logs_stubber:
+        add_follow_responses(batch_stubber, logs_stubber)
+        events = loop.run_until_complete(follow())
+    loop.close()
+
+    assert len(events) == len(TEST_LOG_EVENT_RESPONSES)
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_batch_bulk_log_stream_events(
+    test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [submitted_job(test_job_definition, f'job-{i}', test_batch_client) for i in range(3)]
+    jobs[0]._update(describe_jobs_response(['job-0'], 'RUNNING')['jobs'][0])
+    streams = [f'{TEST_JOB_NAME}/default/job-{i}' for i in range(3)]
+    records = [
+        dict(record, logStreamName=streams[index % 3])
+        for index, record in enumerate(TEST_LOG_EVENT_RESPONSES)
+    ]
+    log_util = AwsLogUtil(client=test_logs_client)
+
+    with Stubber(test_batch_client) as batch_stubber, Stubber(test_logs_client) as logs_stubber:
+        described = describe_jobs_response(['job-1', 'job-2'], 'RUNNING')
+        batch_stubber.add_response('describe_jobs', described, {'jobs': ['job-1', 'job-2']})
+        expected = {'logGroupName': '/aws/batch/job', 'logStreamNames': streams}
+        logs_stubber.add_response(
+            'filter_log_events', {'events': records[:2], 'nextToken': 'n/1'}, expected
+        )
+        logs_stubber.add_response(
+            'filter_log_events', {'events': records[2:]}, dict(expected, nextToken='n/1')
+        )
+        grouped = bulk_log_stream_events(jobs, log_util=log_util, client=test_batch_client)
+
+    assert [len(grouped[job]) for job in jobs] == [2, 1, 1]
+    assert [event.log_stream_name for event in grouped[jobs[0]]] == [streams[0]] * 2
+
+    with Stubber(test_logs_client) as logs_stubber:
+        for index, stream in enumerate(streams):
+            expected = {
+                'logGroupName': '/aws/batch/job',
+                'logStreamName': stream,
+                'startFromHead': True,
+            }
+            page = [
+                TEST_LOG_EVENT_RESPONSES[index]
+                for index, record in enumerate(records)
+                if record['logStreamName'] == stream
+            ]
+            logs_stubber.add_response('get_log_events', log_events_response(page, 'f/1'), expected)
+            logs_stubber.add_response(
+                'get_log_events', log_events_response([], 'f/1'), dict(expected, nextToken='f/1')
+            )
+        merged = bulk_log_stream_events(
+            jobs, merge=True, use_filter=False, max_workers=1, log_util=log_util
+        )
+
+    timestamps = [event.timestamp for event in merged]
+    assert len(merged) == 4 and timestamps == sorted(timestamps)
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_export_log_exporter(
+    monkeypatch, tmp_path, test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    job._update(describe_jobs_response(['job-0'], 'SUCCEEDED')['jobs'][0])
+    log_util = AwsLogUtil(client=test_logs_client)
+    stream = dict(
+        logGroupName='/aws/batch/job',
+        logStreamName=f'{TEST_JOB_NAME}/default/job-0',
+        startFromHead=True,
+    )
+    messages = [record['message'] for record in TEST_LOG_EVENT_RESPONSES]
+
+    def read(body):
+        return [json.loads(line)['message'] for line in gzip.decompress(body).splitlines()]
+
+    monkeypatch.setattr('pendant.aws.export.CHECKPOINT_BYTES', 1)
+    exporter = LogExporter(str(tmp_path), log_util=log_util)
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[:2], 'f/1')
+        stubber.add_response('get_log_events', response, stream)
+        stubber.add_client_error('get_log_events', 'ServiceUnavailableException')
+        with pytest.raises(botocore.exceptions.ClientError):
+            exporter.export([job])
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[2:], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        response = log_events_response([], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/2'))
+        locations = exporter.export([job])
+        stubber.assert_no_pending_responses()
+
+    assert locations == {job: str(tmp_path / 'job-0.jsonl.gz')}
+    assert sorted(os.listdir(tmp_path)) == ['job-0.jsonl.gz']
+    assert read((tmp_path / 'job-0.jsonl.gz').read_bytes()) == messages
+
+    config = Config(request_checksum_calculation='when_required')
+    monkeypatch.setattr('pendant.aws.client._provider', ClientProvider(config=config))
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES, 'f/1')
+        stubber.add_response('get_log_events', response, stream)
+        response = log_events_response([], 'f/1')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        locations = export_log_streams(
+            [job], S3Uri(f's3://{TEST_BUCKET_NAME}/logs'), log_util=log_util
+        )
+
+    assert locations == {job: f's3://{TEST_BUCKET_NAME}/logs/job-0.jsonl.gz'}
+    assert read(test_bucket.Object('logs/job-0.jsonl.gz').get()['Body'].read()) == messages
+
+    monkeypatch.setitem(sys.modules, 'zstandard', None)
+    with pytest.raises(ImportError, match=re.escape('pip install pendant[zstd]')):
+        LogExporter(str(tmp_path), compression='zstd')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_export_log_exporter_unfinished_job(
+    monkeypatch, test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    job.max_age = 3600
+    job._update(describe_jobs_response(['job-0'], 'RUNNING')['jobs'][0])
+    log_util = AwsLogUtil(client=test_logs_client)
+    stream = dict(
+        logGroupName='/aws/batch/job',
+        logStreamName=f'{TEST_JOB_NAME}/default/job-0',
+        startFromHead=True,
+    )
+    config = Config(request_checksum_calculation='when_required')
+    monkeypatch.setattr('pendant.aws.client._provider', ClientProvider(config=config))
+    monkeypatch.setattr('pendant.aws.export.CHECKPOINT_BYTES', 1)
+    monkeypatch.setattr('pendant.aws.export.MULTIPART_MIN_PART_SIZE', 1)
+    monkeypatch.setattr('moto.s3.models.S3_UPLOAD_PART_MIN_SIZE', 1)
+    exporter = LogExporter(S3Uri(f's3://{TEST_BUCKET_NAME}/logs'), part_size=1, log_util=log_util)
+
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[:2], 'f/1')
+        stubber.add_response('get_log_events', response, stream)
+        response = log_events_response([], 'f/1')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        assert exporter.export([job]) == {}
+
+    keys = [item.key for item in test_bucket.objects.filter(Prefix='logs/')]
+    assert keys == ['logs/job-0.jsonl.gz.checkpoint']
+
+    job._update(describe_jobs_response(['job-0'], 'SUCCEEDED')['jobs'][0])
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[2:], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        response = log_events_response([], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/2'))
+        locations = exporter.export([job])
+        stubber.assert_no_pending_responses()
+
+    assert locations == {job: f's3://{TEST_BUCKET_NAME}/logs/job-0.jsonl.gz'}
+    body = test_bucket.Object('logs/job-0.jsonl.gz').get()['Body'].read()
+    lines = gzip.decompress(body).splitlines()
+    assert [json.loads(line)['message'] for line in lines] == [
+        record['message'] for record in TEST_LOG_EVENT_RESPONSES
+    ]
+    keys = [item.key for item in test_bucket.objects.filter(Prefix='logs/')]
+    assert keys == ['logs/job-0.jsonl.gz']
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_export_log_exporter_recently_stopped_job(
+    tmp_path, test_bucket, test_job_definition, test_batch_client, test_logs_client
+):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    job = submitted_job(test_job_definition, 'job-0', test_batch_client)
+    job.max_age = 3600
+    description = describe_jobs_response(['job-0'], 'SUCCEEDED')['jobs'][0]
+    job._update(dict(description, stoppedAt=int(1000 * datetime.now().timestamp())))
+    stream = dict(
+        logGroupName='/aws/batch/job',
+        logStreamName=f'{TEST_JOB_NAME}/default/job-0',
+        startFromHead=True,
+    )
+    exporter = LogExporter(str(tmp_path), log_util=AwsLogUtil(client=test_logs_client))
+
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[:2], 'f/1')
+        stubber.add_response('get_log_events', response, stream)
+        response = log_events_response([], 'f/1')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        assert exporter.export([job]) == {}
+
+    assert sorted(os.listdir(tmp_path)) == ['job-0.jsonl.gz.checkpoint', 'job-0.jsonl.gz.part']
+
+    job._update(dict(description, stoppedAt=0))
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[2:], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/1'))
+        response = log_events_response([], 'f/2')
+        stubber.add_response('get_log_events', response, dict(stream, nextToken='f/2'))
+        assert exporter.export([job]) == {job: str(tmp_path / 'job-0.jsonl.gz')}
+        stubber.assert_no_pending_responses()
+
+    lines = gzip.decompress((tmp_path / 'job-0.jsonl.gz').read_bytes()).splitlines()
+    assert [json.loads(line)['message'] for line in lines] == [
+        record['message'] for record in TEST_LOG_EVENT_RESPONSES
+    ]
+    assert sorted(os.listdir(tmp_path)) == ['job-0.jsonl.gz']
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_aio_async_batch_job(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [BatchJob(test_job_definition, client=test_batch_client) for _ in range(3)]
+
+    async def submit_and_describe():
+        async_jobs = wrap_jobs(jobs, max_concurrency=1, executor=ThreadPoolExecutor(1))
+        responses = await asyncio.gather(*(job.submit(queue='prod') for job in async_jobs))
+        statuses = await asyncio.gather(*(job.status() for job in async_jobs))
+        return responses, statuses
+
+    loop = asyncio.new_event_loop()
+    with Stubber(test_batch_client) as stubber:
+        for index in range(3):
+            stubber.add_response('submit_job', submit_job_response(str(index), f'job-{index}'))
+        for index in range(3):
+            stubber.add_response(
+                'describe_jobs', describe_jobs_response([f'job-{index}'], 'RUNNING')
+            )
+        responses, statuses = loop.run_until_complete(submit_and_describe())
+    loop.close()
+
+    assert [response.job_id for response in responses] == ['job-0', 'job-1', 'job-2']
+    assert statuses == ['RUNNING'] * 3
+    assert repr(AsyncBatchJob(jobs[0])).startswith('AsyncBatchJob(job=BatchJob(')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_aio_wait_all(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [submitted_job(test_job_definition, f'job-{i}', test_batch_client) for i in range(2)]
+    poller = JobPoller(test_batch_client, intervals={'RUNNING': 0.01})
+
+    async def wait():
+        async_jobs = wrap_jobs(jobs, max_concurrency=1)
+        statuses = await async_wait_all(async_jobs, timeout=5, poller=poller)
+        return statuses, await async_jobs[0].wait(poller=poller)
+
+    class NoExecutor(ThreadPoolExecutor):
+        def submit(self, *args, **kwargs):
+            raise AssertionError('Waiting must not use an executor thread.')
+
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(NoExecutor())
+    with Stubber(test_batch_client) as stubber:
+        running = describe_jobs_response(['job-0', 'job-1'], 'RUNNING')
+        finished = describe_jobs_response(['job-0', 'job-1'], 'SUCCEEDED')
+        stubber.add_response('describe_jobs', running, {'jobs': ['job-0', 'job-1']})
+        stubber.add_response('describe_jobs', finished, {'jobs': ['job-0', 'job-1']})
+        statuses, status = loop.run_until_complete(wait())
+        stubber.assert_no_pending_responses()
+    loop.close()
+
+    assert statuses == ['SUCCEEDED', 'SUCCEEDED']
+    assert status == 'SUCCEEDED'
+    assert len(poller) == 0
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_aio_wait_all_timeout(test_bucket, test_job_definition, test_batch_client):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    jobs = [submitted_job(test_job_definition, f'job-{i}', test_batch_client) for i in range(2)]
+    poller = JobPoller(test_batch_client, intervals={'RUNNING': 60})
+
+    loop = asyncio.new_event_loop()
+    with Stubber(test_batch_client) as stubber:
+        running = describe_jobs_response(['job-0', 'job-1'], 'RUNNING')
+        running['jobs'][0]['status'] = 'SUCCEEDED'
+        stubber.add_response('describe_jobs', running, {'jobs': ['job-0', 'job-1']})
+        with pytest.raises(BatchJobTimeoutError, match='job-1'):
+            loop.run_until_complete(async_wait_all(jobs, timeout=0.5, poller=poller))
+    loop.close()
+
+    assert len(poller) == 0
+
+
 @pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
 def test_aws_batch_job_definition_validate(test_bucket, test_job_definition, test_s3_uri):
     with pytest.raises(S3ObjectNotFoundError):
@@ -160,6 +965,30 @@ def test_aws_batch_job_definition_to_dict(test_job_definition, test_s3_uri):
     assert actual == expected
 
 
+def test_aws_client_client_provider_caches_clients():
+    provider = ClientProvider(region_name='us-east-1', endpoint_url='http://localhost:5000')
+    batch = provider.client('batch')
+    assert batch is provider.client('batch')
+    assert batch is not provider.client('batch', region_name='us-west-2')
+    assert batch.meta.endpoint_url == 'http://localhost:5000'
+    assert batch.meta.config.max_pool_connections == 32
+
+    provider.clear()
+    assert batch is not provider.client('batch')
+
+
+def test_aws_client_client_provider_caches_resources_per_thread():
+    provider = ClientProvider(region_name='us-east-1')
+    resources = []
+
+    thread = threading.Thread(target=lambda: resources.append(provider.resource('s3')))
+    thread.start()
+    thread.join()
+
+    assert provider.resource('s3') is provider.resource('s3')
+    assert provider.resource('s3') is not resources[0]
+
+
 @moto.mock_logs
 @pytest.mark.xfail(
     RUNNING_IN_CI, raises=botocore.exceptions.NoRegionError, reason='Running on TravisCI'
@@ -168,6 +997,145 @@ def test_aws_logs_log_util():
     AwsLogUtil()
 
 
+@pytest.fixture
+def test_logs_client():
+    return boto3.client('logs', region_name='us-east-1')
+
+
+def log_events_response(records, forward_token, backward_token='b/0'):
+    return {
+        'events': records,
+        'nextForwardToken': forward_token,
+        'nextBackwardToken': backward_token,
+    }
+
+
+def test_aws_logs_log_util_follows_forward_tokens(test_logs_client):
+    log_util = AwsLogUtil(client=test_logs_client)
+    stream = dict(logGroupName='/aws/batch/job', logStreamName='stream', startFromHead=True)
+
+    with Stubber(test_logs_client) as stubber:
+        pages = [TEST_LOG_EVENT_RESPONSES[:2], TEST_LOG_EVENT_RESPONSES[2:], []]
+        tokens = [None, 'f/1', 'f/2']
+        for page, token, next_token in zip(pages, tokens, ['f/1', 'f/2', 'f/2']):
+            expected = dict(stream, limit=2, **({'nextToken': token} if token else {}))
+            stubber.add_response('get_log_events', log_events_response(page, next_token), expected)
+        events = log_util.iter_log_events('/aws/batch/job', 'stream', page_size=2)
+        assert not isinstance(events, list)
+        assert [event.message for event in events] == [
+            record['message'] for record in TEST_LOG_EVENT_RESPONSES
+        ]
+        stubber.assert_no_pending_responses()
+
+    with Stubber(test_logs_client) as stubber:
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES, 'f/1')
+        stubber.add_response('get_log_events', response, dict(stream, startFromHead=False))
+        events = log_util.get_log_event_batch(
+            '/aws/batch/job', 'stream', start_from_head=False, max_bytes=1
+        )
+        assert isinstance(events, LogEventBatch) and len(events) == 1
+
+
+def test_aws_logs_log_util_filters_server_side(test_logs_client):
+    log_util = AwsLogUtil(client=test_logs_client)
+    window = dict(startTime=1_543_809_955_000, endTime=1_543_809_956_000)
+
+    with Stubber(test_logs_client) as stubber:
+        expected = dict(
+            logGroupName='/aws/batch/job',
+            logStreamName='stream',
+            startFromHead=True,
+            **window,
+        )
+        response = log_events_response(TEST_LOG_EVENT_RESPONSES[1:], 'f/1')
+        stubber.add_response('get_log_events', response, expected)
+        stubber.add_response(
+            'get_log_events', log_events_response([], 'f/1'), dict(expected, nextToken='f/1')
+        )
+        start_time = datetime(2018, 12, 3, 4, 5, 55, tzinfo=timezone.utc)
+        events = log_util.get_log_events(
+            '/aws/batch/job', 'stream', start_time=start_time, end_time=window['endTime']
+        )
+        assert len(events) == len(TEST_LOG_EVENT_RESPONSES[1:])
+        assert isinstance(events, list) and isinstance(events[0], LogEvent)
+
+    with Stubber(test_logs_client) as stubber:
+        expected = dict(
+            logGroupName='/aws/batch/job',
+            logStreamNames=['stream'],
+            filterPattern=ERROR_FILTER_PATTERN,
+            **window,
+        )
+        response = {'events': TEST_LOG_EVENT_RESPONSES[2:3]}
+        stubber.add_response('filter_log_events', response, expected)
+        events = log_util.get_error_log_events(
+            '/aws/batch/job', 'stream', start_time=window['startTime'], end_time=window['endTime']
+        )
+        assert [event.message for event in events] == [TEST_LOG_EVENT_RESPONSES[2]['message']]
+        stubber.assert_no_pending_responses()
+
+
+def test_aws_logcache_settles_before_reading(tmp_path, test_logs_client, monkeypatch):
+    cache = LogCache(str(tmp_path))
+    log_util = AwsLogUtil(client=test_logs_client, cache=cache)
+    reads = []
+
+    def read_since(group_name, stream_name, token):
+        reads.append(token)
+        return LogEventBatch([]), token
+
+    monkeypatch.setattr(log_util, 'read_since', read_since)
+    monkeypatch.setattr('pendant.aws.logs.is_settled', lambda stopped_at, delay: bool(reads))
+    log_util.get_cached_log_events('/aws/batch/job', 'stream', complete=True, stopped_at=0)
+    assert not cache.is_complete('/aws/batch/job', 'stream')
+    log_util.get_cached_log_events('/aws/batch/job', 'stream', complete=True, stopped_at=0)
+    assert cache.is_complete('/aws/batch/job', 'stream')
+
+
+def test_aws_logcache_log_cache(tmp_path, test_logs_client):
+    cache = LogCache(str(tmp_path))
+    log_util = AwsLogUtil(client=test_logs_client, cache=cache)
+    stream = dict(logGroupName='/aws/batch/job', logStreamName='stream', startFromHead=True)
+    messages = [record['message'] for record in TEST_LOG_EVENT_RESPONSES]
+
+    with Stubber(test_logs_client) as stubber:
+        pages = [TEST_LOG_EVENT_RESPONSES[:2], [], [], TEST_LOG_EVENT_RESPONSES[2:], [], []]
+        tokens = [None, 'f/1', 'f/1', 'f/1', 'f/2', 'f/2']
+        next_tokens = ['f/1', 'f/1', 'f/1', 'f/2', 'f/2', 'f/2']
+        for page, token, next_token in zip(pages, tokens, next_tokens):
+            expected = dict(stream, **({'nextToken': token} if token else {}))
+            stubber.add_response('get_log_events', log_events_response(page, next_token), expected)
+        events = log_util.get_cached_log_events('/aws/batch/job', 'stream')
+        assert events.messages() == messages[:2]
+        assert not cache.is_complete('/aws/batch/job', 'stream')
+
+        stopped_at = datetime.now(timezone.utc)
+        for _ in range(2):
+            events = log_util.get_cached_log_events(
+                '/aws/batch/job', 'stream', complete=True, stopped_at=stopped_at
+            )
+            assert not cache.is_complete('/aws/batch/job', 'stream')
+        assert events.messages() == messages
+
+        stopped_at = stopped_at - timedelta(minutes=5)
+        events = log_util.get_cached_log_events(
+            '/aws/batch/job', 'stream', complete=True, stopped_at=stopped_at
+        )
+        assert cache.is_complete('/aws/batch/job', 'stream')
+        stubber.assert_no_pending_responses()
+
+    with Stubber(test_logs_client):
+        events = log_util.get_cached_log_events('/aws/batch/job', 'stream')
+    assert events.messages() == messages
+    assert events[0].timestamp == TEST_LOG_EVENT_RESPONSES[0]['timestamp']
+    assert ('/aws/batch/job', 'stream') in cache and len(cache) == 1
+
+    cache.max_bytes = cache.size
+    cache.append('/aws/batch/job', 'other', LogEventBatch(TEST_LOG_EVENT_RESPONSES), 'f/1')
+    assert ('/aws/batch/job', 'stream') not in cache
+    assert LogCache(str(tmp_path)).read('/aws/batch/job', 'other').messages() == messages
+
+
 def test_aws_logs_event_log():
     record = TEST_LOG_EVENT_RESPONSES[0]
     log = LogEvent(record)
@@ -180,6 +1148,89 @@ def test_aws_logs_event_log():
     )
 
 
+def test_aws_logs_log_event_batch():
+    records = [dict(record, logStreamName='a') for record in TEST_LOG_EVENT_RESPONSES]
+    batch = LogEventBatch(records)
+    assert not hasattr(LogEvent(records[0]), '__dict__')
+    assert len(batch) == len(records)
+    assert batch.messages() == [record['message'] for record in records]
+    assert batch.nbytes == sum(len(record['message'].encode()) for record in records)
+
+    view = batch[-1]
+    assert not hasattr(view, '__dict__')
+    assert view.timestamp == records[-1]['timestamp']
+    assert view.ingestion_time == records[-1]['ingestionTime']
+    assert view.log_stream_name == 'a'
+    assert repr(view.to_event()) == repr(LogEvent(records[-1]))
+    with pytest.raises(IndexError):
+        batch[len(records)]
+
+    assert batch[1:3].messages() == batch.messages()[1:3]
+    assert batch[::2].messages() == batch.messages()[::2]
+    assert len(batch.between(start_time=1_543_809_955_437)) == len(records) - 1
+    assert len(batch.between(end_time=1_543_809_955_437)) == 1
+
+    other = LogEventBatch([dict(records[0], timestamp=1, message='first', logStreamName='b')])
+    merged = LogEventBatch.merge([batch, other])
+    assert merged[0].message == 'first' and merged[0].log_stream_name == 'b'
+    assert len(LogEventBatch.concat([batch, other]).between(end_time=2)) == 1
+    assert batch.is_sorted() and merged.is_sorted() and merged[1:].is_sorted()
+    assert not LogEventBatch.concat([batch, other]).is_sorted()
+    assert not batch.take([1, 0]).is_sorted()
+    assert not LogEventBatch.concat([batch, other])[-2:].is_sorted()
+    assert {name: len(events) for name, events in merged.by_stream().items()} == {
+        'a': len(records),
+        'b': 1,
+    }
+    assert LogEventBatch.from_events(merged).messages() == merged.messages()
+    assert repr(other) == 'LogEventBatch(events=1, nbytes=5)'
+
+
+def test_aws_throttle_token_bucket():
+    now, slept = [0.0], []
+    bucket = TokenBucket(rate=2, clock=lambda: now[0], sleep=slept.append)
+
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.5
+    now[0] = 2.0
+    assert bucket.acquire() == 0.0
+    assert slept == [0.5]
+
+
+def test_aws_throttle_retries_throttled_calls(test_batch_client):
+    class RawResponse(object):
+        def __init__(self, body):
+            self.body = body
+
+        def stream(self, **kwargs):
+            yield self.body
+
+    attempts = []
+
+    def respond(request, **kwargs):
+        attempts.append(request)
+        if len(attempts) <= 2:
+            headers = {'x-amzn-errortype': 'TooManyRequestsException'}
+            return AWSResponse(request.url, 429, headers, RawResponse(b'{}'))
+        return AWSResponse(request.url, 200, {}, RawResponse(b'{"jobs": []}'))
+
+    throttle = Throttle(rates={'DescribeJobs': 100}, base_delay=0.001)
+    throttle.register(test_batch_client)
+    test_batch_client.meta.events.register('before-send.batch', respond)
+
+    assert test_batch_client.describe_jobs(jobs=['job-0'])['jobs'] == []
+    stats = throttle.stats.operation('batch.DescribeJobs')
+    assert len(attempts) == 3
+    assert stats['calls'] == 3 and stats['throttles'] == 2 and stats['retries'] == 2
+    assert throttle.stats.total()['retries'] == 2
+
+    throttle.max_attempts = 1
+    attempts.clear()
+    with pytest.raises(botocore.exceptions.ClientError):
+        test_batch_client.describe_jobs(jobs=['job-0'])
+
+
 def test_aws_response_submit_job_response():
     response = SubmitJobResponse(TEST_SUBMIT_JOB_RESPONSE_JSON)
     assert response.http_code() == 200
@@ -267,12 +1318,340 @@ def test_aws_s3_s3uri_key():
     assert key == S3Uri(f's3://{TEST_BUCKET_NAME}/{key}').key
 
 
+@given(text(alphabet='ab/\n', max_size=8))
+@example('\n/key')
+def test_aws_s3_s3uri_parses_like_patterns(rest):
+    path = f's3://{rest}'
+    bucket = re.search(r'^s3://([^/]*)', path)
+    key = re.search(r'^s3://[^/\n]+/?(.*)?', path)
+    uri = S3Uri(path)
+    assert uri.bucket == (bucket.groups()[0] if bucket else '')
+    assert uri.key == (key.groups()[0] or '' if key else '')
+
+
+@given(lists(text(alphabet='ab/\n', max_size=6), max_size=6))
+def test_aws_s3_s3uri_from_paths_parses_like_s3uri(rests):
+    paths = [f's3://{rest}' for rest in rests]
+    uris = S3Uri.from_paths([*paths, *map(S3Uri, paths)])
+    assert [(uri.path, uri.bucket, uri.key) for uri in uris] == [
+        (uri.path, uri.bucket, uri.key) for uri in map(S3Uri, paths * 2)
+    ]
+
+
+@given(text(alphabet='ab/\n', max_size=6), text(alphabet='ab/\n', max_size=4))
+def test_aws_s3_s3uri_join_parses_like_s3uri(rest, part):
+    uri = S3Uri(f's3://{rest}')
+    for joined in (uri / part, uri + part):
+        expected = _parse(joined.path)
+        assert (joined.bucket, joined.key) == expected
+        assert (S3Uri(joined.path).bucket, S3Uri(joined.path).key) == expected
+
+
+def test_aws_s3_s3uri_hash_and_equality():
+    paths = [f's3://{TEST_BUCKET_NAME}/{index}' for index in range(3)]
+    uris = S3Uri.from_paths(iter(paths))
+    assert uris == [S3Uri(path) for path in paths]
+    assert [uri.key for uri in uris] == ['0', '1', '2']
+    assert len({*uris, S3Uri(paths[0])}) == 3
+    assert {uris[0]: True}[S3Uri(uris[0])]
+    assert S3Uri(paths[0]) != paths[0]
+    assert not hasattr(uris[0], '__dict__')
+
+
 def test_aws_s3_s3uri_str():
     base = S3Uri(f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}')
     assert f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}' == str(base)
     assert f'S3Uri(\'s3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}\')' == repr(base)
 
 
+def test_aws_s3_s3_objects_exist(test_bucket):
+    for index in range(10):
+        test_bucket.put_object(Key=f'reads/sample-{index:02}.bam', Body=TEST_BODY)
+        test_bucket.put_object(Key=f'reads/nested/sample-{index:02}.bam', Body=TEST_BODY)
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    client = boto3.client('s3', region_name='us-east-1')
+    calls = []
+    client.meta.events.register('before-call.s3', lambda model, **_: calls.append(model.name))
+
+    dense = [f's3://{TEST_BUCKET_NAME}/reads/sample-{index:02}.bam' for index in range(2, 12)]
+    sparse = [f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}', f's3://{TEST_BUCKET_NAME}/missing']
+    exists = s3_objects_exist(dense + sparse, client=client)
+
+    assert exists == {S3Uri(path): path in dense[:8] + sparse[:1] for path in dense + sparse}
+    assert sorted(calls) == ['HeadObject', 'HeadObject', 'ListObjectsV2']
+
+    get_metadata_cache().clear()
+    calls.clear()
+    listings = []
+    client.meta.events.register(
+        'before-parameter-build.s3.ListObjectsV2', lambda params, **_: listings.append(params)
+    )
+    sampled = [f's3://{TEST_BUCKET_NAME}/reads/sample-{index:02}.bam' for index in (3, 5, 9)]
+    exists = s3_objects_exist(
+        sampled, min_keys_per_listing=1, page_size=2, max_pages_per_listing=1, client=client
+    )
+
+    assert exists == {S3Uri(path): True for path in sampled}
+    assert [params['StartAfter'] for params in listings] == ['reads/sample-03.bal']
+    assert sorted(calls) == ['HeadObject', 'HeadObject', 'ListObjectsV2']
+
+
+def test_aws_s3_other_clients_bypass_metadata_cache(test_bucket):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    cache = get_metadata_cache()
+    cache.clear()
+    cache.put(TEST_BUCKET_NAME, 'stale', ObjectMetadata.from_response({'ContentLength': 1}))
+    client = boto3.client('s3', region_name='us-east-1')
+    uris = [f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}', f's3://{TEST_BUCKET_NAME}/stale']
+
+    assert not head_object_metadata(TEST_BUCKET_NAME, 'stale', client=client).exists
+    assert head_object_metadata(TEST_BUCKET_NAME, TEST_KEY_NAME, client=client).exists
+    assert s3_objects_exist(uris, client=client) == {S3Uri(uris[0]): True, S3Uri(uris[1]): False}
+    assert len(cache) == 1 and cache.get(TEST_BUCKET_NAME, 'stale').exists
+
+    assert head_object_metadata(TEST_BUCKET_NAME, 'stale').exists
+    assert head_object_metadata(TEST_BUCKET_NAME, TEST_KEY_NAME).exists
+    assert len(cache) == 2
+
+
+def test_aws_metadata_metadata_cache():
+    now = [0.0]
+    cache = MetadataCache(max_entries=2, ttl=10, negative_ttl=1, clock=lambda: now[0])
+    found = ObjectMetadata.from_response({'ContentLength': 9, 'ETag': '"e"'})
+    cache.put('bucket', 'found', found)
+    cache.put('bucket', 'missing', ObjectMetadata.missing())
+    assert cache.get('bucket', 'found').size == 9
+    assert not cache.get('bucket', 'missing').exists
+
+    now[0] = 2.0
+    assert cache.get('bucket', 'missing') is None
+    cache.put('bucket', 'versioned', found, version_id='v1')
+    cache.put('other', 'found', found)
+    assert cache.get('bucket', 'found') is None and len(cache) == 2
+
+    cache.invalidate('bucket', 'versioned')
+    assert cache.get('bucket', 'versioned', version_id='v1') is None
+    now[0] = 20.0
+    assert cache.get('other', 'found') is None
+    assert len(cache) == 0 and cache._versions == {}
+
+    cache.put('bucket', 'versioned', found, version_id='v1')
+    cache.put('bucket', 'versioned', found, version_id='v2')
+    assert cache._versions == {'bucket': {'versioned': {'v1', 'v2'}}}
+    cache.invalidate('bucket', 'versioned')
+    assert len(cache) == 0 and cache._versions == {}
+    cache.put('bucket', 'found', found)
+    cache.put('bucket', 'versioned', found)
+    cache.invalidate('bucket')
+    assert len(cache) == 0 and cache._versions == {}
+
+
+def test_aws_s3_s3uri_metadata(test_bucket):
+    uri = S3Uri(f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}')
+    assert uri.size() is None
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    assert uri.size() == len(TEST_BODY)
+    assert uri.etag() == test_bucket.Object(TEST_KEY_NAME).e_tag
+    assert uri.last_modified() is not None
+
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY * 2)
+    assert s3api_head_object(TEST_BUCKET_NAME, TEST_KEY_NAME)['ContentLength'] == len(TEST_BODY)
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_s3_s3uri_open(test_bucket, test_s3_uri):
+    with pytest.raises(S3ObjectNotFoundError):
+        test_s3_uri.open()
+    body = bytes(range(256)) * 64
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=body)
+
+    with test_s3_uri.open('rb', block_size=1024, max_blocks=4) as handle:
+        assert handle.read(4) == body[:4]
+        assert handle.raw.requests == 1 and handle.raw.bytes_requested == 1024
+        handle.seek(-10, os.SEEK_END)
+        assert handle.read() == body[-10:]
+        handle.seek(100)
+        assert handle.read(2000) == body[100:2100]
+        assert handle.raw.requests == 4
+        assert handle.raw.bytes_requested == 4 * 1024
+
+    with test_s3_uri.open('rb', block_size=1024, read_ahead=3, max_blocks=8) as handle:
+        assert handle.read(4096) == body[:4096]
+        assert handle.raw.requests == 1
+
+    with test_s3_uri.open('rb', block_size=1000, prefetch=4, max_blocks=8) as handle:
+        assert handle.read() == body
+        assert handle.raw.bytes_requested == len(body)
+
+    with test_s3_uri.open('rb', block_size=1000, prefetch=2, max_blocks=8) as handle:
+        assert handle.read(1000) == body[:1000]
+        assert sorted(handle.raw._pending) == [1, 2]
+        handle.seek(10_000)
+        assert handle.read(10) == body[10_000:10_010]
+        assert not handle.raw._pending
+
+    body = bytes(reversed(body))
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=body)
+    with test_s3_uri.open('rb') as handle:
+        assert handle.read() == body
+
+    with pytest.raises(ValueError):
+        test_s3_uri.open('wb')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_s3_s3uri_open_text(test_bucket, test_s3_uri):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body='sample,reads\nNA12878,1000\n'.encode())
+    with test_s3_uri.open('r', block_size=8, encoding='utf-8') as handle:
+        assert handle.readline() == 'sample,reads\n'
+        assert handle.read() == 'NA12878,1000\n'
+
+
+def md5_etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def test_aws_transfer_file_etag(tmp_path):
+    path = tmp_path / 'reads.bam'
+    path.write_bytes(b'a' * 10 + b'b' * 5)
+    assert file_etag(str(path)) == md5_etag(b'a' * 10 + b'b' * 5)
+    parts = hashlib.md5(b'a' * 10).digest() + hashlib.md5(b'b' * 5).digest()
+    assert file_etag(str(path), part_size=10) == f'"{hashlib.md5(parts).hexdigest()}-2"'
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_s3_s3uri_upload_and_download(test_bucket, test_s3_uri, tmp_path, monkeypatch):
+    config = Config(request_checksum_calculation='when_required')
+    monkeypatch.setattr('pendant.aws.client._provider', ClientProvider(config=config))
+    part_size = 5 * 1024**2
+    body = os.urandom(part_size + 1024)
+    (tmp_path / 'reads.bam').write_bytes(body)
+
+    assert test_s3_uri.upload_from(str(tmp_path / 'reads.bam'), part_size=part_size)
+    assert test_s3_uri.etag().endswith('-2"') and test_s3_uri.size() == len(body)
+    assert not test_s3_uri.upload_from(str(tmp_path / 'reads.bam'), part_size=part_size)
+
+    assert test_s3_uri.download_to(str(tmp_path / 'copy' / 'reads.bam'))
+    assert (tmp_path / 'copy' / 'reads.bam').read_bytes() == body
+    assert not test_s3_uri.download_to(str(tmp_path / 'copy' / 'reads.bam'))
+    with pytest.raises(S3ObjectNotFoundError):
+        (test_s3_uri + '.bai').download_to(str(tmp_path / 'reads.bam.bai'))
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_transfer_sync(test_bucket, tmp_path, monkeypatch):
+    import pendant.aws.transfer
+
+    config = Config(request_checksum_calculation='when_required', max_pool_connections=8)
+    monkeypatch.setattr('pendant.aws.client._provider', ClientProvider(config=config))
+    concurrency = []
+    transfer_config = pendant.aws.transfer._transfer_config
+
+    def record_config(part_size, max_concurrency):
+        concurrency.append(max_concurrency)
+        return transfer_config(part_size, max_concurrency)
+
+    monkeypatch.setattr('pendant.aws.transfer._transfer_config', record_config)
+    source, target = tmp_path / 'source', tmp_path / 'target'
+    (source / 'sample-1').mkdir(parents=True)
+    (source / 'sample-1' / 'reads.bam').write_bytes(b'reads')
+    (source / 'manifest.csv').write_bytes(b'sample\nsample-1\n')
+    prefix = S3Uri(f's3://{TEST_BUCKET_NAME}/inputs')
+
+    uploaded = sync_to_s3(str(source), prefix)
+    assert uploaded == {prefix / 'manifest.csv': True, prefix / 'sample-1/reads.bam': True}
+    (source / 'manifest.csv').write_bytes(b'sample\nsample-2\n')
+    uploaded = sync_to_s3(str(source), prefix)
+    assert uploaded == {prefix / 'manifest.csv': True, prefix / 'sample-1/reads.bam': False}
+
+    downloaded = sync_from_s3(prefix, str(target), max_workers=4)
+    assert set(downloaded.values()) == {True}
+    assert set(concurrency) == {1, 2}
+    assert (target / 'sample-1' / 'reads.bam').read_bytes() == b'reads'
+    assert not any(sync_from_s3(prefix, str(target)).values())
+
+    test_bucket.put_object(Key='inputs/../escape', Body=b'')
+    with pytest.raises(ValueError):
+        sync_from_s3(prefix, str(target))
+
+
+@pytest.fixture
+def test_samples(test_bucket):
+    keys = [
+        f'samples/{index:03d}/reads.{suffix}'
+        for index in range(30)
+        for suffix in 'bam bai'.split()
+    ]
+    for key in keys + ['samples/manifest.csv']:
+        test_bucket.put_object(Key=key, Body=b'')
+    return sorted(keys + ['samples/manifest.csv'])
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_listing_iter_keys(test_samples):
+    assert list(iter_keys(TEST_BUCKET_NAME, 'samples/', page_size=5, shards=4)) == test_samples
+    assert list(iter_keys(TEST_BUCKET_NAME, 'samples/', shards=1)) == test_samples
+    assert list(iter_keys(TEST_BUCKET_NAME, 'missing/', page_size=5)) == []
+
+    keys = iter_keys(TEST_BUCKET_NAME, 'samples/', page_size=2, shards=8, max_workers=2)
+    assert list(itertools.islice(keys, 3)) == test_samples[:3]
+    keys.close()
+
+    client = boto3.client('s3', region_name='us-east-1')
+    starts = []
+    client.meta.events.register(
+        'before-parameter-build.s3.ListObjectsV2',
+        lambda params, **_: starts.append(params.get('StartAfter')),
+    )
+    keys = list(iter_keys(TEST_BUCKET_NAME, 'samples/', page_size=5, shards=4, client=client))
+    assert keys == test_samples
+    boundaries = sorted(start for start in starts if start is not None)
+    assert len(boundaries) == 3 and boundaries[0] > test_samples[4]
+    assert all(test_samples[4].startswith(start[:-1]) for start in boundaries)
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_s3_s3uri_iterdir_and_glob(test_samples):
+    samples = S3Uri(f's3://{TEST_BUCKET_NAME}/samples')
+    children = [uri.key for uri in samples.iterdir(page_size=4, shards=4)]
+    assert children == [f'samples/{index:03d}/' for index in range(30)] + ['samples/manifest.csv']
+
+    def glob(pattern: str) -> list:
+        return [uri.key for uri in samples.glob(pattern, page_size=4)]
+
+    assert glob('*/reads.bam') == [key for key in test_samples if key.endswith('.bam')]
+    assert glob('00[0-4]/*.ba?') == test_samples[:10]
+    assert glob('0[!0-1]9/reads.bai') == ['samples/029/reads.bai']
+    assert glob('0[^0-1]9/reads.bai') == ['samples/009/reads.bai', 'samples/019/reads.bai']
+    assert glob('**/*.bai') == [key for key in test_samples if key.endswith('.bai')]
+    assert glob('manifest.csv') == ['samples/manifest.csv']
+    assert glob('missing.csv') == []
+
+    client = boto3.client('s3', region_name='us-east-1')
+    prefixes = []
+    client.meta.events.register(
+        'before-parameter-build.s3.ListObjectsV2',
+        lambda params, **_: prefixes.append(params['Prefix']),
+    )
+    keys = list(glob_keys(TEST_BUCKET_NAME, '01**.bai', 'samples/', page_size=4, client=client))
+    assert keys == [key for key in test_samples if re.match(r'samples/01\d/reads.bai', key)]
+    assert set(prefixes) == {'samples/01'}
+
+
+def test_aws_s3file_rejected_reader_closes_cleanly():
+    rejected = []
+
+    class Reader(S3ObjectReader):
+        def __init__(self, *args, **kwargs):
+            rejected.append(self)
+            super().__init__(*args, **kwargs)
+
+    with pytest.raises(AssertionError):
+        Reader(TEST_BUCKET_NAME, TEST_KEY_NAME, block_size=0)
+    rejected[0].close()
+    assert rejected[0].closed
+
+
 @pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
 def test_aws_s3_s3api_head_object(test_bucket):
     with pytest.raises(RuntimeError):
@@ -280,6 +1659,19 @@ def test_aws_s3_s3api_head_object(test_bucket):
     test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
     metadata = s3api_head_object(TEST_BUCKET_NAME, TEST_KEY_NAME)
     assert metadata['ContentLength'] == 9
+    with pytest.raises(RuntimeError):
+        s3api_head_object(TEST_BUCKET_NAME, TEST_KEY_NAME, profile='missing')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_s3_s3api_head_object_after_listing(test_bucket):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    uri = S3Uri(f's3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME}')
+    assert s3_objects_exist([uri], min_keys_per_listing=1) == {uri: True}
+    assert get_metadata_cache().get(TEST_BUCKET_NAME, TEST_KEY_NAME).is_partial
+    metadata = s3api_head_object(TEST_BUCKET_NAME, TEST_KEY_NAME)
+    assert metadata['ContentLength'] == len(TEST_BODY)
+    assert not get_metadata_cache().get(TEST_BUCKET_NAME, TEST_KEY_NAME).is_partial
 
 
 @pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
@@ -289,6 +1681,88 @@ def test_aws_s3_s3api_object_exists(test_bucket):
     assert s3api_object_exists(TEST_BUCKET_NAME, TEST_KEY_NAME)
 
 
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_cli_is_thread_safe(test_bucket):
+    command = f'--output json s3api head-object --bucket {TEST_BUCKET_NAME} --key {TEST_KEY_NAME}'
+    with pytest.raises(RuntimeError, match='404'):
+        cli(command)
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = list(executor.map(cli, [command] * 8))
+    assert all(json.loads(output)['ContentLength'] == len(TEST_BODY) for output in outputs)
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_cli_driver_pool(test_bucket):
+    pool = CliDriverPool(max_idle=1)
+    streams, locale = (sys.stdout, sys.stderr), os.environ.get('LC_CTYPE')
+    exit_code, stdout, stderr = pool.run(['--region', 'us-east-1', 's3api', 'list-buckets'])
+    assert exit_code.is_ok() and not stderr
+    assert TEST_BUCKET_NAME in stdout
+    assert len(pool) == 1
+    assert (sys.stdout, sys.stderr) == streams and os.environ.get('LC_CTYPE') == locale
+
+    driver = pool._acquire((None, 'us-east-1'))
+    assert driver.driver.session.instance_variables().get('region') is None
+    assert driver.output.values() == ('', '')
+    pool._release((None, 'us-east-1'), driver)
+    assert not pool.run(['s3api', 'head-bucket', '--bucket', 'missing'])[0].is_ok()
+    assert len(pool) == 1
+    pool.clear()
+    assert len(pool) == 0
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_cli_captures_s3_commands(test_bucket, capsys, tmp_path):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    assert TEST_KEY_NAME in cli(f's3 ls s3://{TEST_BUCKET_NAME}/')
+    local = tmp_path / 'object'
+    output = cli(f's3 cp s3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME} {local}')
+    assert 'download: ' in output and local.read_text() == TEST_BODY
+    with pytest.raises(RuntimeError, match='usage'):
+        cli('s3api head-object --bucket')
+    with pytest.raises(RuntimeError, match='could not be found'):
+        cli(f'--profile missing s3 ls s3://{TEST_BUCKET_NAME}/')
+    assert capsys.readouterr() == ('', '')
+
+
+@pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
+def test_aws_cli_does_not_capture_other_threads(test_bucket, capsys):
+    test_bucket.put_object(Key=TEST_KEY_NAME, Body=TEST_BODY)
+    streams, command = (sys.stdout, sys.stderr), f's3 cp s3://{TEST_BUCKET_NAME}/{TEST_KEY_NAME} -'
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outputs = executor.map(cli, [command] * 4)
+        print('unrelated')
+        assert list(outputs) == [TEST_BODY] * 4
+    assert (sys.stdout, sys.stderr) == streams
+    assert capsys.readouterr() == ('unrelated\n', '')
+
+
+def test_aws_import_defers_heavy_dependencies():
+    heavy = {'awscli.clidriver', 'boto3', 'botocore.client', 'botocore.config', 'botocore.session'}
+    modules = ['pendant', 'pendant.aws.batch', 'pendant.aws.logs', 'pendant.aws.s3']
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {", ".join(modules)}'],
+        cwd=PACKAGE_ROOT,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    imported = {
+        line.rsplit('|', 1)[-1].strip()
+        for line in process.stderr.splitlines()
+        if line.startswith('import time:')
+    }
+    assert set(modules) <= imported
+    assert not heavy & imported
+
+    import pendant
+
+    assert pendant.aws.dag.JobGraph is JobGraph
+    with pytest.raises(AttributeError):
+        pendant.aws.missing
+
+
 @pytest.mark.xfail(RUNNING_IN_CI, reason='Running on TravisCI')
 def test_aws_s3_s3_object_exists(test_bucket):
     assert not s3_object_exists(TEST_BUCKET_NAME, TEST_KEY_NAME)